@@ -0,0 +1,82 @@
+# api/loadtest.py
+"""
+Concurrent load test for POST /audit: reports throughput and p50/p95/p99.
+
+Run the API first:  uvicorn api.server:app --port 8000
+Then:               python -m api.loadtest --requests 2000 --concurrency 64
+Batch endpoint:     python -m api.loadtest --requests 20000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+QUERIES = [
+    "how do I charge a payment?",
+    "what are the latest webhook events?",
+    "how to migrate from v1 to v3?",
+    "what is the auth API login endpoint?",
+    "rate limits policy?",
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def run(url, n_requests, concurrency, top_k, dataset_id, batch_size=1):
+    latencies = []
+    errors = 0
+    counter = iter(range(n_requests))
+
+    async with httpx.AsyncClient(base_url=url, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                body = [
+                    {"query": QUERIES[(i * batch_size + j) % len(QUERIES)], "top_k": top_k, "dataset_id": dataset_id}
+                    for j in range(batch_size)
+                ]
+                t0 = time.perf_counter()
+                try:
+                    if batch_size == 1:
+                        resp = await client.post("/audit", json=body[0])
+                    else:
+                        resp = await client.post("/audit/batch", json=body)
+                    resp.raise_for_status()
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"\n📈 {n_requests} requests x {batch_size} queries, concurrency {concurrency}, {elapsed:.2f}s")
+    print(f"   throughput: {len(latencies) / elapsed:8.1f} req/s "
+          f"({len(latencies) * batch_size / elapsed:.1f} queries/s)   errors: {errors}")
+    if latencies:
+        print(f"   mean {statistics.fmean(latencies):7.2f} ms | p50 {percentile(latencies, 50):7.2f} ms | "
+              f"p95 {percentile(latencies, 95):7.2f} ms | p99 {percentile(latencies, 99):7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GhostTrace /audit load test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dataset-id", default=None)
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="queries per request; >1 uses POST /audit/batch")
+    args = parser.parse_args()
+
+    n_requests = max(1, args.requests // args.batch_size)
+    asyncio.run(run(args.url, n_requests, args.concurrency, args.top_k, args.dataset_id, args.batch_size))
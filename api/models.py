@@ -1,10 +1,21 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 
+class SearchFilters(BaseModel):
+    """Metadata predicates applied inside the index search."""
+    doc_types: Optional[List[str]] = None
+    min_version: Optional[str] = Field(None, pattern=r"^\d+(\.\d+)?$")
+    max_version: Optional[str] = Field(None, pattern=r"^\d+(\.\d+)?$")
+    exclude_deprecated: bool = False
+
 class AuditRequest(BaseModel):
     query: str
-    top_k: Optional[int] = 5
+    top_k: Optional[int] = Field(5, ge=1, le=50)
     dataset_id: Optional[str] = None
+    filters: Optional[SearchFilters] = None
+    # the bot's reply: risk is then scored on the chunks its sentences came from
+    answer: Optional[str] = Field(None, max_length=20_000)
+    cited_chunk_ids: Optional[List[str]] = None  # evidence "chunk_id"s the bot cited
 
 class AuditResponse(BaseModel):
     risk_score: float
@@ -13,3 +24,16 @@ class AuditResponse(BaseModel):
     evidence: List[Dict[str, Any]]
     sources: List[str]
     timestamp: str
+    attribution: Optional[List[Dict[str, Any]]] = None  # one entry per answer sentence
+    ghost_identifiers: List[Dict[str, Any]] = []  # stale-only identifiers found in the answer (or query)
+
+class BatchAuditItem(BaseModel):
+    index: int  # position in the request list
+    ok: bool
+    result: Optional[AuditResponse] = None
+    error: Optional[str] = None
+
+class BatchAuditResponse(BaseModel):
+    count: int
+    errors: int
+    items: List[BatchAuditItem]
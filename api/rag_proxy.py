@@ -1,22 +1,336 @@
 # api/rag_proxy.py
-from .models import AuditRequest
+"""
+Bridge between the FastAPI layer and the retrieval + risk engines.
+
+Retrieval (TF-IDF transform + FAISS search) and risk scoring are CPU-bound,
+so they run in a bounded executor; the event loop only awaits the result.
+
+    GHOSTTRACE_EXECUTOR   thread (default) | process
+    GHOSTTRACE_WORKERS    executor size (default: CPU count)
+    GHOSTTRACE_MAX_QUEUE  max audits in flight before callers wait (default: 4 x workers)
+    GHOSTTRACE_BATCH_CHUNK  queries per executor task in batch audits (default: 256)
+    GHOSTTRACE_STREAM_CHUNK   queries per executor task in streaming audits (default: 64)
+    GHOSTTRACE_STREAM_WINDOW  streaming chunks in flight per request (default: workers)
+"""
+
 import asyncio
-import random
+import json
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+from pydantic import ValidationError
 
-async def call_rag_engine(request: AuditRequest) -> dict:
-    """Mock RAG Engine - Replace with real rag_engine later"""
-    await asyncio.sleep(0.3)  # Simulate processing
+from rag_engine.cache import cache_key, get_cache
+from rag_engine.explanation import generate_explanation
+from rag_engine.registry import DatasetNotFound, get_registry, get_risk_engine
+
+from .models import AuditRequest
+
+EXECUTOR_KIND = os.getenv("GHOSTTRACE_EXECUTOR", "thread")
+WORKERS = int(os.getenv("GHOSTTRACE_WORKERS", os.cpu_count() or 4))
+MAX_QUEUE = int(os.getenv("GHOSTTRACE_MAX_QUEUE", WORKERS * 4))
+
+BATCH_CHUNK = int(os.getenv("GHOSTTRACE_BATCH_CHUNK", 256))
+STREAM_CHUNK = int(os.getenv("GHOSTTRACE_STREAM_CHUNK", 64))
+STREAM_WINDOW = int(os.getenv("GHOSTTRACE_STREAM_WINDOW", WORKERS))
+
+DEFAULT_TOP_K = 5
+
+_executor: Optional[Executor] = None
+_in_flight: Optional[asyncio.Semaphore] = None
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- SYNC WORK (runs in the executor) ----------------
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def to_audit_response(results, risk, attribution=None, used=None) -> dict:
+    """
+    GhostRAG.search() results + compute_risk() output -> AuditResponse fields.
 
-    # Mock response (your real RAG will return this format)
+    With an answer attribution, `used` are the chunks the risk was scored on
+    (cited chunks that weren't retrieved are appended to the evidence).
+    """
+    scored = results if used is None else used
+    evidence = list(results)
+    if used is not None:
+        retrieved = {r["id"] for r in results}
+        evidence += [r for r in used if r["id"] not in retrieved]
+    attributed = {r["id"] for r in scored}
     return {
-        "risk_score": random.uniform(45, 95),
-        "risk_level": random.choice(["LOW", "MEDIUM", "HIGH"]),
-        "explanation": f"🔍 Analyzed '{request.query}' across 12 documents. Found {random.randint(2, 5)} potential risks.",
+        "risk_score": float(risk["score"]),
+        "risk_level": risk["level"],
+        "explanation": generate_explanation(risk),
         "evidence": [
-            {"chunk": "Suspicious payment clause detected", "score": 0.87},
-            {"chunk": "Unusual chargeback pattern", "score": 0.76}
+            {
+                "chunk": r["snippet"],
+                "score": r["score"],
+                "file": r["file"],
+                "version": r["version"],
+                "deprecated": r["deprecated"],
+                "doc_type": r["doc_type"],
+                "chunk_id": r.get("chunk_id"),
+                "current_equivalent": r.get("current_equivalent"),
+                **({"attributed": r["id"] in attributed} if attribution is not None else {}),
+            }
+            for r in evidence
         ],
-        "sources": [f"doc_{i}.pdf" for i in range(1, 4)],
-        "timestamp": "2026-02-04T22:52:00Z"
+        "sources": list(dict.fromkeys(r["file"] for r in scored)),
+        "timestamp": _now(),
+        "attribution": attribution,
     }
+
+
+def run_audit(query: str, top_k: int, dataset_id: Optional[str],
+              filters: Optional[Dict[str, Any]] = None, answer: Optional[Dict[str, Any]] = None) -> dict:
+    """Retrieve + score one query. Blocking; call through the executor."""
+    return run_audit_batch([query], [top_k], dataset_id, filters, [answer])[0]
+
+
+def run_audit_batch(queries: List[str], top_ks: List[int], dataset_id: Optional[str],
+                    filters: Optional[Dict[str, Any]] = None,
+                    answers: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[dict]:
+    """
+    Retrieve + score many queries of one dataset (and one metadata filter):
+    cached answers are reused, the misses go through one vectorizer transform
+    and one index search per distinct top_k, then one risk pass.
+
+    answers[i] ({"answer", "cited_chunk_ids"} or None): the bot's reply to
+    queries[i]; its risk is scored on the chunks the answer is attributed to.
+    """
+    rag = get_registry().get(dataset_id)
+    engine = get_risk_engine(rag)
+    cache = get_cache()
+    answers = answers or [None] * len(queries)
+
+    # an edited rule file must not be answered from the cache
+    generation = f"{rag.generation}:{engine.rules.checksum}"
+    keys = [
+        cache_key("audit", query, top_k, dataset_id, generation, filters, answer)
+        for query, top_k, answer in zip(queries, top_ks, answers)
+    ]
+    out: List[Optional[dict]] = [cache.get(key) for key in keys]
+    misses = [i for i, hit in enumerate(out) if hit is None]
+
+    if misses:
+        # one vectorized search per distinct top_k: a deep item doesn't make the
+        # rest of the chunk fetch, decode and attribute hits it would drop
+        by_top_k: Dict[int, List[int]] = {}
+        for i in misses:
+            by_top_k.setdefault(top_ks[i], []).append(i)
+        found: Dict[int, List[Dict]] = {}
+        for top_k, group in by_top_k.items():
+            found.update(zip(group, rag.search_batch([queries[i] for i in group], top_k=top_k, filters=filters)))
+        result_sets = [found[i] for i in misses]
+
+        # only chunks the answer actually drew on are scored
+        attributions, used_sets = [], []
+        for i, results in zip(misses, result_sets):
+            answer = answers[i]
+            attribution, used = (None, results) if answer is None else rag.attribute(
+                answer["answer"], results, answer.get("cited_chunk_ids") or ())
+            attributions.append(attribution)
+            used_sets.append(used)
+
+        # the text the user sees: the answer if we have it, else the question
+        ghost_hits = [engine.scan_identifiers(answers[i]["answer"] if answers[i] else queries[i]) for i in misses]
+        risks = engine.compute_risk_batch(used_sets, ghost_hits)
+        for i, results, risk, attribution, used, ghosts in zip(
+                misses, result_sets, risks, attributions, used_sets, ghost_hits):
+            out[i] = to_audit_response(results, risk, attribution, used)
+            out[i]["ghost_identifiers"] = ghosts
+            cache.set(keys[i], out[i])
+
+    now = _now()
+    return [dict(response, timestamp=now) for response in out]
+
+
+def _error_message(e: Exception, dataset_id: Optional[str]) -> str:
+    if isinstance(e, DatasetNotFound):
+        return f"Dataset '{dataset_id}' is not ingested"
+    return f"{type(e).__name__}: {e}"
+
+
+def warm_up(dataset_id: Optional[str] = None) -> None:
+    """
+    Load a dataset into this process's registry so the first audit doesn't
+    pay the load. Returns nothing and never raises: it runs as the process
+    pool's initializer, and a bad dataset must not take the server down.
+    """
+    try:
+        get_registry().get(dataset_id)
+    except DatasetNotFound as e:
+        logger.warning("Dataset '%s' not loaded: %s", dataset_id or "default", e)
+    except Exception:
+        logger.exception("Warm-up of dataset '%s' failed", dataset_id or "default")
+
+
+# ---------------- ASYNC FACADE ----------------
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if EXECUTOR_KIND == "process":
+            # each worker process has its own registry: warm it as it starts
+            _executor = ProcessPoolExecutor(max_workers=WORKERS, initializer=warm_up)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="ghosttrace-audit")
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def offload(fn, *args):
+    """Run blocking work in the executor, with at most MAX_QUEUE calls in flight."""
+    global _in_flight
+    if _in_flight is None:
+        _in_flight = asyncio.Semaphore(MAX_QUEUE)
+
+    async with _in_flight:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), fn, *args)
+
+
+async def call_rag_engine(request: AuditRequest) -> dict:
+    """Real RAG path: GhostRAG.search + GhostTraceRiskEngine.compute_risk."""
+    top_k = request.top_k or DEFAULT_TOP_K
+    return await offload(run_audit, request.query, top_k, request.dataset_id, _filters(request), _answer(request))
+
+
+def _filters(request: AuditRequest) -> Optional[Dict[str, Any]]:
+    """Set filter fields only, so an empty filter shares the unfiltered cache entries."""
+    if request.filters is None:
+        return None
+    return request.filters.model_dump(exclude_defaults=True) or None
+
+
+def _answer(request: AuditRequest) -> Optional[Dict[str, Any]]:
+    """The bot's answer + citations to attribute, or None for a retrieval-only audit."""
+    if request.answer is None:
+        return None
+    return {"answer": request.answer, "cited_chunk_ids": request.cited_chunk_ids or []}
+
+
+def _validate(i: int, raw: Any) -> Tuple[Optional[AuditRequest], Optional[dict]]:
+    try:
+        return AuditRequest.model_validate(raw), None
+    except ValidationError as e:
+        return None, {"index": i, "ok": False, "error": f"Invalid request: {e.errors()[0]['msg']}"}
+
+
+async def _audit_chunk(dataset_id: Optional[str], chunk: List[Tuple[int, AuditRequest]]) -> List[dict]:
+    """One vectorized executor task for queries of a single dataset + filter -> batch items."""
+    try:
+        responses = await offload(
+            run_audit_batch,
+            [request.query for _, request in chunk],
+            [request.top_k or DEFAULT_TOP_K for _, request in chunk],
+            dataset_id,
+            _filters(chunk[0][1]),
+            [_answer(request) for _, request in chunk],
+        )
+        return [{"index": i, "ok": True, "result": r} for (i, _), r in zip(chunk, responses)]
+    except Exception as e:
+        if len(chunk) == 1:
+            return [{"index": chunk[0][0], "ok": False, "error": _error_message(e, dataset_id)}]
+        # isolate the offending item(s): retry one by one
+        parts = await asyncio.gather(*(_audit_chunk(dataset_id, [item]) for item in chunk))
+        return [item for part in parts for item in part]
+
+
+def _by_dataset(chunk: List[Tuple[int, AuditRequest]]) -> Dict[Tuple[Optional[str], str], List[Tuple[int, AuditRequest]]]:
+    """Group by (dataset_id, filters): one search_batch call serves one group."""
+    groups: Dict[Tuple[Optional[str], str], List[Tuple[int, AuditRequest]]] = {}
+    for i, request in chunk:
+        key = (request.dataset_id, json.dumps(_filters(request), sort_keys=True))
+        groups.setdefault(key, []).append((i, request))
+    return groups
+
+
+async def call_rag_engine_batch(items: List[Any]) -> List[dict]:
+    """
+    Audit a list of raw AuditRequest payloads. Items are validated one by one
+    and grouped by dataset; each group is split into BATCH_CHUNK-sized
+    vectorized searches that run concurrently in the executor. A bad item or
+    a failing dataset only marks its own entries as errors.
+    """
+    out: List[Optional[dict]] = [None] * len(items)
+    valid = []
+    for i, raw in enumerate(items):
+        request, error = _validate(i, raw)
+        if error:
+            out[i] = error
+        else:
+            valid.append((i, request))
+
+    parts = await asyncio.gather(*(
+        _audit_chunk(dataset_id, group[start:start + BATCH_CHUNK])
+        for (dataset_id, _), group in _by_dataset(valid).items()
+        for start in range(0, len(group), BATCH_CHUNK)
+    ))
+    for part in parts:
+        for item in part:
+            out[item["index"]] = item
+    return out
+
+
+async def stream_audits(items: AsyncIterator[Any]) -> AsyncIterator[dict]:
+    """
+    Streaming audit: pull raw requests from `items`, audit them in
+    STREAM_CHUNK-sized vectorized chunks with at most STREAM_WINDOW chunks in
+    flight, and yield batch items as soon as their chunk finishes (completion
+    order; use "index" to reassemble).
+
+    Nothing new is read from `items` or scheduled while the consumer isn't
+    pulling, so a slow client throttles the work instead of buffering results.
+    """
+    in_flight = set()
+    pending: List[Tuple[int, AuditRequest]] = []
+
+    def schedule(chunk):
+        for (dataset_id, _), group in _by_dataset(chunk).items():
+            in_flight.add(asyncio.ensure_future(_audit_chunk(dataset_id, group)))
+
+    async def drain(return_when):
+        done, _ = await asyncio.wait(in_flight, return_when=return_when)
+        in_flight.difference_update(done)
+        return [item for task in done for item in task.result()]
+
+    try:
+        i = 0
+        async for raw in items:
+            request, error = _validate(i, raw)
+            i += 1
+            if error:
+                yield error
+                continue
+
+            pending.append((i - 1, request))
+            if len(pending) < STREAM_CHUNK:
+                continue
+            schedule(pending)
+            pending = []
+
+            while len(in_flight) >= STREAM_WINDOW:
+                for item in await drain(asyncio.FIRST_COMPLETED):
+                    yield item
+
+        if pending:
+            schedule(pending)
+        while in_flight:
+            for item in await drain(asyncio.FIRST_COMPLETED):
+                yield item
+    finally:
+        # client went away: don't leave orphaned work in the executor queue
+        for task in in_flight:
+            task.cancel()
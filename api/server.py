@@ -1,17 +1,35 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Body, Request
+from starlette.requests import ClientDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import uvicorn
 import time
-from .models import AuditRequest, AuditResponse
-from .rag_proxy import call_rag_engine
+from typing import Any, AsyncIterator, List
+from .models import AuditRequest, AuditResponse, BatchAuditResponse
+from .rag_proxy import call_rag_engine, call_rag_engine_batch, stream_audits, offload, shutdown_executor, warm_up
+from rag_engine.registry import DatasetNotFound, InvalidDatasetId, get_registry
+from rag_engine.cache import get_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # warm the default dataset where audits run (a worker, with the process
+    # executor); warm_up returns nothing, so no engine crosses a process boundary
+    await offload(warm_up)
+    yield
+    shutdown_executor()
+
 
 app = FastAPI(
     title="🕵️ GhostTrace AI API",
     description="RAG-powered Contract Risk Auditor",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS for Streamlit localhost:8501
@@ -29,9 +47,143 @@ async def audit_contract(request: AuditRequest):
     try:
         result = await call_rag_engine(request)
         return AuditResponse(**result)
+    except DatasetNotFound:
+        raise HTTPException(status_code=404, detail=f"Dataset '{request.dataset_id}' is not ingested")
+    except InvalidDatasetId as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        # missing files of an ingested dataset and stale / mismatched artifacts
+        # (ValueError too) are server faults, not bad requests
         raise HTTPException(status_code=500, detail=f"RAG Error: {str(e)}")
 
+MAX_BATCH = 10_000
+
+
+@app.post("/audit/batch", response_model=BatchAuditResponse)
+async def audit_batch(items: List[Any] = Body(..., max_length=MAX_BATCH)):
+    """📦 Audit many queries in one call; per-item errors don't fail the batch.
+
+    Body: a JSON list of AuditRequest objects.
+    """
+    results = await call_rag_engine_batch(items)
+    return BatchAuditResponse(
+        count=len(results),
+        errors=sum(1 for r in results if not r["ok"]),
+        items=results,
+    )
+
+NDJSON_READ_AHEAD = 256  # parsed request lines buffered ahead of the audits
+_END = object()
+
+
+async def _ndjson_items(request: Request, body_read: asyncio.Event) -> AsyncIterator[Any]:
+    """
+    Parse NDJSON request lines as they arrive. A reader task stays up to
+    NDJSON_READ_AHEAD items ahead of the audits, so the client can keep
+    sending while results stream back and memory doesn't grow with the batch.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=NDJSON_READ_AHEAD)
+
+    async def read():
+        end: Any = _END
+        try:
+            buffer = b""
+            async for piece in request.stream():
+                buffer += piece
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        await queue.put(_parse_line(line))
+            if buffer.strip():
+                await queue.put(_parse_line(buffer))
+        except ClientDisconnect:
+            pass  # client went away mid-body: the disconnect listener ends the response
+        except Exception as e:
+            end = e
+        finally:
+            body_read.set()
+        await queue.put(end)
+
+    reader = asyncio.ensure_future(read())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        reader.cancel()
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None  # reported as an invalid item, doesn't abort the stream
+
+
+async def _iter_items(items: List[Any]):
+    for item in items:
+        yield item
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse sent while the request body is still being read.
+
+    Until the body is read, receive() belongs to the body reader: listening
+    for a disconnect there would swallow body chunks.
+    """
+
+    def __init__(self, content, body_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
+
+
+@app.post("/audit/stream")
+async def audit_stream(request: Request, format: str = "ndjson"):
+    """🌊 Streaming batch audit: one result line per query as soon as it's scored.
+
+    Body: a JSON list of AuditRequest objects, or NDJSON (Content-Type:
+    application/x-ndjson, one request per line).
+    Response: NDJSON, or Server-Sent Events with ?format=sse /
+    Accept: text/event-stream. Lines arrive in completion order; use "index".
+    """
+    # NDJSON bodies are audited as they arrive, so peak memory stays flat in
+    # the batch size. Over HTTP/1.1, a client that only reads the response
+    # after sending everything stalls once the read-ahead and socket buffers
+    # fill: send large NDJSON batches from a client that reads concurrently.
+    body_read = asyncio.Event()
+    if "ndjson" in request.headers.get("content-type", ""):
+        items = _ndjson_items(request, body_read)
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON list or NDJSON")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON list of audit requests")
+        items = _iter_items(body)
+        body_read.set()
+
+    sse = format == "sse" or "text/event-stream" in request.headers.get("accept", "")
+
+    async def lines():
+        async for item in stream_audits(items):
+            payload = json.dumps(item)
+            yield f"data: {payload}\n\n" if sse else f"{payload}\n"
+
+    return _DuplexStreamingResponse(
+        lines(),
+        body_read,
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+    )
+
 @app.get("/health")
 async def health_check():
     """✅ Health check for production"""
@@ -41,6 +193,16 @@ async def health_check():
         "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ")
     }
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """📊 Query cache hit/miss/eviction counters for this worker"""
+    return get_cache().stats()
+
+@app.get("/datasets/stats")
+async def dataset_stats():
+    """🗂️ Datasets loaded in this worker (LRU first) vs. the memory budget"""
+    return get_registry().stats()
+
 @app.get("/")
 async def root():
     return {"message": "🚀 GhostTrace AI - POST /audit to start auditing"}
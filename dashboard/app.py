@@ -2,6 +2,8 @@ import streamlit as st
 import math
 import random
 
+from rag_engine.rag_pipeline import analyze_query
+
 # ─────────────────────────────────────────────────────
 # PAGE CONFIG
 # ─────────────────────────────────────────────────────
@@ -80,45 +82,30 @@ def risk_ring(score, color):
     """
 
 # ─────────────────────────────────────────────────────
-# DYNAMIC AUDIT ENGINE (TEMP LOGIC)
+# AUDIT ENGINE (same rule set as /audit and the CLI)
 # ─────────────────────────────────────────────────────
-def run_audit(query, files):
-
-    # Query complexity score
-    query_score = min(40, len(query.split()) * 3)
-
-    # File count score
-    file_score = min(40, len(files) * 10)
-
-    # Base score
-    score = query_score + file_score
+LEVEL_STYLE = {
+    "HIGH": ("HIGH RISK", "#ef4444"),
+    "MEDIUM": ("MEDIUM RISK", "#eab308"),
+    "LOW": ("LOW RISK", "#22c55e"),
+}
 
-    # Clamp score
-    score = max(10, min(95, score))
 
-    if score >= 70:
-        label, color = "HIGH RISK", "#ef4444"
-    elif score >= 40:
-        label, color = "MEDIUM RISK", "#eab308"
-    else:
-        label, color = "LOW RISK", "#22c55e"
+def run_audit(query, files):
+    # uploaded files are listed only; the audit runs on the ingested dataset
+    result = analyze_query(query)
+    risk = result["risk_assessment"]["risk"]
+    label, color = LEVEL_STYLE[risk["level"]]
 
     return {
-        "score": score,
+        "score": risk["score"],
         "label": label,
         "color": color,
-        "explanation": """
-        Risk score calculated using query complexity and number of documentation sources.
-        Higher number of sources or complex migration queries increase hallucination risk.
-        """,
-        "actions": [
-            "Verify version compatibility",
-            "Review deprecated endpoints",
-            "Cross-check documentation sources"
-        ]
+        "explanation": result["risk_assessment"]["explanation"],
+        "reasons": risk["reasons"],
+        "actions": risk["recommendations"] or ["Continue monitoring documentation updates"],
     }
 
-
 # ─────────────────────────────────────────────────────
 # PAGE 1 — HOME
 # ─────────────────────────────────────────────────────
@@ -184,7 +171,10 @@ elif st.session_state.page == "Audit Result":
     query = st.text_input("Ask a question", placeholder="How do I migrate from v1 to v3?")
 
     if st.button("Run Audit", type="primary") and query:
-        st.session_state.audit_data = run_audit(query, st.session_state.files)
+        try:
+            st.session_state.audit_data = run_audit(query, st.session_state.files)
+        except FileNotFoundError as e:
+            st.error(f"{e}")
 
     if st.session_state.audit_data:
         d = st.session_state.audit_data
@@ -198,6 +188,9 @@ elif st.session_state.page == "Audit Result":
             </div>
             """, unsafe_allow_html=True)
 
+            for r in d["reasons"]:
+                st.markdown(f"- {r}")
+
             st.markdown("""
             <div class="gt-card">
                 <h3>Recommended Actions</h3>
@@ -0,0 +1,128 @@
+import re
+
+# "Endpoint:", "Authentication:", "Request JSON:", "Base URL:" ...
+SECTION_HEADER = re.compile(r"^[ \t]*([A-Z][A-Za-z0-9 /()\-]{0,40}):[ \t]*$", re.MULTILINE)
+TOKEN = re.compile(r"\S+")
+
+STRATEGIES = ("sections", "tokens", "none")
+
+
+class Chunker:
+    """
+    Splits a document into chunk records linked to the parent doc metadata.
+
+    strategies:
+        sections – split on header lines ("Endpoint:", "Authentication:" ...),
+                   merge tiny sections, window-split oversized ones
+        tokens   – fixed token window with overlap
+        none     – one chunk per document (old behaviour)
+    """
+
+    def __init__(self, strategy="sections", window=120, overlap=30,
+                 min_tokens=12, include_title=True):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown chunking strategy '{strategy}' (expected one of {STRATEGIES})")
+        if overlap >= window:
+            raise ValueError("overlap must be smaller than window")
+
+        self.strategy = strategy
+        self.window = window
+        self.overlap = overlap
+        self.min_tokens = min_tokens
+        self.include_title = include_title
+
+    # ---------------- PUBLIC ----------------
+    def chunk(self, text, meta):
+        """Return [{"text": ..., "meta": {...parent meta, chunk fields}}]."""
+        title = self._title(text)
+
+        if self.strategy == "none":
+            spans = [(0, len(text), None)]
+        elif self.strategy == "tokens":
+            spans = [(s, e, None) for s, e in self._windows(text, 0, len(text))]
+        else:
+            spans = self._sections(text)
+
+        chunks = []
+        for start, end, section in spans:
+            body = text[start:end].strip()
+            if not body:
+                continue
+
+            chunk_text = body
+            if self.include_title and title and self.strategy != "none" and not body.startswith(title):
+                chunk_text = f"{title}\n{body}"
+
+            chunks.append({
+                "text": chunk_text,
+                "meta": dict(
+                    meta,
+                    section=section,
+                    char_start=start,
+                    char_end=end,
+                ),
+            })
+
+        for i, chunk in enumerate(chunks):
+            chunk["meta"].update(
+                chunk_id=f"{meta['file']}#{i}",
+                chunk_index=i,
+                n_chunks=len(chunks),
+            )
+
+        return chunks
+
+    # ---------------- STRATEGIES ----------------
+    def _windows(self, text, start, end):
+        tokens = [m.span() for m in TOKEN.finditer(text, start, end)]
+        if not tokens:
+            return []
+
+        step = self.window - self.overlap
+        spans = []
+        for i in range(0, len(tokens), step):
+            window = tokens[i:i + self.window]
+            spans.append((window[0][0], window[-1][1]))
+            if i + self.window >= len(tokens):
+                break
+        return spans
+
+    def _sections(self, text):
+        headers = list(SECTION_HEADER.finditer(text))
+        bounds = [0] + [h.start() for h in headers] + [len(text)]
+        names = [None] + [h.group(1).strip() for h in headers]
+
+        sections = [
+            [bounds[i], bounds[i + 1], names[i]]
+            for i in range(len(names))
+            if text[bounds[i]:bounds[i + 1]].strip()
+        ]
+
+        # merge tiny sections ("Base URL:\nhttps://...") into the next one
+        merged = []
+        for section in sections:
+            if merged and self._n_tokens(text, *merged[-1][:2]) < self.min_tokens:
+                merged[-1][1] = section[1]
+                merged[-1][2] = merged[-1][2] or section[2]
+            else:
+                merged.append(section)
+
+        spans = []
+        for start, end, name in merged:
+            if self._n_tokens(text, start, end) > self.window:
+                spans.extend((s, e, name) for s, e in self._windows(text, start, end))
+            else:
+                spans.append((start, end, name))
+        return spans
+
+    # ---------------- HELPERS ----------------
+    @staticmethod
+    def _n_tokens(text, start, end):
+        return sum(1 for _ in TOKEN.finditer(text, start, end))
+
+    @staticmethod
+    def _title(text):
+        for line in text.splitlines():
+            if line.strip():
+                return line.strip()
+        return ""
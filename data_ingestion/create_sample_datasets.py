@@ -1,7 +1,6 @@
 import os
 
-def create_sample_datasets():
-    base = "data_ingestion/sample_datasets"
+def create_sample_datasets(base="data_ingestion/sample_datasets"):
     os.makedirs(base, exist_ok=True)
 
     samples = {
@@ -249,9 +248,21 @@ developer-support@product.com
 """
     }
 
+    written = 0
     for name, content in samples.items():
-        with open(os.path.join(base, name), "w", encoding="utf-8") as f:
+        path = os.path.join(base, name)
+        # identical files are left alone: a rewrite bumps the mtime, and
+        # incremental ingestion would re-hash every sample on the next run
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                if f.read() == content:
+                    continue
+        with open(path, "w", encoding="utf-8") as f:
             f.write(content)
+        written += 1
 
-    print("✅ API documentation datasets (multi-version) created successfully.")
+    if written:
+        print(f"✅ API documentation datasets (multi-version) created successfully ({written} written).")
+    else:
+        print("✅ API documentation datasets (multi-version) up to date.")
 
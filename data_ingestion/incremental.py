@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+STATE_VERSION = 1
+
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class IngestState:
+    """
+    Per-file ingestion record: content hash, stat signature and the vector ids
+    the file produced. Deleted files are kept as tombstones.
+
+    {"files": {"payment_api_v1.0_2021.txt": {"sha256": ..., "size": ...,
+               "mtime": ..., "ids": [...], "ingested_at": ..., "deleted": false}}}
+    """
+
+    def __init__(self, path="data_ingestion/ingest_state.json"):
+        self.path = path
+        self.files = {}
+        self.changed = False  # anything to save since load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        if state.get("format_version") == STATE_VERSION:
+            self.files = state["files"]
+        self.changed = False
+        return self
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format_version": STATE_VERSION, "files": self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+    def live_files(self):
+        return {name for name, rec in self.files.items() if not rec.get("deleted")}
+
+    # ---------------- DIFF ----------------
+    def plan(self, paths):
+        """
+        Compare files on disk against the recorded state.
+
+        Returns {"new": [...], "changed": [...], "unchanged": [...], "deleted": [...]}
+        where new/changed hold (path, sha256) and the others hold file names.
+        Files whose size + mtime are unchanged are not re-hashed.
+        """
+        plan = {"new": [], "changed": [], "unchanged": [], "deleted": []}
+        seen = set()
+
+        for path in paths:
+            name = os.path.basename(path)
+            seen.add(name)
+            rec = self.files.get(name)
+            st = os.stat(path)
+
+            if rec and not rec.get("deleted") and rec["size"] == st.st_size and rec["mtime"] == st.st_mtime:
+                plan["unchanged"].append(name)
+                continue
+
+            digest = file_sha256(path)
+            if rec is None or rec.get("deleted"):
+                plan["new"].append((path, digest))
+            elif rec["sha256"] != digest:
+                plan["changed"].append((path, digest))
+            else:
+                # touched but identical content: refresh the stat signature only
+                rec["size"], rec["mtime"] = st.st_size, st.st_mtime
+                self.changed = True
+                plan["unchanged"].append(name)
+
+        plan["deleted"] = sorted(self.live_files() - seen)
+        return plan
+
+    # ---------------- RECORD ----------------
+    def record(self, path, digest, ids, ingested_at=None):
+        st = os.stat(path)
+        self.files[os.path.basename(path)] = {
+            "path": path,
+            "sha256": digest,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "ids": list(ids),
+            "ingested_at": ingested_at or datetime.utcnow().isoformat(),
+            "deleted": False,
+        }
+        self.changed = True
+
+    def tombstone(self, name):
+        rec = self.files[name]
+        rec.update(deleted=True, deleted_at=datetime.utcnow().isoformat(), ids=[])
+        self.changed = True
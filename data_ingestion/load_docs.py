@@ -1,15 +1,15 @@
 from pathlib import Path
-import json
 from typing import List, Dict
 
+from vector_store.doc_store import DocStore
+
 
 def find_metadata_store():
-    """Find metadata_store.json in current or parent dirs."""
+    """Find documents.db in current or parent dirs."""
     possible_paths = [
-        Path("metadata_store.json"),
-        Path("data_ingestion/metadata_store.json"),
-        Path("data_ingestion/sample_datasets/metadata_store.json"),
-        Path("./metadata_store.json")
+        Path("documents.db"),
+        Path("data_ingestion/documents.db"),
+        Path("../data_ingestion/documents.db"),
     ]
 
     for p in possible_paths:
@@ -17,24 +17,23 @@ def find_metadata_store():
             print(f"✅ Found metadata at: {p.absolute()}")
             return p
 
-    print("❌ metadata_store.json not found. Available JSON files:")
-    for p in Path(".").rglob("*.json"):
+    print("❌ documents.db not found. Available databases:")
+    for p in Path(".").rglob("*.db"):
         print(f"  {p}")
     return None
 
 
 def load_documents() -> List[Dict]:
-    """Load documents from metadata_store.json."""
+    """Load documents from the documents table of documents.db."""
 
     # Find metadata file
     meta_path = find_metadata_store()
     if not meta_path:
-        print("ERROR: No metadata_store.json found!")
+        print("ERROR: No documents.db found!")
         return []
 
     # Load metadata
-    with open(meta_path, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
+    metadata = DocStore(meta_path).documents()
 
     print(f"✅ Loaded {len(metadata)} metadata entries")
 
@@ -1,57 +1,72 @@
 import os
 import re
-import json
 from data_ingestion.create_sample_datasets import create_sample_datasets
 from datetime import datetime
+from vector_store.doc_store import DocStore
+
+
+def metadata_from_text(filepath, text):
+    """Version / deprecation / domain detection over an already-read document."""
+    filename = os.path.basename(filepath)
+    lowered = text.lower()
+
+    # version detection
+    version_match = re.search(r"VERSION\s+(\d+\.\d+)", text)
+    version = version_match.group(1) if version_match else "unknown"
+
+    # deprecated detection
+    deprecated = "deprecated" in lowered or "deprecation" in lowered
+
+    # domain type
+    if "payment" in lowered:
+        doc_type = "payment_api"
+    elif "auth" in lowered:
+        doc_type = "auth_api"
+    elif "sdk" in lowered:
+        doc_type = "sdk"
+    elif "webhook" in lowered:
+        doc_type = "webhook"
+    elif "migration" in lowered:
+        doc_type = "migration"
+    else:
+        doc_type = "config"
+
+    return {
+        "file": filename,
+        "path": filepath,
+        "version": version,
+        "deprecated": deprecated,
+        "doc_type": doc_type,
+        "ingested_at": datetime.utcnow().isoformat()
+    }
+
 
 class MetadataManager:
 
-    def __init__(self, store_path="data_ingestion/metadata_store.json"):
+    def __init__(self, store_path="data_ingestion/documents.db"):
         self.store_path = store_path
         self.metadata = []
 
-    def extract_metadata(self, filepath):
-        filename = os.path.basename(filepath)
-
-        with open(filepath, "r", encoding="utf-8") as f:
-            text = f.read()
-
-        # version detection
-        version_match = re.search(r"VERSION\s+(\d+\.\d+)", text)
-        version = version_match.group(1) if version_match else "unknown"
-
-        # deprecated detection
-        deprecated = "deprecated" in text.lower() or "deprecation" in text.lower()
-
-        # domain type
-        if "payment" in text.lower():
-            doc_type = "payment_api"
-        elif "auth" in text.lower():
-            doc_type = "auth_api"
-        elif "sdk" in text.lower():
-            doc_type = "sdk"
-        elif "webhook" in text.lower():
-            doc_type = "webhook"
-        elif "migration" in text.lower():
-            doc_type = "migration"
-        else:
-            doc_type = "config"
-
-        meta = {
-            "file": filename,
-            "path": filepath,
-            "version": version,
-            "deprecated": deprecated,
-            "doc_type": doc_type,
-            "ingested_at": datetime.utcnow().isoformat()
-        }
+    def extract_metadata(self, filepath, text=None):
+        """Extract + record metadata of one file; pass `text` if already read."""
+        if text is None:
+            with open(filepath, "r", encoding="utf-8") as f:
+                text = f.read()
 
+        meta = metadata_from_text(filepath, text)
         self.metadata.append(meta)
         return meta
 
+    def load(self):
+        if os.path.exists(self.store_path):
+            self.metadata = DocStore(self.store_path).documents()
+        return self
+
+    def remove(self, filename):
+        self.metadata = [m for m in self.metadata if m["file"] != filename]
+
     def save(self):
-        with open(self.store_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
+        DocStore(self.store_path, create=True).replace_documents(self.metadata)
 
         print(f"✅ Metadata saved to {self.store_path}")
 
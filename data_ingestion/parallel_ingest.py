@@ -0,0 +1,72 @@
+"""
+Parallel file loading for run_metadata.
+
+Worker processes read each file once and return everything ingestion needs
+from it: content hash, metadata and chunks. The main process stays the single
+writer (vector store, metadata, ingest state) and consumes results in input
+order, a bounded batch at a time, so memory doesn't grow with the corpus.
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from data_ingestion.metadata_manager import metadata_from_text
+
+
+def load_file(path, chunker):
+    """Read + hash + extract metadata + chunk one file (runs in a worker)."""
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    text = raw.decode("utf-8")
+    meta = metadata_from_text(path, text)
+    return {
+        "path": path,
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "bytes": len(raw),
+        "meta": meta,
+        "chunks": chunker.chunk(text, meta),
+    }
+
+
+def load_files(paths, chunker, workers=None, batch_size=None):
+    """Yield load_file() results in input order; workers <= 1 runs inline."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < 2:
+        for path in paths:
+            yield load_file(path, chunker)
+        return
+
+    batch_size = batch_size or workers * 32
+    chunksize = max(1, batch_size // (workers * 4))
+    load = partial(load_file, chunker=chunker)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(paths), batch_size):
+            yield from pool.map(load, paths[start:start + batch_size], chunksize=chunksize)
+
+
+class Throughput:
+    """files/s and MB/s of an ingestion run."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def add(self, n_bytes):
+        self.files += 1
+        self.bytes += n_bytes
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        mb = self.bytes / 2**20
+        return (
+            f"⚡ {self.files} files, {mb:.2f} MB in {elapsed:.2f}s → "
+            f"{self.files / elapsed:.1f} files/s, {mb / elapsed:.2f} MB/s"
+        )
@@ -1,35 +1,281 @@
-import os
-from data_ingestion.metadata_manager import MetadataManager
-from data_ingestion.create_sample_datasets import create_sample_datasets
-import vector_store.vector_store
-
-
-sample_dir = "data_ingestion/sample_datasets"
-
-# Step 1: create datasets
-create_sample_datasets()
-
-# Step 2: metadata + vectors
-mm = MetadataManager()
-vs = vector_store.vector_store.VectorStore()
-
-print("\n🚀 GhostTrace API Docs Ingestion Started\n")
-
-for file in os.listdir(sample_dir):
-    if not file.endswith(".txt"):
-        continue
-
-    path = os.path.join(sample_dir, file)
-
-    meta = mm.extract_metadata(path)
-
-    with open(path, "r", encoding="utf-8") as f:
-        text = f.read()
-
-    vs.add_document(text, meta)
-
-mm.save()
-vs.build()
-vs.save()
-
-print("\n✅ Ingestion Completed Successfully")
+import os
+import uuid
+import argparse
+from data_ingestion.metadata_manager import MetadataManager
+from data_ingestion.create_sample_datasets import create_sample_datasets
+from data_ingestion.chunker import Chunker, STRATEGIES
+from data_ingestion.incremental import IngestState
+from data_ingestion.parallel_ingest import Throughput, load_files
+from drift_analysis.attribution import ShingleIndex
+from drift_analysis.ghost_identifiers import IdentifierIndex
+from drift_analysis.risk_facts import RiskFacts
+import vector_store.vector_store
+from vector_store.manifest import ARTIFACTS, artifact_name, artifact_path, prune_artifacts, read_manifest
+from vector_store.backends import BACKENDS, INDEX_TYPES, STORAGE, configure_index, shard_paths, supports_remove
+from vector_store.embedders import EMBEDDERS
+from rag_engine.registry import EngineRegistry
+
+SAMPLE_DIR = "data_ingestion/sample_datasets"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GhostTrace ingestion")
+    parser.add_argument("--dataset",
+                        help="ingest into data_ingestion/datasets/<id>/ (served as AuditRequest.dataset_id) "
+                             "instead of the default dataset")
+    parser.add_argument("--source", default=SAMPLE_DIR,
+                        help="directory of .txt docs to ingest (default: the generated samples)")
+    parser.add_argument("--backend", choices=BACKENDS,
+                        help="retrieval backend: dense FAISS or sparse inverted index "
+                             "(default: keep the existing one, else faiss)")
+    parser.add_argument("--index-type", choices=INDEX_TYPES,
+                        help="faiss index: exact flat, ivf, hnsw, ivfpq or pq "
+                             "(default: keep the existing one, else flat)")
+    parser.add_argument("--embedder", choices=EMBEDDERS,
+                        help="tfidf (fitted on the corpus) or a local sentence-transformers model "
+                             "(default: keep the existing one, else tfidf)")
+    parser.add_argument("--model", help="--embedder sentence: model name or path "
+                                        "(default: keep the existing one, else GHOSTTRACE_EMBED_MODEL)")
+    parser.add_argument("--storage", choices=tuple(STORAGE),
+                        help="flat/ivf/hnsw: keep vectors as float32, or float16 / int8 codes "
+                             "(1/2 or 1/4 the index size)")
+    parser.add_argument("--shards", type=int,
+                        help="split the index into N shards searched in parallel "
+                             "(default: keep the existing count, else 1)")
+    parser.add_argument("--nlist", type=int, help="ivf/ivfpq: number of inverted lists (default ~4*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, help="ivf/ivfpq: lists visited per query")
+    parser.add_argument("--hnsw-m", type=int, help="hnsw: graph degree")
+    parser.add_argument("--ef-search", type=int, help="hnsw: candidate list size per query")
+    parser.add_argument("--pq-m", type=int, help="ivfpq/pq: sub-quantizers (bytes) per vector")
+    parser.add_argument("--refine", type=int,
+                        help="pq/ivfpq/int8/float16: re-rank refine x top_k candidates exactly "
+                             "(default 4; 0 = off)")
+    parser.add_argument("--chunking", choices=STRATEGIES, default="sections",
+                        help="split docs by section headers, token windows, or not at all")
+    parser.add_argument("--window", type=int, default=120, help="max tokens per chunk")
+    parser.add_argument("--overlap", type=int, default=30, help="token overlap between windows")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes reading/parsing/chunking files (1 = no pool)")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild every artifact instead of ingesting only changed files")
+    parser.add_argument("--stream", action="store_true",
+                        help="full build that spills texts/metadata to disk and vectorizes in "
+                             "batches instead of holding the corpus in memory")
+    parser.add_argument("--batch-size", type=int, default=1024, help="--stream: vectors added per batch")
+    parser.add_argument("--max-features", type=int,
+                        help="--stream: keep only the most frequent terms (bounds the vector dim)")
+    parser.add_argument("--refit-ratio", type=float, default=0.2,
+                        help="fall back to a full rebuild (fresh vocab/IDF) when more than "
+                             "this fraction of files changed")
+    args = parser.parse_args()
+
+    # structural knobs need a rebuild; search knobs are applied to the loaded index
+    build_params = {"nlist": args.nlist, "m": args.hnsw_m, "pq_m": args.pq_m, "storage": args.storage}
+    search_params = {"nprobe": args.nprobe, "ef_search": args.ef_search, "refine": args.refine}
+    cli_params = {k: v for k, v in {**build_params, **search_params}.items() if v is not None}
+
+    # every dataset keeps its own index, vectorizer and metadata in one directory
+    data_dir = EngineRegistry().dataset_dir(args.dataset)
+    os.makedirs(data_dir, exist_ok=True)
+    manifest_path = os.path.join(data_dir, "index_manifest.json")
+    try:
+        previous = read_manifest(manifest_path)
+    except (FileNotFoundError, ValueError):
+        previous = None
+
+    def new_store(**kwargs):
+        return vector_store.vector_store.VectorStore(
+            index_path=os.path.join(data_dir, "faiss.index"),
+            docs_path=os.path.join(data_dir, "documents.db"),
+            text_path=os.path.join(data_dir, "vector_texts.bin"),
+            vectorizer_path=os.path.join(data_dir, "tfidf_vectorizer.bin"),
+            manifest_path=manifest_path,
+            sparse_index_path=os.path.join(data_dir, "sparse_index.npz"),
+            bm25_path=os.path.join(data_dir, "bm25_index.npz"),
+            embedder_path=os.path.join(data_dir, "embedder.json"),
+            embedding_cache_path=os.path.join(data_dir, "embedding_cache.db"),
+            **kwargs,
+        )
+
+    # Step 1: create datasets
+    if args.source == SAMPLE_DIR:
+        create_sample_datasets()
+
+    paths = sorted(
+        os.path.join(args.source, file)
+        for file in os.listdir(args.source)
+        if file.endswith(".txt")
+    )
+
+    # Step 2: metadata + vectors
+    mm = MetadataManager(os.path.join(data_dir, "documents.db"))
+    vs = new_store(
+        backend=args.backend or "faiss", index_type=args.index_type or "flat",
+        index_params=cli_params, shards=args.shards or 1,
+        embedder=args.embedder or "tfidf", embedding_model=args.model,
+    )
+    state = IngestState(os.path.join(data_dir, "ingest_state.json"))
+    chunker = Chunker(args.chunking, window=args.window, overlap=args.overlap)
+    throughput = Throughput()
+
+    def ingest(files):
+        # workers read + parse + chunk; this process is the only writer
+        throughput.start()
+        for loaded in load_files(files, chunker, workers=args.workers):
+            meta = loaded["meta"]
+            mm.metadata.append(meta)
+
+            # index is built over chunks; each chunk keeps its parent doc metadata
+            ids = [
+                vs.add_document(chunk["text"], chunk["meta"])
+                for chunk in loaded["chunks"]
+            ]
+            state.record(loaded["path"], loaded["sha256"], ids, meta["ingested_at"])
+            throughput.add(loaded["bytes"])
+
+    def stream(files):
+        # same as ingest(), but chunks flow straight into build_streaming()
+        throughput.start()
+        for loaded in load_files(files, chunker, workers=args.workers):
+            meta = loaded["meta"]
+            mm.metadata.append(meta)
+            for chunk in loaded["chunks"]:
+                yield chunk["text"], chunk["meta"]  # build_streaming() sets meta["id"]
+
+            ids = [chunk["meta"]["id"] for chunk in loaded["chunks"]]
+            state.record(loaded["path"], loaded["sha256"], ids, meta["ingested_at"])
+            throughput.add(loaded["bytes"])
+
+    plan = None
+    if not (args.full or args.stream):
+        try:
+            vs.load()
+            mm.load()
+            state.load()
+            same_index = (
+                args.backend in (None, vs.backend)
+                and args.index_type in (None, vs.index_type)
+                and args.shards in (None, vs.shards)
+                and args.embedder in (None, vs.embedder)
+                and args.model in (None, vs.embedding_model)
+                and not any(v is not None for v in build_params.values())
+            )
+            if state.files and same_index:
+                plan = state.plan(paths)
+        except (FileNotFoundError, ValueError, KeyError) as e:
+            print(f"ℹ️ No reusable index ({e}), doing a full build")
+
+    if plan is not None:
+        n_dirty = len(plan["new"]) + len(plan["changed"]) + len(plan["deleted"])
+        if n_dirty > args.refit_ratio * max(len(state.live_files()), 1):
+            print(f"ℹ️ {n_dirty} files changed, refitting vocabulary with a full build")
+            plan = None
+        elif (plan["changed"] or plan["deleted"]) and not supports_remove(vs.backend, vs.index_type):
+            print(f"ℹ️ {vs.index_type} index can't drop vectors, doing a full build")
+            plan = None
+
+    if plan is None:
+        print("\n🚀 GhostTrace API Docs Ingestion Started (full)\n")
+
+        # keep tuned search knobs and the vector storage across rebuilds of the same index type
+        kept = {}
+        if args.index_type in (None, vs.index_type):
+            kept = {k: v for k, v in vs.index_params.items() if k in search_params or k == "storage"}
+
+        # ids keep counting across rebuilds: a server still on the previous
+        # generation must never read another chunk's row under a reused id
+        next_id = vs.next_id
+        if not next_id and previous is not None:
+            next_id = previous.get("next_id", 0)
+
+        mm = MetadataManager(os.path.join(data_dir, "documents.db"))
+        vs = new_store(
+            backend=args.backend or vs.backend,
+            index_type=args.index_type or vs.index_type,
+            index_params={**kept, **cli_params},
+            shards=args.shards or vs.shards,
+            embedder=args.embedder or vs.embedder,
+            embedding_model=args.model or vs.embedding_model,
+        )
+        vs.next_id = next_id
+        state = IngestState(os.path.join(data_dir, "ingest_state.json"))
+
+        if args.stream:
+            vs.build_streaming(stream(paths), batch_size=args.batch_size, max_features=args.max_features)
+            print(f"📄 {len(mm.metadata)} docs → {len(vs.texts)} chunks ({args.chunking}, streamed)")
+        else:
+            ingest(paths)
+
+            print(f"📄 {len(mm.metadata)} docs → {len(vs.texts)} chunks ({args.chunking})")
+            vs.build()
+    else:
+        print("\n🚀 GhostTrace API Docs Ingestion Started (incremental)\n")
+
+        for name in plan["deleted"]:
+            vs.remove_ids(state.files[name]["ids"])
+            mm.remove(name)
+            state.tombstone(name)
+
+        for path, _ in plan["changed"]:
+            name = os.path.basename(path)
+            vs.remove_ids(state.files[name]["ids"])
+            mm.remove(name)
+
+        ingest([path for path, _ in plan["changed"] + plan["new"]])
+
+        print(
+            f"📄 new {len(plan['new'])} | changed {len(plan['changed'])} | "
+            f"deleted {len(plan['deleted'])} | unchanged {len(plan['unchanged'])}"
+        )
+        vs.update()
+
+        if any(v is not None for v in search_params.values()):
+            vs.index_params.update(cli_params)
+            configure_index(vs.index, vs.index_type, vs.index_params)
+
+    dirty = plan is None or plan["new"] or plan["changed"] or plan["deleted"] or cli_params
+    if dirty:
+        # derived artifacts of a new generation, written before the manifest publishes it
+        generation = uuid.uuid4().hex
+        paths = {kind: os.path.join(data_dir, artifact_name(kind, generation)) for kind in ARTIFACTS}
+    else:
+        # unchanged index: only rebuild what its manifest lists but is missing
+        paths = {kind: artifact_path(data_dir, previous, kind) for kind in ARTIFACTS}
+    if dirty or not os.path.exists(paths["facts"]):
+        # per-vector risk inputs
+        facts = RiskFacts.build(vs.iter_metadata(), mm.metadata, transform=vs.transform_ids)
+        facts.save(paths["facts"])
+        print(f"🧮 Risk facts saved for {len(facts)} vectors")
+    if dirty or not os.path.exists(paths["shingles"]):
+        # answer attribution: word 3-gram shingles per chunk
+        shingle_index = ShingleIndex.build(vs.iter_texts())
+        shingle_index.save(paths["shingles"])
+        print(f"🧩 Shingle index saved for {len(shingle_index)} chunks")
+    if dirty or not os.path.exists(paths["identifiers"]):
+        # endpoints / headers / fields per version; ghost = only in stale docs
+        identifiers = IdentifierIndex.build(((m, vs.text(m["id"])) for m in vs.iter_metadata()), mm.metadata)
+        identifiers.save(paths["identifiers"])
+        print(f"👻 Identifier index saved: {len(identifiers.ghosts)} ghost of {len(identifiers)} identifiers")
+    if dirty:
+        mm.save()
+        vs.save(generation, {kind: os.path.basename(path) for kind, path in paths.items()})
+        # keep the previous generation's files for readers that just opened its manifest
+        keep = {os.path.basename(path) for path in paths.values()}
+        if previous is not None:
+            keep |= {os.path.basename(artifact_path(data_dir, previous, kind)) for kind in ARTIFACTS}
+        prune_artifacts(data_dir, keep)
+        if vs.backend == "faiss" and vs.index.ntotal:
+            stored = sum(os.path.getsize(p) for p in shard_paths(vs.index_path, vs.shards))
+            dense = vs.index.ntotal * vs.index.d * 4
+            print(f"🗜️ {vs.index_type} index {stored / 2**20:.1f} MB vs {dense / 2**20:.1f} MB "
+                  f"as float32 ({1 - stored / dense:.0%} saved)")
+    if state.changed:
+        state.save()
+
+    if throughput.files:
+        print(throughput.report())
+    print("\n✅ Ingestion Completed Successfully")
+
+
+if __name__ == "__main__":
+    main()
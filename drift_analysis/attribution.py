@@ -0,0 +1,150 @@
+"""
+GhostTrace Answer Attribution – which retrieved chunks did the answer actually use?
+
+The bot's answer is split into sentences and each sentence is matched to
+its closest candidate chunk (the retrieved results + any chunks the bot
+cited) by two signals:
+
+    similarity  cosine of sentence and chunk vectors (same embedder as the
+                index; one matrix product for the whole answer)
+    overlap     share of the sentence's word 3-gram shingles that occur in
+                the chunk, read from the shingle index precomputed at
+                ingestion (shingle_index.<generation>.npz)
+
+score = SIMILARITY_WEIGHT * similarity + (1 - SIMILARITY_WEIGHT) * overlap;
+a sentence is attributed to its best chunk when score >= MIN_SCORE. Risk is
+then scored on attributed chunks only: a deprecated doc that was retrieved
+but not used in the answer is not flagged.
+"""
+
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+SHINGLES_VERSION = 1
+SHINGLE = 3                          # words per shingle
+SIMILARITY_WEIGHT = 0.5
+MIN_SCORE = 0.25
+
+WORD = re.compile(r"\w+")
+SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_PRIME = np.uint64(1_000_003)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Answer text -> sentences (and list items / lines); empty ones dropped."""
+    return [s.strip() for s in SENTENCE.split(text) if WORD.search(s)]
+
+
+def shingles(text: str) -> np.ndarray:
+    """Sorted unique hashes of the text's lowercased word 3-grams (stable across processes)."""
+    words = WORD.findall(text.lower())
+    if len(words) < SHINGLE:
+        return np.zeros(0, dtype=np.uint64)
+    h = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    n = len(words) - SHINGLE + 1
+    out = h[:n].copy()
+    for i in range(1, SHINGLE):
+        out = out * _PRIME + h[i:i + n]  # wraps mod 2**64
+    return np.unique(out)
+
+
+class ShingleIndex:
+    """Per-chunk sorted shingle hashes as CSR rows; `ids` (sorted) maps vector id -> row."""
+
+    def __init__(self, ids: np.ndarray, indptr: np.ndarray, hashes: np.ndarray):
+        self.ids = ids
+        self.indptr = indptr
+        self.hashes = hashes
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.indptr.nbytes + self.hashes.nbytes
+
+    # ---------------- BUILD ----------------
+    @classmethod
+    def build(cls, items: Iterable[Tuple[int, str]]) -> "ShingleIndex":
+        """(vector id, chunk text) pairs, read in a single pass."""
+        ids, rows = [], []
+        for doc_id, text in items:
+            ids.append(doc_id)
+            rows.append(shingles(text))
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        rows = [rows[i] for i in order]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=indptr[1:])
+        hashes = np.concatenate(rows) if rows else np.zeros(0, dtype=np.uint64)
+        return cls(ids[order], indptr, hashes)
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self, path) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                info=np.array(json.dumps({"format_version": SHINGLES_VERSION, "shingle": SHINGLE})),
+                ids=self.ids,
+                indptr=self.indptr,
+                hashes=self.hashes,
+            )
+        Path(tmp_path).replace(path)
+
+    @classmethod
+    def load(cls, path) -> "ShingleIndex":
+        with np.load(path) as z:
+            info = json.loads(str(z["info"]))
+            if info.get("format_version") != SHINGLES_VERSION or info.get("shingle") != SHINGLE:
+                raise ValueError(f"❌ Unsupported shingle index v{info.get('format_version')}. Re-run ingestion.")
+            return cls(z["ids"], z["indptr"], z["hashes"])
+
+    # ---------------- LOOKUP ----------------
+    def overlap(self, sentence_shingles: List[np.ndarray], ids) -> np.ndarray:
+        """(sentences x ids) share of each sentence's shingles found in each chunk; 0 for unknown ids."""
+        out = np.zeros((len(sentence_shingles), len(ids)), dtype=np.float32)
+        sizes = np.array([len(s) for s in sentence_shingles], dtype=np.float32)
+        if not sizes.any() or not len(self.ids):
+            return out
+        flat = np.concatenate(sentence_shingles)
+        owner = np.repeat(np.arange(len(sentence_shingles)), sizes.astype(np.int64))
+
+        ids = np.asarray(ids, dtype=np.int64)
+        at = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        for j, row in enumerate(at):
+            if self.ids[row] != ids[j]:
+                continue
+            chunk = self.hashes[self.indptr[row]:self.indptr[row + 1]]
+            hit = np.isin(flat, chunk, assume_unique=False)
+            out[:, j] = np.bincount(owner[hit], minlength=len(sentence_shingles))
+        return out / np.maximum(sizes, 1)[:, None]
+
+
+def cosine(a, b) -> np.ndarray:
+    """Row-normalized embeddings (sparse TF-IDF or dense) -> (len(a) x len(b)) similarities."""
+    sims = a @ b.T
+    return np.asarray(sims.toarray() if sp.issparse(sims) else sims, dtype=np.float32)
+
+
+def attribute(similarity: np.ndarray, overlap: np.ndarray) -> List[Dict]:
+    """Per sentence: best candidate column (None below MIN_SCORE) + its signals."""
+    if not similarity.shape[1]:
+        return [{"candidate": None, "score": 0.0, "similarity": 0.0, "overlap": 0.0} for _ in similarity]
+    scores = SIMILARITY_WEIGHT * similarity + (1 - SIMILARITY_WEIGHT) * overlap
+    best = scores.argmax(axis=1)
+    out = []
+    for i, j in enumerate(best.tolist()):
+        score = float(scores[i, j])
+        out.append({
+            "candidate": j if score >= MIN_SCORE else None,
+            "score": round(score, 4),
+            "similarity": round(float(similarity[i, j]), 4),
+            "overlap": round(float(overlap[i, j]), 4),
+        })
+    return out
@@ -0,0 +1,93 @@
+"""
+Risk rule evaluation cost vs number of rules.
+
+Builds synthetic risk facts, then scores the same result sets with the
+shipped rule set plus N extra rules (one per doc type / version value) and
+reports the cost per result set, batched (as /audit does) and one at a time.
+
+Run: python -m drift_analysis.benchmark_rules --docs 20000 --sets 2048
+"""
+
+import argparse
+import copy
+import json
+import time
+
+import numpy as np
+
+from drift_analysis.risk_facts import RiskFacts
+from drift_analysis.risk_rules import RULES_PATH, FactsBatch, RuleSet
+
+VERSIONS = ["1.0", "1.5", "2.0", "2.1", "3.0", "unknown"]
+
+
+def synthetic_facts(n_docs, n_types, chunks_per_doc, seed=0):
+    rng = np.random.default_rng(seed)
+    doc_types = ["payment_api", "auth_api", "webhook", "sdk"] + [f"type{i}" for i in range(n_types - 4)]
+    docs, chunks = [], []
+    for i in range(n_docs):
+        doc_type = doc_types[rng.integers(len(doc_types))]
+        version = VERSIONS[rng.integers(len(VERSIONS))]
+        doc = {"file": f"{doc_type}_v{version}_{i}.txt", "doc_type": doc_type, "version": version,
+               "deprecated": bool(version.startswith("1.") and rng.random() < 0.5)}
+        docs.append(doc)
+        chunks += [dict(doc, id=len(chunks) + j) for j in range(chunks_per_doc)]
+    docs.append({"file": "deprecation_notice.txt", "doc_type": "notice", "version": "unknown"})
+    return RiskFacts.build(chunks, docs), doc_types
+
+
+def with_extra_rules(spec, n_extra, doc_types):
+    """The shipped rules + n_extra point rules, each on one doc type + version."""
+    spec = copy.deepcopy(spec)
+    for i in range(n_extra):
+        spec["rules"].append({
+            "flag": f"EXTRA_{i}",
+            "match": [f"doc_type={doc_types[i % len(doc_types)]}", f"version={VERSIONS[i // len(doc_types) % 5]}"],
+            "points": 1,
+            "reason": "extra rule hit: {file}",
+            "reason_per": "doc",
+        })
+    return spec
+
+
+def run(n_docs, n_types, n_sets, top_k, rule_counts, repeat):
+    facts, doc_types = synthetic_facts(n_docs, n_types, chunks_per_doc=4)
+    rng = np.random.default_rng(1)
+    id_sets = rng.integers(len(facts), size=(n_sets, top_k)).tolist()
+    with open(RULES_PATH, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+
+    print(f"\n📊 {len(facts)} chunks / {n_docs} docs, {n_types} doc types, "
+          f"{n_sets} result sets x top_k={top_k}\n")
+    print(f"{'rules':>6} {'features':>9} {'batched µs/set':>15} {'single µs/set':>14} {'fired/set':>10}")
+    for n_extra in rule_counts:
+        rules = RuleSet(with_extra_rules(spec, n_extra, doc_types))
+
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            risks = rules.evaluate(FactsBatch(facts, id_sets, facts.deprecation_notice_exists))
+            best = min(best, time.perf_counter() - start)
+
+        singles = id_sets[:max(1, n_sets // 8)]
+        start = time.perf_counter()
+        for ids in singles:
+            rules.evaluate(FactsBatch(facts, [ids], facts.deprecation_notice_exists))
+        single = (time.perf_counter() - start) / len(singles)
+
+        fired = np.mean([len(r["flags"]) for r in risks])
+        print(f"{len(rules):>6} {len(rules.doc_features):>9} {best / n_sets * 1e6:>15.1f} "
+              f"{single * 1e6:>14.1f} {fired:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--types", type=int, default=40, help="distinct doc types")
+    parser.add_argument("--sets", type=int, default=2048, help="result sets per batch")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rules", type=int, nargs="+", default=[0, 10, 20, 40, 80],
+                        help="extra rules on top of risk_rules.json")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.docs, args.types, args.sets, args.top_k, args.rules, args.repeat)
@@ -0,0 +1,209 @@
+"""
+GhostTrace Ghost Identifiers – concrete strings that only stale docs contain.
+
+Most drift shows up as exact identifiers: `POST /charge`, `/v1/`,
+`X-API-KEY`, `card_number`. At ingestion every chunk is scanned for
+
+    endpoint   METHOD /path            post /charge
+    path       /path, URL version dir  /charge, /v1/
+    base_url   http(s) URL             https://api.product.com/v1/
+    header     X-... / Title-Case-...  x-api-key, idempotency-key
+    field      snake_case / camelCase  card_number, transaction_id
+
+and each identifier is indexed by the versions and files it appears in
+(identifier_index.<generation>.json). A "ghost" identifier appears in
+deprecated or outdated docs and in no current doc (non-deprecated, newest
+version of its doc type); unversioned docs such as migration guides don't
+count either way.
+
+An Aho-Corasick automaton over the ghost identifiers scans an answer (or
+query) in one pass, O(text length + hits), so an audit gets exact hits with
+their source docs without another retrieval. Matching is case-insensitive
+and respects identifier boundaries (`/charge` doesn't fire inside
+`/payments/charge`); overlapping hits keep the longest.
+"""
+
+import json
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from drift_analysis.risk_facts import NUMERIC_VERSION, latest_versions
+from vector_store.bm25_index import METHOD_PATH, PATH
+
+IDENTIFIERS_VERSION = 1
+
+URL = re.compile(r"https?://[^\s\"'<>`)]+")
+URL_VERSION = re.compile(r"/v\d+/")
+HEADER = re.compile(r"\bx-[a-z0-9]+(?:-[a-z0-9]+)*|\b[a-z]+(?:-[a-z]+)+(?=:|\s+header)")
+TITLE_HEADER = re.compile(r"\b[A-Z][a-z]+(?:-[A-Z][a-z]+)+\b")
+JSON_VALUE = re.compile(r':\s*"[^"\n]*"')   # "tx_123" is a value, not a field
+FIELD = re.compile(r"\b[a-z][a-z0-9]*(?:_[a-z0-9]+)+\b|\b[a-z]+(?:[A-Z][a-z0-9]+)+\b")
+
+
+def extract_identifiers(text: str) -> Dict[str, str]:
+    """identifier (lowercased) -> kind, for one chunk or answer."""
+    found = {}
+    for url in URL.findall(text):
+        url = url.rstrip(".,;:")
+        found[url.lower()] = "base_url"
+        found.update((prefix, "path") for prefix in URL_VERSION.findall(url.lower()))
+    for field in FIELD.findall(JSON_VALUE.sub(":", text)):
+        found.setdefault(field.lower(), "field")
+    found.update((header.lower(), "header") for header in TITLE_HEADER.findall(text))
+
+    lower = text.lower()
+    found.update((header, "header") for header in HEADER.findall(lower))
+    found.update((path.rstrip(".:"), "path") for path in PATH.findall(lower) if len(path) > 1)
+    found.update((f"{method} {path}", "endpoint") for method, path in METHOD_PATH.findall(lower))
+    return found
+
+
+def _is_stale(meta: Dict, latest: Dict[str, str]) -> bool:
+    if meta.get("deprecated", False):
+        return True
+    version, doc_type = meta.get("version", "unknown"), meta.get("doc_type", "unknown")
+    return bool(NUMERIC_VERSION.match(version)) and doc_type in latest and float(version) < float(latest[doc_type])
+
+
+def _is_current(meta: Dict, latest: Dict[str, str]) -> bool:
+    return bool(NUMERIC_VERSION.match(meta.get("version", "unknown"))) and not _is_stale(meta, latest)
+
+
+# ---------------- AHO-CORASICK ----------------
+class AhoCorasick:
+    """Multi-pattern exact matcher: one pass over the text, O(len(text) + matches)."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for i, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = self._goto[state][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (i,)
+
+        # breadth-first: a state's failure link is the longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterable[Tuple[int, int, int]]:
+        """(start, end, pattern index) of every occurrence, overlapping ones included."""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for i in out[state]:
+                yield end - len(patterns[i]), end, i
+
+
+def _bounded(text: str, start: int, end: int, pattern: str) -> bool:
+    """No partial-identifier hits: `/charge` in `/payments/charge`, `card_number` in `card_number2`."""
+    before = text[start - 1] if start else " "
+    after = text[end] if end < len(text) else " "
+    # prefixes like /v1/ are meant to match inside URLs
+    if not pattern.endswith("/") and (before.isalnum() or before == "_"):
+        return False
+    if pattern[-1].isalnum() or pattern[-1] == "_":
+        if after.isalnum() or after in "_-" or (pattern.startswith("/") and after == "/"):
+            return False
+    return True
+
+
+# ---------------- INDEX ----------------
+class IdentifierIndex:
+    """identifier -> {kind, versions, files, ghost}; scans text for the ghost ones."""
+
+    def __init__(self, identifiers: Dict[str, Dict]):
+        self.identifiers = identifiers
+        self.ghosts = sorted(ident for ident, entry in identifiers.items() if entry["ghost"])
+        self._automaton = AhoCorasick(self.ghosts)
+
+    def __len__(self):
+        return len(self.identifiers)
+
+    # ---------------- BUILD ----------------
+    @classmethod
+    def build(cls, chunks: Iterable[Tuple[Dict, str]], doc_metadata: List[Dict]) -> "IdentifierIndex":
+        """chunks: (chunk metadata, chunk text), read in a single pass; doc_metadata: one per file."""
+        latest = latest_versions(doc_metadata)
+        identifiers: Dict[str, Dict] = {}
+        for meta, text in chunks:
+            stale, current = _is_stale(meta, latest), _is_current(meta, latest)
+            for ident, kind in extract_identifiers(text).items():
+                entry = identifiers.setdefault(
+                    ident, {"kind": kind, "versions": set(), "files": set(), "stale": False, "current": False}
+                )
+                entry["versions"].add(meta.get("version", "unknown"))
+                entry["files"].add(meta["file"])
+                entry["stale"] |= stale
+                entry["current"] |= current
+
+        return cls({
+            ident: {
+                "kind": entry["kind"],
+                "versions": sorted(entry["versions"]),
+                "files": sorted(entry["files"]),
+                "ghost": entry["stale"] and not entry["current"],
+            }
+            for ident, entry in sorted(identifiers.items())
+        })
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self, path) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format_version": IDENTIFIERS_VERSION, "identifiers": self.identifiers}, f, indent=1)
+        Path(tmp_path).replace(path)
+
+    @classmethod
+    def load(cls, path) -> "IdentifierIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format_version") != IDENTIFIERS_VERSION:
+            raise ValueError(f"❌ Unsupported identifier index v{data.get('format_version')}. Re-run ingestion.")
+        return cls(data["identifiers"])
+
+    # ---------------- SCAN ----------------
+    def scan(self, text: str) -> List[Dict]:
+        """Ghost identifier hits in `text`, in text order, with the docs they come from."""
+        lower = text.lower()
+        hits = sorted(
+            ((start, end, self.ghosts[i]) for start, end, i in self._automaton.finditer(lower)
+             if _bounded(lower, start, end, self.ghosts[i])),
+            key=lambda hit: (hit[0], -hit[1]),
+        )
+        out, covered = [], -1
+        for start, end, ident in hits:
+            if end <= covered:
+                continue  # inside a longer hit, e.g. /charge within post /charge
+            covered = end
+            entry = self.identifiers[ident]
+            out.append({
+                "identifier": ident,
+                "kind": entry["kind"],
+                "start": start,
+                "end": end,
+                "versions": entry["versions"],
+                "files": entry["files"],
+            })
+        return out
@@ -1,12 +1,18 @@
 """
 GhostTrace Risk Engine – Role 3
 Analyzes VectorStore.search() results for deprecated/outdated API docs
+
+The scoring rules themselves live in risk_rules.json (see risk_rules.py).
 """
 
-import json
-import re
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from drift_analysis.ghost_identifiers import IdentifierIndex
+from drift_analysis.risk_facts import NUMERIC_VERSION, RiskFacts
+from drift_analysis.risk_rules import FactsBatch, MetadataBatch, RuleSet, get_rules
+from vector_store.doc_store import DocStore
+from vector_store.manifest import artifact_path, read_manifest
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 
@@ -16,31 +22,65 @@ class GhostTraceRiskEngine:
     Main risk scoring engine.
 
     Input: VectorStore.search() results [file:84]
-    Output: {"score": 75, "level": "HIGH", "reasons": [...], "flags": [...]}
+    Output: {"score": 75, "level": "HIGH", "reasons": [...], "flags": [...], "actions": [...]}
     """
 
-    def __init__(self):
-        self.metadata_path = BASE_DIR / "data_ingestion" / "metadata_store.json"
-        self.global_metadata = self._load_global_metadata()
-        self.latest_versions = self._compute_latest_versions()
-        self.deprecation_notice_exists = self._has_deprecation_notice()
+    def __init__(self, metadata_path=None, facts_path=None, identifiers_path=None,
+                 rules: Optional[RuleSet] = None, facts: Optional[RiskFacts] = None,
+                 identifiers: Optional[IdentifierIndex] = None):
+        """
+        facts / identifiers: already loaded with the index (GhostRAG), so scoring
+        uses that generation's artifacts; otherwise read from the paths, which
+        default to the ones the dataset's index manifest lists.
+        """
+        self._rules = rules
+        self.metadata_path = Path(metadata_path or BASE_DIR / "data_ingestion" / "documents.db")
+        self.facts_path = Path(facts_path or self._artifact("facts"))
+        self.identifiers_path = Path(identifiers_path or self._artifact("identifiers"))
+        self.facts: Optional[RiskFacts] = facts
+        self.identifiers: Optional[IdentifierIndex] = identifiers
+        if self.identifiers is None and self.identifiers_path.exists():
+            self.identifiers = IdentifierIndex.load(self.identifiers_path)
+        if self.facts is None and self.facts_path.exists():
+            self.facts = RiskFacts.load(self.facts_path)
+
+        if self.facts is not None:
+            # precomputed at ingestion: no metadata rescan, scoring is array lookups
+            self.global_metadata = None
+            self.latest_versions = self.facts.latest_versions
+            self.deprecation_notice_exists = self.facts.deprecation_notice_exists
+            n_docs = self.facts.n_docs
+        else:
+            self.global_metadata = self._load_global_metadata()
+            self.latest_versions = self._compute_latest_versions()
+            self.deprecation_notice_exists = self._has_deprecation_notice()
+            n_docs = len(self.global_metadata)
 
         print(f"✅ Risk Engine initialized:")
-        print(f"   - Loaded {len(self.global_metadata)} total docs")
+        print(f"   - Loaded {n_docs} total docs{' (risk facts)' if self.facts else ''}")
         print(f"   - Latest versions: {self.latest_versions}")
         print(f"   - Deprecation notice: {'Yes' if self.deprecation_notice_exists else 'No'}")
-
+        if self.identifiers is not None:
+            print(f"   - Ghost identifiers: {len(self.identifiers.ghosts)} of {len(self.identifiers)}")
+        print(f"   - Risk rules: {len(self.rules)} ({self.rules.source})")
+
+    def _artifact(self, kind) -> str:
+        data_dir = self.metadata_path.parent
+        try:
+            manifest = read_manifest(data_dir / "index_manifest.json")
+        except (FileNotFoundError, ValueError):
+            manifest = None
+        return artifact_path(data_dir, manifest, kind)
 
     def _load_global_metadata(self) -> List[Dict]:
         """Load all docs metadata from Role 1 [file:91][file:92]"""
         if not self.metadata_path.exists():
             raise FileNotFoundError(
-                f"❌ metadata_store.json not found at {self.metadata_path}. "
+                f"❌ documents.db not found at {self.metadata_path}. "
                 "Run: python data_ingestion/run_metadata.py first."
             )
 
-        with open(self.metadata_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return DocStore(self.metadata_path).documents()
 
     def _compute_latest_versions(self) -> Dict[str, str]:
         """For each doc_type, find highest numeric version [file:91]"""
@@ -50,7 +90,7 @@ class GhostTraceRiskEngine:
             version = meta.get("version", "unknown")
 
             # Only numeric versions (skip "unknown")
-            if re.match(r"^\d+\.\d+$", version):
+            if NUMERIC_VERSION.match(version):
                 if doc_type not in versions or float(version) > float(versions[doc_type]):
                     versions[doc_type] = version
 
@@ -63,137 +103,60 @@ class GhostTraceRiskEngine:
             for meta in self.global_metadata
         )
 
-    def compute_risk(self, results: List[Dict]) -> Dict:
+    @property
+    def rules(self) -> RuleSet:
+        """The shared rule set (risk_rules.json, re-read when edited) unless one was passed in."""
+        return self._rules or get_rules()
+
+    def compute_risk(self, results: List[Dict], ghost_hits: Optional[List[Dict]] = None) -> Dict:
         """
         Main function – takes VectorStore.search() results, returns risk assessment
 
         Args:
-            results: List from vector_store.py [file:84]
+            results: List from vector_store.py [file:84] (or flat GhostRAG.search() results)
+            ghost_hits: scan_identifiers() hits of the answer / query, if any
 
         Example:
             results[0]["metadata"] = {"file": "payment_api_v1.0_2021.txt", "version": "1.0", "deprecated": true}
         """
-        if not results:
-            return {
-                "score": 0,
-                "level": "LOW",
-                "reasons": ["No documents retrieved for analysis."],
-                "flags": [],
-                "actions": []
-            }
-
-        score = 0
-        reasons = []
-        flags = []
-
-        # === RULE 1: DEPRECATED DOCS (50 points) ===
-        deprecated_docs = [r for r in results if r["metadata"].get("deprecated", False)]
-        if deprecated_docs:
-            score += 50
-            for doc in deprecated_docs:
-                m = doc["metadata"]
-                reasons.append(f"🚨 DEPRECATED DOCUMENT: {m['file']} (v{m['version']})")
-                flags.append("DEPRECATED_DOC")
-
-        # === RULE 2: OUTDATED VERSIONS (25 points) ===
-        for result in results:
-            meta = result["metadata"]
-            doc_type = meta.get("doc_type", "unknown")
-            version = meta.get("version", "unknown")
+        return self.compute_risk_batch([results], [ghost_hits or []])[0]
+
+    def compute_risk_batch(self, result_sets: List[List[Dict]],
+                           ghost_hits: Optional[List[List[Dict]]] = None) -> List[Dict]:
+        """Score many result sets (one per query) in a single call."""
+        id_sets = [_result_ids(results) for results in result_sets]
+        if self.facts is not None and all(ids is not None for ids in id_sets):
+            try:
+                return self.compute_risk_ids(id_sets, ghost_hits)
+            except KeyError:
+                pass  # facts predate these results; score from metadata
+        return self.rules.evaluate(MetadataBatch(
+            result_sets, self.latest_versions, self.deprecation_notice_exists, ghost_hits))
+
+    def compute_risk_ids(self, id_sets: List[List[int]],
+                         ghost_hits: Optional[List[List[Dict]]] = None) -> List[Dict]:
+        """
+        Vectorized scoring from precomputed risk facts.
 
-            if (version != "unknown" and
-                doc_type in self.latest_versions and
-                not meta.get("deprecated", False)):
-
-                try:
-                    current_v = float(version)
-                    latest_v = float(self.latest_versions[doc_type])
-
-                    if current_v < latest_v:
-                        score += 25
-                        reasons.append(
-                            f"⚠️ OUTDATED VERSION: {meta['file']} v{version} "
-                            f"(latest v{self.latest_versions[doc_type]} for {doc_type})"
-                        )
-                        flags.append("OUTDATED_VERSION")
-                except ValueError:
-                    pass  # skip malformed versions
-
-        # === RULE 3: IGNORING DEPRECATION NOTICE (15 points) ===
-        if self.deprecation_notice_exists:
-            old_versions = [
-                r for r in results
-                if r["metadata"].get("version", "").startswith(("1.", "2."))
-            ]
-            if old_versions:
-                score += 15
-                reasons.append(
-                    "⚠️ IGNORING DEPRECATION: v1/v2 docs used despite "
-                    "official deprecation notice in knowledge base."
-                )
-                flags.append("IGNORING_DEPRECATION")
-
-        # === RULE 4: CRITICAL DOMAIN MULTIPLIER ===
-        critical_types = {"payment_api", "auth_api", "webhook", "sdk"}
-        has_critical = any(
-            r["metadata"].get("doc_type") in critical_types
-            for r in results
-        )
-        if has_critical:
-            score = int(score * 1.3)
-            reasons.append(
-                "🔥 CRITICAL DOMAIN: Payment/Auth/Webhook/SDK docs involved "
-                "(risk multiplier applied)"
-            )
-            flags.append("CRITICAL_DOMAIN")
-
-        # === RULE 5: VERSION IMBALANCE (10 points) ===
-        versions_used = [
-            r["metadata"].get("version", "unknown")
-            for r in results
-        ]
-        unique_versions = set(v for v in versions_used if v != "unknown")
-
-        if len(unique_versions) == 1 and "3.0" not in unique_versions:
-            score += 10
-            reasons.append(
-                f"📊 VERSION IMBALANCE: All {len(results)} results from "
-                f"same old version(s): {list(unique_versions)}"
-            )
-            flags.append("VERSION_IMBALANCE")
+        id_sets: ranked vector ids per query; rule features for the whole
+        batch are gathered from the facts columns, so scoring is a few array
+        operations. Same output as compute_risk(). Raises KeyError for ids
+        unknown to the facts table.
+        """
+        return self.rules.evaluate(FactsBatch(self.facts, id_sets, self.deprecation_notice_exists, ghost_hits))
 
-        # === FINAL SCORING ===
-        score = max(0, min(100, score))
+    def scan_identifiers(self, text: str) -> List[Dict]:
+        """Exact ghost identifier hits in an answer / query (none without identifier_index.json)."""
+        if self.identifiers is None or not text:
+            return []
+        return self.identifiers.scan(text)
+
+
+def _result_ids(results: List[Dict]) -> Optional[List[int]]:
+    """Vector ids of a result set, or None if any result lacks one."""
+    ids = [r.get("metadata", r).get("id") for r in results]
+    return None if any(i is None for i in ids) else ids
 
-        if score >= 70:
-            level = "HIGH"
-        elif score >= 35:
-            level = "MEDIUM"
-        else:
-            level = "LOW"
-
-        # === DEFAULT SAFE MESSAGE ===
-        if not reasons:
-            reasons.append("✅ No major ghost data risks detected. All documents appear current.")
-
-        # === RECOMMENDED ACTIONS ===
-        actions = []
-        if any(f in flags for f in ["DEPRECATED_DOC", "OUTDATED_VERSION"]):
-            actions.extend(["PRIORITIZE_V3", "ARCHIVE_OLD_VERSIONS"])
-        if "IGNORING_DEPRECATION" in flags:
-            actions.append("ENFORCE_DEPRECATION_RULES")
-        if "CRITICAL_DOMAIN" in flags:
-            actions.append("URGENT_REVIEW")
-        if level == "LOW":
-            actions.append("CONTINUE_MONITORING")
-
-        return {
-            "score": score,
-            "level": level,
-            "reasons": reasons,
-            "flags": list(set(flags)),  # dedupe
-            "actions": actions
-        }
 
 # === QUICK USAGE ===
 def demo_risk_analysis(query: str):
@@ -0,0 +1,276 @@
+"""
+GhostTrace Risk Facts – precomputed per-vector inputs for the risk rules.
+
+Built once at ingestion (after metadata + vectors) and saved next to the
+index as risk_facts.<generation>.npz, so GhostTraceRiskEngine never re-parses
+versions or rescans the corpus per query: scoring a result set is O(top_k) array
+lookups, and a batch of result sets is scored with NumPy in one pass.
+
+The same file carries the retrieval priors for version-aware re-ranking:
+a per-vector score penalty (deprecated, versions behind the newest of its
+doc type) and the id of its "current equivalent" – the most similar chunk
+of the newest, non-deprecated version of the same doc type.
+"""
+
+import json
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from vector_store.filters import NUMERIC_VERSION
+
+FACTS_VERSION = 2
+CRITICAL_TYPES = {"payment_api", "auth_api", "webhook", "sdk"}
+
+# re-ranking priors, in units of relevance (cosine similarity / normalized score)
+DEPRECATED_PENALTY = 0.3
+VERSION_STEP_PENALTY = 0.1   # per newer version of the same doc type
+MAX_VERSION_STEPS = 3
+MATCH_BATCH = 1024           # stale chunks matched to current ones per similarity product
+
+
+def latest_versions(doc_metadata: List[Dict]) -> Dict[str, str]:
+    """For each doc_type, highest numeric version (same rule as the engine)."""
+    versions = {}
+    for meta in doc_metadata:
+        doc_type = meta.get("doc_type", "unknown")
+        version = meta.get("version", "unknown")
+        if NUMERIC_VERSION.match(version):
+            if doc_type not in versions or float(version) > float(versions[doc_type]):
+                versions[doc_type] = version
+    return versions
+
+
+def has_deprecation_notice(doc_metadata: List[Dict]) -> bool:
+    return any("deprecation" in meta["file"].lower() for meta in doc_metadata)
+
+
+def is_outdated(meta: Dict, latest: Dict[str, str]) -> bool:
+    version = meta.get("version", "unknown")
+    doc_type = meta.get("doc_type", "unknown")
+    if version == "unknown" or doc_type not in latest or meta.get("deprecated", False):
+        return False
+    try:
+        return float(version) < float(latest[doc_type])
+    except ValueError:
+        return False
+
+
+class RiskFacts:
+    """Column arrays indexed by fact row; `ids` maps vector id -> row."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], info: Dict):
+        self.ids = arrays["ids"]
+        self.file_id = arrays["file_id"]
+        self.doc_type_id = arrays["doc_type_id"]
+        self.version_id = arrays["version_id"]
+        self.version_rank = arrays["version_rank"]
+        self.is_deprecated = arrays["is_deprecated"]
+        self.is_outdated = arrays["is_outdated"]
+        self.is_old_major = arrays["is_old_major"]
+        self.is_critical = arrays["is_critical"]
+        self.prior = arrays["prior"]
+        self.current_id = arrays["current_id"]
+
+        self.files: List[str] = info["files"]
+        self.doc_types: List[str] = info["doc_types"]
+        self.versions: List[str] = info["versions"]
+        self.latest_versions: Dict[str, str] = info["latest_versions"]
+        self.deprecation_notice_exists: bool = info["deprecation_notice_exists"]
+        self.n_docs: int = info["n_docs"]
+
+        order = np.argsort(self.ids, kind="stable")
+        self._sorted_ids = self.ids[order]
+        self._sorted_rows = order
+        self._value_masks: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.ids, self.file_id, self.doc_type_id, self.version_id, self.version_rank,
+            self.is_deprecated, self.is_outdated, self.is_old_major, self.is_critical,
+            self.prior, self.current_id, self._sorted_ids, self._sorted_rows,
+        ))
+
+    # ---------------- BUILD ----------------
+    @classmethod
+    def build(
+        cls,
+        vector_metadata: Iterable[Dict],
+        doc_metadata: List[Dict],
+        transform: Optional[Callable] = None,
+    ) -> "RiskFacts":
+        """vector_metadata: one record per vector (with "id"), read in a single pass
+        so it can be a doc store cursor; doc_metadata: one per file.
+
+        transform(ids) -> L2-normalized rows (e.g. TF-IDF) picks each stale
+        chunk's current equivalent by similarity; without it, the first chunk
+        of the current version is used."""
+        latest = latest_versions(doc_metadata)
+
+        files, doc_types, versions = {}, {}, {}
+        columns = {key: [] for key in (
+            "ids", "file_id", "doc_type_id", "version_id",
+            "is_deprecated", "is_outdated", "is_old_major", "is_critical",
+        )}
+        for m in vector_metadata:
+            version = m.get("version", "unknown")
+            doc_type = m.get("doc_type", "unknown")
+            columns["ids"].append(m["id"])
+            columns["file_id"].append(files.setdefault(m["file"], len(files)))
+            columns["doc_type_id"].append(doc_types.setdefault(doc_type, len(doc_types)))
+            columns["version_id"].append(
+                versions.setdefault(version, len(versions)) if version != "unknown" else -1)
+            columns["is_deprecated"].append(bool(m.get("deprecated", False)))
+            columns["is_outdated"].append(is_outdated(m, latest))
+            columns["is_old_major"].append(m.get("version", "").startswith(("1.", "2.")))
+            columns["is_critical"].append(m.get("doc_type") in CRITICAL_TYPES)
+
+        numeric = sorted((v for v in versions if NUMERIC_VERSION.match(v)), key=float)
+        rank = {versions[v]: i for i, v in enumerate(numeric)}
+        rank_of = np.array([rank.get(i, -1) for i in range(len(versions))] + [-1], dtype=np.int16)
+
+        dtypes = {"ids": np.int64, "file_id": np.int32, "doc_type_id": np.int16, "version_id": np.int16}
+        arrays = {key: np.array(values, dtype=dtypes.get(key, bool)) for key, values in columns.items()}
+        arrays["version_rank"] = rank_of[arrays["version_id"]]  # -1 indexes the trailing "unknown"
+        arrays["prior"], arrays["current_id"] = _priors(arrays, transform)
+
+        info = {
+            "files": list(files),
+            "doc_types": list(doc_types),
+            "versions": list(versions),
+            "latest_versions": latest,
+            "deprecation_notice_exists": has_deprecation_notice(doc_metadata),
+            "n_docs": len(doc_metadata),
+        }
+        return cls(arrays, info)
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self, path) -> None:
+        info = {
+            "format_version": FACTS_VERSION,
+            "files": self.files,
+            "doc_types": self.doc_types,
+            "versions": self.versions,
+            "latest_versions": self.latest_versions,
+            "deprecation_notice_exists": self.deprecation_notice_exists,
+            "n_docs": self.n_docs,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                info=np.array(json.dumps(info)),
+                ids=self.ids,
+                file_id=self.file_id,
+                doc_type_id=self.doc_type_id,
+                version_id=self.version_id,
+                version_rank=self.version_rank,
+                is_deprecated=self.is_deprecated,
+                is_outdated=self.is_outdated,
+                is_old_major=self.is_old_major,
+                is_critical=self.is_critical,
+                prior=self.prior,
+                current_id=self.current_id,
+            )
+        Path(tmp_path).replace(path)
+
+    @classmethod
+    def load(cls, path) -> "RiskFacts":
+        with np.load(path) as z:
+            info = json.loads(str(z["info"]))
+            if info.get("format_version") != FACTS_VERSION:
+                raise ValueError(f"❌ Unsupported risk facts v{info.get('format_version')}. Re-run ingestion.")
+            arrays = {key: z[key] for key in z.files if key != "info"}
+        return cls(arrays, info)
+
+    # ---------------- LOOKUP ----------------
+    def rows(self, ids, strict: bool = True) -> np.ndarray:
+        """Vector ids (any shape, -1 = empty slot) -> fact rows (-1 = empty).
+
+        Raises KeyError if an id is unknown (facts older than the index),
+        unless strict=False, which maps unknown ids to -1 as well.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.full(ids.shape, -1, dtype=np.int64)
+        present = ids >= 0
+        if not present.any():
+            return rows
+
+        wanted = ids[present]
+        if len(self._sorted_ids) == 0:
+            found, at = np.zeros(len(wanted), dtype=bool), np.zeros(len(wanted), dtype=np.int64)
+        else:
+            at = np.minimum(np.searchsorted(self._sorted_ids, wanted), len(self._sorted_ids) - 1)
+            found = self._sorted_ids[at] == wanted
+        if strict and not found.all():
+            raise KeyError("vector id missing from risk facts")
+        rows[present] = np.where(found, self._sorted_rows[at] if found.any() else -1, -1)
+        return rows
+
+    def value_mask(self, column: str, value: int) -> np.ndarray:
+        """Row bitmap of `column == value` (e.g. doc_type_id), built once per value."""
+        mask = self._value_masks.get((column, value))
+        if mask is None:
+            mask = self._value_masks[(column, value)] = getattr(self, column) == value
+        return mask
+
+    # ---------------- RE-RANKING ----------------
+    def rerank(self, hits: List[Tuple[int, float]], top_k: int) -> List[Tuple[int, float, Optional[int]]]:
+        """
+        (vector id, relevance) candidates -> top_k (id, relevance + prior,
+        current equivalent id or None). Ids unknown to these facts (a newer
+        index generation) get no prior.
+        """
+        if not hits:
+            return []
+        ids = np.array([doc_id for doc_id, _ in hits], dtype=np.int64)
+        relevance = np.array([score for _, score in hits], dtype=np.float32)
+
+        rows = self.rows(ids, strict=False)
+        known = rows >= 0
+        scores = relevance + np.where(known, self.prior[rows], 0.0)
+        current = np.where(known, self.current_id[rows], -1)
+
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [
+            (int(ids[i]), float(scores[i]), int(current[i]) if current[i] >= 0 else None)
+            for i in order
+        ]
+
+
+def _priors(arrays: Dict[str, np.ndarray], transform: Optional[Callable]):
+    """Per-row score penalty + current-equivalent id (-1 = already current / none)."""
+    doc_type, rank = arrays["doc_type_id"], arrays["version_rank"]
+    deprecated = arrays["is_deprecated"]
+
+    # versions behind = newer numeric versions seen for the same doc type
+    behind = np.zeros(len(rank), dtype=np.int64)
+    for t in np.unique(doc_type):
+        of_type = doc_type == t
+        ranks = np.unique(rank[of_type & (rank >= 0)])
+        if len(ranks):
+            versioned = of_type & (rank >= 0)
+            behind[versioned] = len(ranks) - 1 - np.searchsorted(ranks, rank[versioned])
+    prior = -(DEPRECATED_PENALTY * deprecated
+              + VERSION_STEP_PENALTY * np.minimum(behind, MAX_VERSION_STEPS)).astype(np.float32)
+
+    current_id = np.full(len(rank), -1, dtype=np.int64)
+    stale = deprecated | (behind > 0)
+    for t in np.unique(doc_type[stale]):
+        sources = np.flatnonzero(stale & (doc_type == t))
+        targets = np.flatnonzero((doc_type == t) & ~stale)
+        if not len(targets):
+            continue  # nothing current of this doc type
+        if transform is None:
+            current_id[sources] = arrays["ids"][targets[0]]
+            continue
+        target_vectors = transform(arrays["ids"][targets]).T
+        for start in range(0, len(sources), MATCH_BATCH):
+            batch = sources[start:start + MATCH_BATCH]
+            sims = transform(arrays["ids"][batch]) @ target_vectors
+            current_id[batch] = arrays["ids"][targets[np.asarray(sims.argmax(axis=1)).ravel()]]
+    return prior.astype(np.float32), current_id
@@ -0,0 +1,510 @@
+"""
+GhostTrace Risk Rules – one declarative rule set behind every risk score.
+
+The rules live in risk_rules.json (or a .yaml file, with `pip install
+pyyaml`) and are compiled once into matrices: every result set of a batch is
+scored by a few NumPy products, whatever the number of rules, and Python
+only runs for the rules that fired (to format their reasons). /audit, the
+CLI (analyze_query / demo_risk_analysis) and the dashboard all score through
+the same compiled RuleSet; the file is re-read when it changes on disk.
+
+    GHOSTTRACE_RULES        rule file (default: drift_analysis/risk_rules.json)
+    GHOSTTRACE_RULES_CHECK  seconds between checks for an edited file (default: 1)
+
+A rule:
+
+    flag            name reported in "flags"
+    match           doc features that must all hold for a retrieved doc
+                    ("!feature" negates); several chunks of a file count once
+    require         set features that must all hold for the result set
+    per             "set" (default): points once if any doc matches;
+                    "doc": points for every matching doc
+    points          added to the score, or
+    multiply        score = int(score * multiply), applied in rule order
+    reason          template; reason_per doc {file, version, doc_type, latest},
+                    set {count, versions}, identifier {identifier, kind, files}
+    actions         action codes, recommendation: one line for humans
+
+doc features: deprecated, outdated, old_major, critical, current,
+unversioned, version=<v>, doc_type=<t>
+set features: deprecation_notice, single_version, ghost_identifier,
+any:<doc feature>
+"""
+
+import hashlib
+import json
+import logging
+import os
+import string
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from drift_analysis.risk_facts import CRITICAL_TYPES, RiskFacts, is_outdated
+
+try:
+    from yaml import YAMLError
+except ImportError:  # YAML rule files are optional
+    YAMLError = ValueError
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = os.getenv("GHOSTTRACE_RULES", str(Path(__file__).with_name("risk_rules.json")))
+RULES_CHECK = float(os.getenv("GHOSTTRACE_RULES_CHECK", 1.0))
+
+RULES_VERSION = 1
+DOC_FEATURES = ("deprecated", "outdated", "old_major", "critical", "current", "unversioned")
+DOC_VALUE_FEATURES = ("version=", "doc_type=")
+SET_FEATURES = ("deprecation_notice", "single_version", "ghost_identifier")
+
+RULE_KEYS = {"flag", "match", "require", "per", "points", "multiply",
+             "reason", "reason_per", "actions", "recommendation"}
+REASON_FIELDS = {
+    "doc": {"file", "version", "doc_type", "latest"},
+    "set": {"count", "versions"},
+    "identifier": {"identifier", "kind", "files"},
+}
+
+
+def _is_doc_feature(name: str) -> bool:
+    return name in DOC_FEATURES or name.startswith(DOC_VALUE_FEATURES)
+
+
+def _split(names: Sequence[str]):
+    """["a", "!b"] -> (positive, negated) feature names."""
+    return [n for n in names if not n.startswith("!")], [n[1:] for n in names if n.startswith("!")]
+
+
+# ---------------- INPUT BATCHES ----------------
+class _Batch(ABC):
+    """
+    Result sets as (n_sets x top_k) arrays: valid slots, a file key (dedupe),
+    a version key (-1 = unknown) and doc features on demand. Shared by the
+    risk-facts path (vector ids) and the metadata path (result dicts).
+    """
+
+    valid: np.ndarray
+    file_key: np.ndarray
+    version_key: np.ndarray
+
+    def __init__(self, deprecation_notice: bool, ghost_hits: Optional[List[List[Dict]]]):
+        self.deprecation_notice = deprecation_notice
+        self.ghost_hits = ghost_hits
+
+    def __len__(self):
+        return len(self.valid)
+
+    def unique(self) -> np.ndarray:
+        """Valid slots minus later chunks of a file already in the set."""
+        width = self.valid.shape[1]
+        same_file = (self.file_key[:, :, None] == self.file_key[:, None, :]) & self.valid[:, None, :]
+        earlier = np.tril(np.ones((width, width), dtype=bool), -1)
+        return self.valid & ~(same_file & earlier).any(axis=2)
+
+    def hits(self, i: int) -> List[Dict]:
+        return self.ghost_hits[i] if self.ghost_hits is not None else []
+
+    @abstractmethod
+    def feature(self, name: str) -> np.ndarray:
+        """(n_sets x top_k) values of a doc feature."""
+
+    @abstractmethod
+    def doc(self, i: int, j: int) -> Dict:
+        """Metadata of slot j of set i."""
+
+    @abstractmethod
+    def version(self, key: int) -> str:
+        """Version string of a version key."""
+
+
+class FactsBatch(_Batch):
+    """Ranked vector ids per set, scored from RiskFacts columns (KeyError on unknown ids)."""
+
+    def __init__(self, facts: RiskFacts, id_sets: List[List[int]], deprecation_notice: bool,
+                 ghost_hits: Optional[List[List[Dict]]] = None):
+        super().__init__(deprecation_notice, ghost_hits)
+        self.facts = facts
+        width = max(1, max((len(ids) for ids in id_sets), default=0))
+        id_matrix = np.full((len(id_sets), width), -1, dtype=np.int64)
+        for i, ids in enumerate(id_sets):
+            id_matrix[i, :len(ids)] = ids
+
+        rows = facts.rows(id_matrix)
+        self.valid = rows >= 0
+        self.rows = np.where(self.valid, rows, 0)
+        self._columns: Dict[str, np.ndarray] = {}
+        self.file_key = np.where(self.valid, facts.file_id[self.rows], -1)
+        self.version_key = np.where(self.valid, self._column("version_id"), -1)
+
+    def _column(self, name: str) -> np.ndarray:
+        """A facts column gathered for the batch's rows, once."""
+        if name not in self._columns:
+            self._columns[name] = getattr(self.facts, name)[self.rows]
+        return self._columns[name]
+
+    def feature(self, name):
+        facts = self.facts
+        if name in ("deprecated", "outdated", "old_major", "critical"):
+            return self._column(f"is_{name}")
+        if name == "unversioned":
+            return self._column("version_id") < 0
+        if name == "current":
+            latest = np.array([
+                facts.versions.index(facts.latest_versions[t]) if t in facts.latest_versions else -2
+                for t in facts.doc_types
+            ] + [-2], dtype=np.int64)
+            return ~self._column("is_deprecated") & (self._column("version_id") == latest[self._column("doc_type_id")])
+        column, values = ("version_id", facts.versions) if name.startswith("version=") else ("doc_type_id", facts.doc_types)
+        value = name.split("=", 1)[1]
+        return self._column(column) == (values.index(value) if value in values else -2)
+
+    def doc(self, i, j):
+        facts, row = self.facts, self.rows[i, j]
+        doc_type = facts.doc_types[facts.doc_type_id[row]]
+        return {
+            "file": facts.files[facts.file_id[row]],
+            "version": self.version(self.version_key[i, j]),
+            "doc_type": doc_type,
+            "latest": facts.latest_versions.get(doc_type, "unknown"),
+        }
+
+    def version(self, key):
+        return self.facts.versions[key] if key >= 0 else "unknown"
+
+
+class MetadataBatch(_Batch):
+    """Result dicts per set, either VectorStore-shaped ({"metadata": {...}}) or flat (GhostRAG)."""
+
+    def __init__(self, result_sets: List[List[Dict]], latest_versions: Dict[str, str],
+                 deprecation_notice: bool, ghost_hits: Optional[List[List[Dict]]] = None):
+        super().__init__(deprecation_notice, ghost_hits)
+        self.latest_versions = latest_versions
+        self.metas = [[r.get("metadata", r) for r in results] for results in result_sets]
+        width = max(1, max((len(m) for m in self.metas), default=0))
+        files, self.versions = {}, {}
+        self.valid = np.zeros((len(self.metas), width), dtype=bool)
+        self.file_key = np.full(self.valid.shape, -1, dtype=np.int64)
+        self.version_key = np.full(self.valid.shape, -1, dtype=np.int64)
+        for i, metas in enumerate(self.metas):
+            for j, meta in enumerate(metas):
+                self.valid[i, j] = True
+                self.file_key[i, j] = files.setdefault(meta.get("file"), len(files))
+                version = meta.get("version", "unknown")
+                if version != "unknown":
+                    self.version_key[i, j] = self.versions.setdefault(version, len(self.versions))
+        self._version_names = list(self.versions)
+
+    def feature(self, name):
+        test = self._predicate(name)
+        out = np.zeros(self.valid.shape, dtype=bool)
+        for i, metas in enumerate(self.metas):
+            for j, meta in enumerate(metas):
+                out[i, j] = test(meta)
+        return out
+
+    def _predicate(self, name) -> Callable[[Dict], bool]:
+        latest = self.latest_versions
+        if name == "deprecated":
+            return lambda m: bool(m.get("deprecated", False))
+        if name == "outdated":
+            return lambda m: is_outdated(m, latest)
+        if name == "old_major":
+            return lambda m: m.get("version", "").startswith(("1.", "2."))
+        if name == "critical":
+            return lambda m: m.get("doc_type") in CRITICAL_TYPES
+        if name == "unversioned":
+            return lambda m: m.get("version", "unknown") == "unknown"
+        if name == "current":
+            return lambda m: (not m.get("deprecated", False)
+                              and latest.get(m.get("doc_type", "unknown")) == m.get("version"))
+        key, value = name.split("=", 1)
+        return lambda m: m.get(key, "unknown") == value
+
+    def doc(self, i, j):
+        meta = self.metas[i][j]
+        doc_type = meta.get("doc_type", "unknown")
+        return {
+            "file": meta.get("file"),
+            "version": meta.get("version", "unknown"),
+            "doc_type": doc_type,
+            "latest": self.latest_versions.get(doc_type, "unknown"),
+        }
+
+    def version(self, key):
+        return self._version_names[key] if key >= 0 else "unknown"
+
+
+# ---------------- RULE SET ----------------
+class RuleSet:
+    """A validated rule spec compiled into feature x rule matrices."""
+
+    def __init__(self, spec: Dict, source: str = "<dict>"):
+        self.source = source
+        self.checksum = hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        if spec.get("format_version") != RULES_VERSION:
+            raise ValueError(f"❌ Unsupported risk rules v{spec.get('format_version')} in {source}")
+        self.levels = sorted(spec.get("levels", {}).items(), key=lambda item: -item[1])
+        self.max_score = spec.get("max_score", 100)
+        self.empty_reason = spec.get("empty_reason", "No documents retrieved for analysis.")
+        self.clear_reason = spec.get("clear_reason", "✅ No risks detected.")
+        self.low_actions = list(spec.get("low_actions", []))
+        self.rules = [self._check(i, rule) for i, rule in enumerate(spec.get("rules", []))]
+        self._compile()
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _check(self, i: int, rule: Dict) -> Dict:
+        where = f"rule {i} ({rule.get('flag', '?')}) in {self.source}"
+        unknown = set(rule) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"❌ Unknown keys {sorted(unknown)} in {where}")
+        if "flag" not in rule:
+            raise ValueError(f"❌ Missing 'flag' in {where}")
+        if "points" in rule and "multiply" in rule:
+            raise ValueError(f"❌ Use either 'points' or 'multiply' in {where}")
+
+        rule = {"match": [], "require": [], "per": "set", "actions": [], **rule}
+        if rule["per"] not in ("set", "doc"):
+            raise ValueError(f"❌ 'per' must be 'set' or 'doc' in {where}")
+        if rule["per"] == "doc" and not rule["match"]:
+            raise ValueError(f"❌ 'per': 'doc' needs 'match' in {where}")
+        rule.setdefault("reason_per", rule["per"])
+        if rule["reason_per"] not in REASON_FIELDS or (rule["reason_per"] == "doc" and not rule["match"]):
+            raise ValueError(f"❌ Bad 'reason_per' {rule['reason_per']!r} in {where}")
+
+        for name in _split(rule["match"])[0] + _split(rule["match"])[1]:
+            if not _is_doc_feature(name):
+                raise ValueError(f"❌ Unknown doc feature {name!r} in {where}")
+        for name in _split(rule["require"])[0] + _split(rule["require"])[1]:
+            if name not in SET_FEATURES and not (name.startswith("any:") and _is_doc_feature(name[4:])):
+                raise ValueError(f"❌ Unknown set feature {name!r} in {where}")
+
+        fields = {f for _, f, _, _ in string.Formatter().parse(rule.get("reason", "")) if f}
+        if fields - REASON_FIELDS[rule["reason_per"]]:
+            raise ValueError(f"❌ Reason fields {sorted(fields - REASON_FIELDS[rule['reason_per']])} "
+                             f"not available per {rule['reason_per']} in {where}")
+        return rule
+
+    def _compile(self):
+        rules = self.rules
+        doc_features, set_features = [], []
+        for rule in rules:
+            for name in sum(_split(rule["match"]), []):
+                doc_features.append(name)
+            for name in sum(_split(rule["require"]), []):
+                set_features.append(name)
+                if name.startswith("any:"):
+                    doc_features.append(name[4:])
+        self.doc_features = list(dict.fromkeys(doc_features))
+        self.set_features = list(dict.fromkeys(set_features))
+        doc_col = {name: i for i, name in enumerate(self.doc_features)}
+        set_col = {name: i for i, name in enumerate(self.set_features)}
+
+        n = len(rules)
+        # 0/1 float32 matrices: counts stay exact and the products run in BLAS
+        self._match_pos = np.zeros((len(doc_col), n), dtype=np.float32)
+        self._match_neg = np.zeros((len(doc_col), n), dtype=np.float32)
+        self._require_pos = np.zeros((len(set_col), n), dtype=np.float32)
+        self._require_neg = np.zeros((len(set_col), n), dtype=np.float32)
+        for r, rule in enumerate(rules):
+            pos, neg = _split(rule["match"])
+            self._match_pos[[doc_col[f] for f in pos], r] = 1
+            self._match_neg[[doc_col[f] for f in neg], r] = 1
+            pos, neg = _split(rule["require"])
+            self._require_pos[[set_col[f] for f in pos], r] = 1
+            self._require_neg[[set_col[f] for f in neg], r] = 1
+        self._n_match = self._match_pos.sum(axis=0)
+        self._n_require = self._require_pos.sum(axis=0)
+        self._has_match = np.array([bool(rule["match"]) for rule in rules], dtype=bool)
+        self._per_doc = np.array([rule["per"] == "doc" for rule in rules], dtype=bool)
+        self._points = np.array([rule.get("points", 0) for rule in rules], dtype=np.float64)
+
+        # additive rules between two multipliers sum in one reduction
+        self._stages, block = [], []
+        for r, rule in enumerate(rules):
+            if "multiply" in rule:
+                self._stages.append((np.array(block, dtype=np.int64), r, float(rule["multiply"])))
+                block = []
+            else:
+                block.append(r)
+        self._stages.append((np.array(block, dtype=np.int64), None, 1.0))
+
+    # ---------------- EVALUATE ----------------
+    def evaluate(self, batch: _Batch) -> List[Dict]:
+        """Risk dicts ({score, level, reasons, flags, actions, recommendations}) per result set."""
+        if not len(batch):
+            return []
+        unique = batch.unique()
+        n_sets, width = unique.shape
+        features = np.zeros((n_sets, width, len(self.doc_features)), dtype=np.float32)
+        for c, name in enumerate(self.doc_features):
+            features[:, :, c] = batch.feature(name) & unique
+
+        # every rule's doc match at once: (sets * docs, features) @ (features, rules)
+        flat = features.reshape(n_sets * width, -1)
+        doc_match = ((flat @ self._match_pos == self._n_match) & (flat @ self._match_neg == 0))
+        doc_match = doc_match.reshape(n_sets, width, -1) & unique[:, :, None]
+        counts = doc_match.sum(axis=1)
+        doc_ok = np.where(self._has_match, counts > 0, True)
+
+        set_values = np.zeros((n_sets, len(self.set_features)), dtype=np.float32)
+        for c, name in enumerate(self.set_features):
+            set_values[:, c] = self._set_feature(name, batch, features, unique)
+        set_ok = (set_values @ self._require_pos == self._n_require) & (set_values @ self._require_neg == 0)
+
+        fired = doc_ok & set_ok
+        contribution = np.where(self._per_doc, counts, fired) * self._points
+        score = np.zeros(n_sets)
+        for block, multiplier, factor in self._stages:
+            score += contribution[:, block].sum(axis=1)
+            if multiplier is not None:
+                score = np.where(fired[:, multiplier], np.trunc(score * factor), score)
+        score = np.clip(score, 0, self.max_score).astype(np.int64).tolist()
+
+        empty = ~unique.any(axis=1) & ~fired.any(axis=1)
+        return [
+            self._empty() if empty[i] else self._risk(i, score[i], np.flatnonzero(fired[i]), batch, doc_match, unique)
+            for i in range(n_sets)
+        ]
+
+    def _set_feature(self, name, batch, features, unique) -> np.ndarray:
+        if name == "deprecation_notice":
+            return np.full(len(unique), batch.deprecation_notice, dtype=bool)
+        if name == "ghost_identifier":
+            return np.array([bool(batch.hits(i)) for i in range(len(unique))], dtype=bool)
+        if name == "single_version":
+            return self._n_versions(batch, unique) == 1
+        return features[:, :, self.doc_features.index(name[4:])].any(axis=1)  # any:<doc feature>
+
+    @staticmethod
+    def _n_versions(batch, unique) -> np.ndarray:
+        """Distinct known versions per set (sorted row, count value changes)."""
+        version_key = np.sort(np.where(unique, batch.version_key, -1), axis=1)
+        known = version_key >= 0
+        changes = np.ones_like(known)
+        changes[:, 1:] = version_key[:, 1:] != version_key[:, :-1]
+        return (known & changes).sum(axis=1)
+
+    def _risk(self, i, score, fired, batch, doc_match, unique) -> Dict:
+        reasons, flags, actions, recommendations = [], [], [], []
+        fired = fired.tolist()
+        matched = doc_match[i][:, fired].T.tolist()  # docs per fired rule, as plain lists
+        for r, docs in zip(fired, matched):
+            rule = self.rules[r]
+            reasons += self._reasons(rule, i, docs, batch, unique)
+            flags.append(rule["flag"])
+            actions += rule["actions"]
+            if rule.get("recommendation"):
+                recommendations.append(rule["recommendation"])
+
+        level = next((name for name, threshold in self.levels if score >= threshold), "LOW")
+        if not reasons:
+            reasons.append(self.clear_reason)
+        if level == "LOW":
+            actions += self.low_actions
+        return {
+            "score": score,
+            "level": level,
+            "reasons": reasons,
+            "flags": list(dict.fromkeys(flags)),
+            "actions": list(dict.fromkeys(actions)),
+            "recommendations": list(dict.fromkeys(recommendations)),
+        }
+
+    def _reasons(self, rule, i, docs, batch, unique) -> List[str]:
+        template = rule.get("reason")
+        if not template:
+            return []
+        if rule["reason_per"] == "doc":
+            return [template.format(**batch.doc(i, j)) for j, hit in enumerate(docs) if hit]
+        if rule["reason_per"] == "identifier":
+            hits = {hit["identifier"]: hit for hit in batch.hits(i)}
+            return [
+                template.format(identifier=ident, kind=hit["kind"], files=", ".join(hit["files"]))
+                for ident, hit in hits.items()
+            ]
+        versions = [batch.version(k) for k in dict.fromkeys(batch.version_key[i][unique[i]].tolist()) if k >= 0]
+        return [template.format(count=int(unique[i].sum()), versions=versions)]
+
+    def _empty(self) -> Dict:
+        return {
+            "score": 0,
+            "level": "LOW",
+            "reasons": [self.empty_reason],
+            "flags": [],
+            "actions": [],
+            "recommendations": [],
+        }
+
+
+# ---------------- LOADING / HOT RELOAD ----------------
+def load_rules(path) -> RuleSet:
+    """Parse + compile a JSON (or YAML) rule file."""
+    path = str(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("❌ YAML risk rules need `pip install pyyaml` (or use JSON)") from e
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    return RuleSet(spec, source=path)
+
+
+_rules: Optional[RuleSet] = None
+_rules_mtime: Optional[int] = None
+_rules_checked = 0.0
+_rules_lock = threading.Lock()
+
+# what a bad edit can raise: unreadable / vanished file (editors that save by
+# rename), malformed JSON or YAML, or a spec that doesn't validate
+_LOAD_ERRORS = (OSError, ValueError, KeyError, TypeError, YAMLError)
+
+
+def get_rules() -> RuleSet:
+    """
+    The process-wide RuleSet. The file's mtime is checked at most every
+    RULES_CHECK seconds; an edited file is compiled and swapped in, and a
+    broken or missing file keeps the previous rules (the first load raises).
+    """
+    global _rules, _rules_mtime, _rules_checked
+    if _rules is not None and time.monotonic() - _rules_checked < RULES_CHECK:
+        return _rules
+    with _rules_lock:
+        _rules_checked = time.monotonic()
+        try:
+            mtime = os.stat(RULES_PATH).st_mtime_ns
+            if _rules is not None and mtime == _rules_mtime:
+                return _rules
+            rules = load_rules(RULES_PATH)
+        except _LOAD_ERRORS as e:
+            if _rules is None:
+                raise
+            # mtime stays unrecorded for a vanished file, so it's read again once back
+            logger.warning("Keeping previous risk rules, %s is invalid: %s", RULES_PATH, e)
+            if not isinstance(e, OSError):
+                _rules_mtime = mtime
+            return _rules
+
+        if _rules is not None:
+            logger.info("Risk rules reloaded: %d rules (%s)", len(rules), rules.checksum)
+        _rules, _rules_mtime = rules, mtime
+        return _rules
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m drift_analysis.risk_rules [rules.json]: validate + summarize
+    rule_set = load_rules(sys.argv[1] if len(sys.argv) > 1 else RULES_PATH)
+    print(f"✅ {rule_set.source}: {len(rule_set)} rules ({rule_set.checksum})")
+    for rule in rule_set.rules:
+        effect = f"x{rule['multiply']}" if "multiply" in rule else f"+{rule.get('points', 0)}/{rule['per']}"
+        print(f"   - {rule['flag']:<22} {effect:<10} match={rule['match']} require={rule['require']}")
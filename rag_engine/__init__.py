@@ -1,10 +1,14 @@
 # rag_engine/__init__.py
 from .rag_engine import GhostRAG
 from .rag_pipeline import analyze_query
+from .registry import EngineRegistry, get_registry, get_risk_engine
 from .explanation import RiskLevel, generate_explanation
 
 __version__ = "1.0.0"
 __all__ = ["GhostRAG",
     "analyze_query",
+    "EngineRegistry",
+    "get_registry",
+    "get_risk_engine",
     "RiskLevel",
     "generate_explanation"]
\ No newline at end of file
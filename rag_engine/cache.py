@@ -0,0 +1,229 @@
+# rag_engine/cache.py
+"""
+Query result cache: in-process LRU + TTL, optionally backed by a shared store
+so several API workers share hits.
+
+Keys include the dataset's index generation, so every ingestion invalidates
+old entries automatically (they are simply never asked for again and age out).
+
+    GHOSTTRACE_CACHE_SIZE     max in-process entries (default 10000, 0 disables)
+    GHOSTTRACE_CACHE_TTL      seconds an entry stays valid (default 300)
+    GHOSTTRACE_CACHE_SHARED   "memory" or "sqlite:///path/to/cache.db" (default: none)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a query."""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+def cache_key(namespace: str, query: str, top_k: int,
+              dataset_id: Optional[str], generation: Optional[str],
+              filters: Optional[Dict] = None, answer: Optional[Dict] = None) -> str:
+    parts = [namespace, normalize_query(query), top_k, dataset_id or "default", generation]
+    if filters:
+        parts.append(filters)
+    if answer:
+        parts.append(answer)
+    raw = json.dumps(parts, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# ---------------- SHARED BACKENDS ----------------
+class CacheBackend(ABC):
+    """Shared second-level store. Values must be JSON-serializable."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """The live value for `key`, or None."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store `value` for `ttl` seconds."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Local stand-in for a shared store (single process, tests, dev)."""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, payload = item
+            if expires < time.time():
+                del self._data[key]
+                return None
+            return json.loads(payload)
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, json.dumps(value))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite file shared by every worker on the box (WAL mode)."""
+
+    PURGE_EVERY = 1000  # sets between sweeps of expired rows
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM query_cache WHERE key = ? AND expires >= ?",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO query_cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+        self._sets += 1
+        if self._sets % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM query_cache WHERE expires < ?", (time.time(),))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM query_cache")
+
+
+def backend_from_url(url: Optional[str]) -> Optional[CacheBackend]:
+    if not url:
+        return None
+    if url == "memory":
+        return MemoryCacheBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteCacheBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported cache backend '{url}' (use 'memory' or 'sqlite:///path')")
+
+
+# ---------------- LRU + TTL ----------------
+class QueryCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0,
+                 shared: Optional[CacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                expires, value = item
+                if expires >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._stats["expired"] += 1
+
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self._put(key, value)
+                with self._lock:
+                    self._stats["shared_hits"] += 1
+                return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._put(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, self.ttl)
+
+    def _put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries), max_entries=self.max_entries, ttl=self.ttl)
+        lookups = stats["hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["shared_hits"]) / lookups, 4) if lookups else 0.0
+        stats["shared"] = type(self.shared).__name__ if self.shared else None
+        return stats
+
+
+_cache: Optional[QueryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> QueryCache:
+    """Process-wide cache configured from GHOSTTRACE_CACHE_* env vars."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryCache(
+                    max_entries=int(os.getenv("GHOSTTRACE_CACHE_SIZE", 10000)),
+                    ttl=float(os.getenv("GHOSTTRACE_CACHE_TTL", 300)),
+                    shared=backend_from_url(os.getenv("GHOSTTRACE_CACHE_SHARED")),
+                )
+    return _cache
@@ -6,7 +6,9 @@ Role 4: Risk Analysis → Human-readable explanations for developers.
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
-from collections import Counter
+
+from drift_analysis.ghost_scoring import GhostTraceRiskEngine
+from rag_engine.registry import get_registry, get_risk_engine
 
 
 class RiskLevel(Enum):
@@ -24,10 +26,13 @@ class RiskAssessment:
     explanation: str  # Single paragraph for devs
 
 
-def calculate_risk(results: List[Dict]) -> RiskAssessment:
+def calculate_risk(results: List[Dict], engine: Optional[GhostTraceRiskEngine] = None) -> RiskAssessment:
     """
     Convert RAG results → structured risk assessment.
 
+    Scored by the same rule set as /audit (drift_analysis/risk_rules.json);
+    `engine` defaults to the one of the default dataset.
+
     Args:
         results: List from GhostRAG.search() with file, version, deprecated, doc_type
 
@@ -38,66 +43,36 @@ def calculate_risk(results: List[Dict]) -> RiskAssessment:
         ...
     ]
     """
-    score = 0
-    reasons = []
-    recommendations = []
+    if engine is None:
+        engine = get_risk_engine(get_registry().get())
+    risk = engine.compute_risk(results)
 
-    # 1. Group by doc_type for domain-specific analysis
-    by_domain = {}
-    for r in results:
-        domain = r["doc_type"]
-        by_domain.setdefault(domain, []).append(r)
-
-    # 2. Analyze each domain
-    for domain, docs in by_domain.items():
-        # Critical domains = higher weight
-        weight = 1.4 if domain in {"payment_api", "auth_api", "sdk"} else 1.0
-
-        # DEPRECATED docs = highest penalty
-        deprecated_docs = [d for d in docs if d["deprecated"]]
-        if deprecated_docs:
-            count = len(deprecated_docs)
-            score += 35 * weight * count
-            bad_files = ", ".join([d["file"] for d in deprecated_docs[:2]])
-            reasons.append(f"🚨 DEPRECATED {domain.upper()} used ({count}/{len(docs)} docs): {bad_files}")
-            recommendations.append("Archive deprecated docs from RAG index")
-
-        # OLD VERSION (non-deprecated but not latest)
-        active_versions = [d["version"] for d in docs if not d["deprecated"]]
-        if active_versions:
-            latest_in_results = max(active_versions)
-            if latest_in_results != "3.0":
-                score += 18 * weight
-                reasons.append(f"⚠️ Oldest version {min(active_versions)} in {domain} (latest expected: 3.0)")
-                recommendations.append(f"Prioritize v{latest_in_results} docs in retrieval")
-
-        # DOMAIN IMPACT multiplier
-        if domain in {"payment_api", "auth_api", "security_protocols"}:
-            reasons.append(f"🔥 HIGH IMPACT DOMAIN: {domain}")
-            score *= 1.2  # Final multiplier
-
-    # 3. Cap score and map to levels
-    score = min(int(score), 100)
-
-    if score <= 20:
-        level = RiskLevel.LOW
-    elif score <= 55:
-        level = RiskLevel.MEDIUM
-    else:
-        level = RiskLevel.HIGH
-
-    # 4. Generate explanation paragraph
-    explanation = _generate_explanation(level, reasons, recommendations, results)
+    # Several chunks of one file count as one document
+    results = _unique_by_file(results)
+    level = RiskLevel(risk["level"])
+    recommendations = risk["recommendations"]
+    explanation = _generate_explanation(level, risk["reasons"], recommendations, results)
 
     return RiskAssessment(
-        score=score,
+        score=risk["score"],
         level=level,
-        reasons=reasons,
+        reasons=risk["reasons"],
         recommendations=recommendations,
         explanation=explanation
     )
 
 
+def _unique_by_file(results: List[Dict]) -> List[Dict]:
+    """Keep the best-ranked chunk per source file."""
+    seen = set()
+    unique = []
+    for r in results:
+        if r["file"] not in seen:
+            seen.add(r["file"])
+            unique.append(r)
+    return unique
+
+
 def _generate_explanation(
         level: RiskLevel,
         reasons: List[str],
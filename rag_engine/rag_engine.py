@@ -1,11 +1,45 @@
 # rag_engine/rag_engine.py
-import json
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 
 import faiss
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from drift_analysis.attribution import ShingleIndex, attribute, cosine, shingles, split_sentences
+from drift_analysis.ghost_identifiers import IdentifierIndex
+from drift_analysis.risk_facts import RiskFacts
+from vector_store.backends import prepare_vectors, open_index, resolve_params, search_refined, shard_paths
+from vector_store.bm25_index import BM25Index
+from vector_store.doc_store import DocStore
+from vector_store.filters import IdFilter, as_filter
+from vector_store.fusion import fuse, relevance
+from vector_store.manifest import read_manifest, artifact_path, check_index, check_texts, check_bm25
+from vector_store.text_store import TextStore
+from vector_store.embedders import SentenceEmbedder, encode_queries, load_embedder
+
+# measured cost of one term -> column entry in the vectorizer's vocabulary dict
+VOCAB_ENTRY_BYTES = 130
+
+# vector | bm25 | hybrid (vector + BM25 fused). "score" is an L2 distance
+# (lower = better) for vector, a BM25 / fused score (higher = better) otherwise,
+# so /audit clients see the change: bm25 and hybrid are opt-in.
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
+RETRIEVAL = os.getenv("GHOSTTRACE_RETRIEVAL", "vector")
+FUSION = os.getenv("GHOSTTRACE_FUSION", "rrf")                        # rrf | weighted
+FUSION_WEIGHT = float(os.getenv("GHOSTTRACE_FUSION_WEIGHT", 0.5))   # vector share for weighted
+
+# none | version (oversample, demote deprecated / older-version chunks by the
+# risk facts' priors; "score" is then relevance + prior, higher = better)
+RERANK_MODES = ("none", "version")
+RERANK = os.getenv("GHOSTTRACE_RERANK", "none")
+
+# compiled metadata filters (id bitmaps) kept per engine
+FILTER_CACHE_SIZE = 64
+
 
 class GhostRAG:
     """Role 4 core: RAG retrieval + metadata access."""
@@ -13,13 +47,30 @@ class GhostRAG:
     def __init__(self, data_dir: str = "data_ingestion"):
         self.data_dir = Path(data_dir)
         self.index_path = self.data_dir / "faiss.index"
-        self.meta_path = self.data_dir / "vector_metadata.json"
-        self.text_path = self.data_dir / "vector_texts.json"
+        self.index_files: List[Path] = []
+        self.docs_path = self.data_dir / "documents.db"
+        self.text_path = self.data_dir / "vector_texts.bin"
+        self.vectorizer_path = self.data_dir / "tfidf_vectorizer.bin"
+        self.manifest_path = self.data_dir / "index_manifest.json"
 
-        self.vectorizer = TfidfVectorizer(stop_words="english", max_features=2048)
-        self.texts: List[str] = []
-        self.metadata: List[Dict] = []
+        self.vectorizer: Union[TfidfVectorizer, SentenceEmbedder] = TfidfVectorizer(
+            stop_words="english", max_features=2048
+        )
+        self.texts: Sequence[str] = []
+        self.docs: Optional[DocStore] = None
         self.index: Optional[faiss.Index] = None
+        self.bm25: Optional[BM25Index] = None
+        self.facts: Optional[RiskFacts] = None
+        self.shingles: Optional[ShingleIndex] = None
+        self.identifiers: Optional[IdentifierIndex] = None
+        self.retrieval = RETRIEVAL
+        self.rerank = RERANK
+        self._filters: "OrderedDict[tuple, IdFilter]" = OrderedDict()
+        self._filters_lock = threading.Lock()
+        self.backend = "faiss"
+        self.index_type = "flat"
+        self.refine = 0           # exact re-ranking depth factor over lossy codes
+        self.generation: Optional[str] = None
         self._loaded = False
 
     def load(self) -> None:
@@ -27,43 +78,255 @@ class GhostRAG:
         if self._loaded:
             return
 
-        if not self.index_path.exists():
+        manifest = read_manifest(self.manifest_path)
+        self.backend = manifest["index"]["backend"]
+        self.generation = manifest["generation"]
+        self.index_path = self.data_dir / manifest["index"]["path"]
+        self.index_type = manifest["index"].get("type", "flat")
+        self.index_files = [Path(p) for p in shard_paths(str(self.index_path), manifest["index"]["shards"])]
+
+        if not all(p.exists() for p in self.index_files):
             raise FileNotFoundError(f"❌ Run `python data_ingestion/run_metadata.py` first")
 
-        self.index = faiss.read_index(str(self.index_path))
+        # memory-mapped, read-only: workers on one box share the index pages
+        self.index = open_index(
+            self.backend, str(self.index_path), self.index_type,
+            manifest["index"].get("params"), mmap=True, n_shards=len(self.index_files),
+        )
+        self.refine = resolve_params(self.index_type, manifest["index"].get("params")).get("refine", 0)
+        check_index(manifest, self.index)
 
-        with open(self.meta_path, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        # metadata rows and texts are fetched per hit, keyed by vector id
+        self.docs_path = self.data_dir / manifest["docs"]["path"]
+        self.docs = DocStore(self.docs_path)
+        self.text_path = self.data_dir / manifest["texts"]["path"]
+        self.texts = TextStore(str(self.text_path))
+        check_texts(manifest, self.texts)
+        self.bm25 = BM25Index.load(self.data_dir / manifest["bm25"]["path"])
+        check_bm25(manifest, self.bm25)
 
-        with open(self.text_path, "r", encoding="utf-8") as f:
-            self.texts = json.load(f)
+        # derived artifacts of this generation, read now: the next ingestion prunes them
+        # re-ranking priors; without them rerank="version" is a no-op
+        facts_path = Path(artifact_path(self.data_dir, manifest, "facts"))
+        self.facts = RiskFacts.load(facts_path) if facts_path.exists() else None
+        # answer attribution; without it candidate shingles are computed per call
+        shingles_path = Path(artifact_path(self.data_dir, manifest, "shingles"))
+        self.shingles = ShingleIndex.load(shingles_path) if shingles_path.exists() else None
+        # ghost identifiers for the risk engine (see registry.get_risk_engine)
+        identifiers_path = Path(artifact_path(self.data_dir, manifest, "identifiers"))
+        self.identifiers = IdentifierIndex.load(identifiers_path) if identifiers_path.exists() else None
 
-        # Rebuild vectorizer vocab
-        self.vectorizer.fit(self.texts)
+        # Fitted vocab + IDF (or the sentence model spec) persisted at ingestion time (no refit)
+        self.vectorizer_path = self.data_dir / manifest["vectorizer"]["path"]
+        # (sentence embeddings of candidates for exact re-ranking come from the ingestion cache)
+        cache_path = self.data_dir / "embedding_cache.db"
+        self.vectorizer = load_embedder(
+            manifest["vectorizer"].get("kind", "tfidf"),
+            self.vectorizer_path,
+            expected_checksum=manifest["vectorizer"]["checksum"],
+            cache_path=cache_path if cache_path.exists() else None,
+        )
         self._loaded = True
         print(f"✅ Loaded {self.index.ntotal} vectors")
 
-    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+    def memory_footprint(self) -> int:
+        """
+        Estimated bytes this engine holds once warm: the mapped index (every
+        search touches all of it for flat indexes) + the in-heap vocabulary
+        (or sentence model weights). Texts and metadata rows are read per hit
+        and not counted.
+        """
+        if not self._loaded:
+            return 0
+        index_bytes = sum(p.stat().st_size for p in self.index_files) + self.bm25.nbytes()
+        if self.facts is not None:
+            index_bytes += self.facts.nbytes()
+        if self.shingles is not None:
+            index_bytes += self.shingles.nbytes()
+        index_bytes += sum(f.bits.nbytes for f in list(self._filters.values()))
+        n_terms = len(self.bm25.vocabulary)
+        if isinstance(self.vectorizer, SentenceEmbedder):
+            index_bytes += self.vectorizer.nbytes()
+        else:
+            n_terms += len(self.vectorizer.vocabulary_)
+        return index_bytes + VOCAB_ENTRY_BYTES * n_terms
+
+    def search(self, query: str, top_k: int = 3, mode: Optional[str] = None,
+               rerank: Optional[str] = None, filters=None) -> List[Dict]:
         """Semantic search + metadata."""
+        return self.search_batch([query], top_k=top_k, mode=mode, rerank=rerank, filters=filters)[0]
+
+    def search_batch(self, queries: List[str], top_k: int = 3, mode: Optional[str] = None,
+                     rerank: Optional[str] = None, filters=None) -> List[List[Dict]]:
+        """One vectorizer call + one index search for a whole list of queries.
+
+        mode: vector | bm25 | hybrid (default: GHOSTTRACE_RETRIEVAL).
+        rerank: none | version (default: GHOSTTRACE_RERANK).
+        filters: SearchFilter or {"doc_types", "min_version", "max_version",
+        "exclude_deprecated"}, applied inside the index search (see filters.py).
+        """
+        if not self._loaded:
+            self.load()
+        if not queries:
+            return []
+        mode = mode or self.retrieval
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}' (expected one of {RETRIEVAL_MODES})")
+        rerank = rerank or self.rerank
+        if rerank not in RERANK_MODES:
+            raise ValueError(f"Unknown rerank mode '{rerank}' (expected one of {RERANK_MODES})")
+        reranking = rerank == "version" and self.facts is not None
+        id_filter = self._id_filter(filters)
+
+        # re-ranking and fusion reorder, so they start from deeper candidate lists
+        want = max(4 * top_k, 20) if reranking else top_k
+        depth = want if mode != "hybrid" else max(2 * want, 10)
+        ranked = [[] for _ in queries]
+        if mode != "bm25":
+            q_vecs = prepare_vectors(self.backend, encode_queries(self.vectorizer, queries))
+            distances, indices = search_refined(
+                self.index, q_vecs, depth, self.refine, self._encode_ids, id_filter
+            )
+            ranked = [
+                [(int(doc_id), float(dist)) for dist, doc_id in zip(row_d, row_i) if doc_id >= 0]
+                for row_d, row_i in zip(distances, indices)
+            ]
+        if mode != "vector":
+            lexical = [
+                list(zip(ids.tolist(), scores.tolist()))
+                for scores, ids in self.bm25.search_batch(queries, depth, id_filter)
+            ]
+            if mode == "bm25":
+                ranked = lexical
+            else:
+                ranked = [
+                    fuse(vector_hits, bm25_hits, FUSION, FUSION_WEIGHT)[:want]
+                    for vector_hits, bm25_hits in zip(ranked, lexical)
+                ]
+
+        # (doc_id, score, current equivalent id or None)
+        if reranking:
+            ranked = [self.facts.rerank(relevance(hits, mode), top_k) for hits in ranked]
+        else:
+            ranked = [[(doc_id, score, None) for doc_id, score in hits] for hits in ranked]
+
+        # one metadata query for every hit (and current equivalent) of the batch
+        wanted = [doc_id for hits in ranked for doc_id, _, _ in hits]
+        wanted += [current for hits in ranked for _, _, current in hits if current is not None]
+        metas = self.docs.get_chunks(wanted)
+
+        return [
+            [
+                self._result(rank, score, doc_id, metas[doc_id], self._current(current, metas))
+                for rank, (doc_id, score, current) in enumerate(hits, 1)
+                if doc_id in metas  # removed since this generation
+            ]
+            for hits in ranked
+        ]
+
+    def attribute(self, answer: str, results: List[Dict],
+                  cited_chunk_ids: Sequence[str] = ()) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Match each sentence of `answer` to its closest candidate chunk: the
+        search `results` plus the chunks in `cited_chunk_ids` (cited chunks
+        that weren't retrieved come back with rank 0).
+
+        Returns (one attribution per sentence, the attributed candidates in
+        rank order) – see drift_analysis/attribution.py.
+        """
         if not self._loaded:
             self.load()
+        candidates = list(results)
+        if cited_chunk_ids:
+            seen = {r["id"] for r in candidates}
+            cited = self.docs.find_chunks(cited_chunk_ids)
+            candidates += [self._result(0, 0.0, doc_id, meta) for doc_id, meta in sorted(cited.items())
+                           if doc_id not in seen]
+        sentences = split_sentences(answer)
+        if not sentences:
+            return [], []
 
-        q_vec = self.vectorizer.transform([query]).toarray().astype("float32")
-        distances, indices = self.index.search(q_vec, top_k)
-
-        results = []
-        for i, idx in enumerate(indices[0]):
-            results.append({
-                "rank": i + 1,
-                "score": float(distances[0][i]),
-                "file": self.metadata[idx]["file"],
-                "version": self.metadata[idx]["version"],
-                "deprecated": self.metadata[idx]["deprecated"],
-                "doc_type": self.metadata[idx]["doc_type"],
-                "snippet": self.texts[idx][:250] + "...",
-                "path": self.metadata[idx]["path"]
+        ids = np.array([r["id"] for r in candidates], dtype=np.int64)
+        if len(ids):
+            similarity = cosine(encode_queries(self.vectorizer, sentences), self._encode_ids(ids))
+        else:
+            similarity = np.zeros((len(sentences), 0), dtype=np.float32)
+        index = self.shingles
+        if index is None:
+            index = ShingleIndex.build((int(doc_id), self.texts[int(doc_id)]) for doc_id in ids)
+        overlap = index.overlap([shingles(s) for s in sentences], ids)
+
+        attribution, used = [], set()
+        for sentence, match in zip(sentences, attribute(similarity, overlap)):
+            j = match.pop("candidate")
+            source = candidates[j] if j is not None else None
+            if j is not None:
+                used.add(j)
+            attribution.append({
+                "sentence": sentence,
+                "id": source["id"] if source else None,
+                "chunk_id": source["chunk_id"] if source else None,
+                "file": source["file"] if source else None,
+                "deprecated": source["deprecated"] if source else None,
+                **match,
             })
-        return results
+        return attribution, [candidates[j] for j in sorted(used)]
+
+    def _encode_ids(self, ids):
+        """Full-precision vectors of stored chunks, re-encoded from their texts."""
+        return self.vectorizer.transform(self.texts[int(doc_id)] for doc_id in ids)
+
+    def _id_filter(self, filters) -> Optional[IdFilter]:
+        """Compiled id bitmap for `filters`, cached per distinct filter."""
+        search_filter = as_filter(filters)
+        if search_filter is None:
+            return None
+        if self.facts is None:
+            raise ValueError("Filtered search needs risk_facts.npz; re-run ingestion")
+
+        with self._filters_lock:
+            id_filter = self._filters.get(search_filter.key)
+            if id_filter is not None:
+                self._filters.move_to_end(search_filter.key)
+                return id_filter
+        id_filter = search_filter.compile(self.facts)
+        with self._filters_lock:
+            self._filters[search_filter.key] = id_filter
+            while len(self._filters) > FILTER_CACHE_SIZE:
+                self._filters.popitem(last=False)
+        return id_filter
+
+    @staticmethod
+    def _current(doc_id: Optional[int], metas: Dict[int, Dict]) -> Optional[Dict]:
+        """Newest non-deprecated chunk standing in for a stale hit."""
+        if doc_id is None or doc_id not in metas:
+            return None
+        meta = metas[doc_id]
+        return {
+            "id": doc_id,
+            "file": meta["file"],
+            "version": meta["version"],
+            "doc_type": meta["doc_type"],
+            "chunk_id": meta.get("chunk_id"),
+            "section": meta.get("section"),
+        }
+
+    def _result(self, rank: int, score: float, doc_id: int, meta: Dict,
+                current: Optional[Dict] = None) -> Dict:
+        return {
+            "id": doc_id,
+            "rank": rank,
+            "score": score,
+            "file": meta["file"],
+            "version": meta["version"],
+            "deprecated": meta["deprecated"],
+            "doc_type": meta["doc_type"],
+            "snippet": self.texts[doc_id][:250] + "...",
+            "path": meta["path"],
+            "chunk_id": meta.get("chunk_id"),
+            "section": meta.get("section"),
+            "current_equivalent": current,
+        }
 
     class GhostRAG:
         def __init__(self):
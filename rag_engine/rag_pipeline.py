@@ -1,17 +1,31 @@
 # In rag_pipeline.py
-from rag_engine import GhostRAG
+from typing import Optional
+
+from rag_engine.registry import get_registry, get_risk_engine
+from rag_engine.cache import cache_key, get_cache
 from rag_engine.explanation import calculate_risk, format_for_ui
 
 
-def analyze_query(query: str):
-    rag = GhostRAG()
-    results = rag.search(query)
-    risk = calculate_risk(results)
-    return {
+def analyze_query(query: str, top_k: int = 3, dataset_id: Optional[str] = None):
+    # engine is loaded once per process and hot-swapped after ingestion
+    rag = get_registry().get(dataset_id)
+    engine = get_risk_engine(rag)
+
+    cache = get_cache()
+    key = cache_key("analyze", query, top_k, dataset_id, f"{rag.generation}:{engine.rules.checksum}")
+    cached = cache.get(key)
+    if cached is not None:
+        return dict(cached, query=query)
+
+    results = rag.search(query, top_k=top_k)
+    risk = calculate_risk(results, engine)
+    result = {
         "query": query,
         "documents": results,
         "risk_assessment": format_for_ui(risk)
     }
+    cache.set(key, result)
+    return result
 
 def pretty_print(result: dict):
     print("\n🧠 GHOSTTRACE ANALYSIS")
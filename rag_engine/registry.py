@@ -0,0 +1,271 @@
+# rag_engine/registry.py
+"""
+Process-wide registry of loaded GhostRAG engines (one per dataset).
+
+Each dataset is loaded once and shared by every thread / asyncio task.
+When ingestion writes a new index generation (index_manifest.json), the
+registry loads it in the background and swaps the reference atomically;
+queries already running keep using the engine they grabbed.
+
+Datasets are loaded lazily on first use. With a memory budget
+(GHOSTTRACE_MEMORY_BUDGET_MB), the least recently used datasets are
+unloaded once the estimated footprint of everything loaded exceeds it.
+
+get_risk_engine() pairs each loaded engine with the GhostTraceRiskEngine of
+its generation, so /audit, analyze_query and the dashboard score alike.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from drift_analysis.ghost_scoring import GhostTraceRiskEngine
+
+from .rag_engine import GhostRAG
+
+DEFAULT_DATA_DIR = "data_ingestion"
+DATASET_ID = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+class InvalidDatasetId(ValueError):
+    """The caller's dataset_id can't name a dataset directory (a client error, unlike stale artifacts)."""
+
+
+class DatasetNotFound(FileNotFoundError):
+    """The dataset has no index manifest: never ingested (a missing file of an ingested dataset is corruption)."""
+
+
+class _Slot:
+    """Current engine of one dataset + hot-swap bookkeeping."""
+
+    def __init__(self, key: str, data_dir: Path):
+        self.key = key
+        self.data_dir = data_dir
+        self.manifest_path = data_dir / "index_manifest.json"
+        self.engine: Optional[GhostRAG] = None
+        self.manifest_mtime: Optional[int] = None
+        self.last_check = 0.0
+        self.load_lock = threading.Lock()
+        self.reloading = False
+        self.footprint = 0  # estimated bytes of the loaded engine
+
+
+class EngineRegistry:
+    def __init__(
+        self,
+        data_dir: str = DEFAULT_DATA_DIR,
+        check_interval: float = 1.0,
+        memory_budget: Optional[int] = None,
+    ):
+        self.data_dir = Path(data_dir)
+        self.check_interval = check_interval
+        self.memory_budget = memory_budget  # bytes; None = never unload
+        self._slots: Dict[str, _Slot] = {}
+        self._lru: "OrderedDict[str, _Slot]" = OrderedDict()  # loaded slots, oldest use first
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def dataset_dir(self, dataset_id: Optional[str]) -> Path:
+        """None/"default" -> data_ingestion/, others -> data_ingestion/datasets/<id>/"""
+        if dataset_id in (None, "", "default"):
+            return self.data_dir
+        if not DATASET_ID.match(dataset_id):
+            raise InvalidDatasetId(f"Invalid dataset_id '{dataset_id}'")
+        return self.data_dir / "datasets" / dataset_id
+
+    # ---------------- ACCESS ----------------
+    def get(self, dataset_id: Optional[str] = None) -> GhostRAG:
+        """Return the loaded engine for a dataset; blocks only on first load."""
+        slot = self._slot(dataset_id)
+
+        engine = slot.engine
+        if engine is None:
+            with slot.load_lock:
+                try:
+                    engine = slot.engine or self._load(slot)
+                except DatasetNotFound:
+                    with self._lock:  # don't keep slots for datasets that don't exist
+                        self._slots.pop(slot.key, None)
+                    raise
+            return engine
+
+        self._maybe_reload(slot)
+        with self._lock:
+            if slot.key in self._lru:
+                self._lru.move_to_end(slot.key)
+        return engine
+
+    async def aget(self, dataset_id: Optional[str] = None) -> GhostRAG:
+        """asyncio variant: the first (blocking) load runs in a worker thread."""
+        slot = self._slot(dataset_id)
+        if slot.engine is None:
+            return await asyncio.to_thread(self.get, dataset_id)
+        return self.get(dataset_id)
+
+    def generation(self, dataset_id: Optional[str] = None) -> Optional[str]:
+        return self.get(dataset_id).generation
+
+    def loaded(self) -> Dict[str, Optional[str]]:
+        """dataset key -> generation currently served."""
+        return {
+            key: slot.engine.generation
+            for key, slot in list(self._slots.items())
+            if slot.engine is not None
+        }
+
+    def stats(self) -> Dict:
+        """Loaded datasets (least recently used first) against the memory budget."""
+        with self._lock:
+            loaded = [(key, slot.footprint) for key, slot in self._lru.items()]
+        return {
+            "loaded": [{"dataset": key, "bytes": size} for key, size in loaded],
+            "used_bytes": sum(size for _, size in loaded),
+            "budget_bytes": self.memory_budget,
+            "evictions": self.evictions,
+        }
+
+    def evict(self, dataset_id: Optional[str] = None) -> bool:
+        """Unload a dataset; the next request loads it again."""
+        with self._lock:
+            slot = self._lru.pop(dataset_id or "default", None)
+            if slot is not None:
+                self._unload(slot)
+        return slot is not None
+
+    # ---------------- INTERNALS ----------------
+    def _slot(self, dataset_id: Optional[str]) -> _Slot:
+        key = dataset_id or "default"
+        slot = self._slots.get(key)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.setdefault(key, _Slot(key, self.dataset_dir(dataset_id)))
+        return slot
+
+    def _load(self, slot: _Slot) -> GhostRAG:
+        try:
+            mtime = os.stat(slot.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            raise DatasetNotFound(f"Dataset '{slot.key}' is not ingested ({slot.manifest_path} is missing)") from None
+        engine = GhostRAG(str(slot.data_dir))
+        engine.load()
+        slot.engine = engine  # single reference swap: atomic for readers
+        slot.manifest_mtime = mtime
+        slot.last_check = time.monotonic()
+
+        with self._lock:
+            slot.footprint = engine.memory_footprint()
+            self._lru[slot.key] = slot
+            self._lru.move_to_end(slot.key)
+            self._enforce_budget()
+        return engine
+
+    def _enforce_budget(self) -> None:
+        """Unload least recently used datasets until the rest fit (caller holds _lock).
+
+        The most recent dataset always stays, even if it alone is over budget.
+        """
+        if self.memory_budget is None:
+            return
+        used = sum(slot.footprint for slot in self._lru.values())
+        while used > self.memory_budget and len(self._lru) > 1:
+            _, victim = self._lru.popitem(last=False)
+            used -= victim.footprint
+            self._unload(victim)
+            self.evictions += 1
+            print(f"♻️ Unloaded dataset '{victim.key}' (memory budget {self.memory_budget / (1 << 20):.1f} MB)")
+
+    @staticmethod
+    def _unload(slot: _Slot) -> None:
+        # queries still holding the engine finish on it; it's freed after them
+        slot.engine = None
+        slot.footprint = 0
+        slot.manifest_mtime = None
+
+    def _maybe_reload(self, slot: _Slot) -> None:
+        now = time.monotonic()
+        if slot.reloading or now - slot.last_check < self.check_interval or slot.engine is None:
+            return
+        slot.last_check = now
+
+        try:
+            mtime = os.stat(slot.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == slot.manifest_mtime:
+            return
+
+        try:
+            with open(slot.manifest_path, "r", encoding="utf-8") as f:
+                generation = json.load(f).get("generation")
+        except (OSError, ValueError):
+            return  # manifest mid-write; look again next interval
+        engine = slot.engine
+        if engine is None or generation == engine.generation:
+            slot.manifest_mtime = mtime
+            return
+
+        slot.reloading = True
+        threading.Thread(target=self._reload, args=(slot,), daemon=True).start()
+
+    def _reload(self, slot: _Slot) -> None:
+        try:
+            with slot.load_lock:
+                if slot.engine is None:
+                    return  # unloaded meanwhile; the next get() loads the new generation
+                old = slot.engine.generation
+                self._load(slot)
+                print(f"🔄 Hot-swapped {slot.data_dir}: {old} → {slot.engine.generation}")
+        except (OSError, ValueError, KeyError) as e:
+            # keep serving the previous generation; retry on the next check
+            print(f"⚠️ Reload of {slot.data_dir} failed, keeping current index: {e}")
+        finally:
+            slot.reloading = False
+
+
+_registry: Optional[EngineRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> EngineRegistry:
+    """The process-wide registry, created on first use.
+
+    GHOSTTRACE_MEMORY_BUDGET_MB caps the estimated memory of loaded datasets
+    (default: unlimited).
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                budget_mb = os.getenv("GHOSTTRACE_MEMORY_BUDGET_MB")
+                _registry = EngineRegistry(
+                    memory_budget=int(float(budget_mb) * (1 << 20)) if budget_mb else None
+                )
+    return _registry
+
+
+# loaded GhostRAG -> risk engine built from that generation's risk facts; weak
+# keys, so hot swaps and registry evictions drop the risk engine with the index
+_risk_engines: "weakref.WeakKeyDictionary[GhostRAG, GhostTraceRiskEngine]" = weakref.WeakKeyDictionary()
+_risk_lock = threading.Lock()
+
+
+def get_risk_engine(rag: GhostRAG) -> GhostTraceRiskEngine:
+    """The risk engine for a loaded GhostRAG (scoring rules are shared, see risk_rules.py)."""
+    engine = _risk_engines.get(rag)
+    if engine is None:
+        with _risk_lock:
+            engine = _risk_engines.get(rag)
+            if engine is None:
+                # the artifacts GhostRAG loaded with its index, not whatever is on disk now
+                engine = GhostTraceRiskEngine(
+                    rag.data_dir / "documents.db", facts=rag.facts, identifiers=rag.identifiers,
+                )
+                _risk_engines[rag] = engine
+    return engine
@@ -0,0 +1,52 @@
+"""
+Shared fixtures: the repo root on sys.path (modules are imported as
+top-level packages, like `python -m ...` from the root) and small datasets
+ingested from the sample docs into a temp directory.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+SAMPLE_SOURCE = ROOT / "data_ingestion" / "sample_datasets"
+
+
+def run_ingestion(workdir: Path, dataset: str, *args: str) -> Path:
+    """python -m data_ingestion.run_metadata --dataset <dataset> ... with `workdir` as cwd."""
+    from data_ingestion import run_metadata
+
+    cwd, argv = os.getcwd(), sys.argv
+    os.chdir(workdir)
+    sys.argv = ["run_metadata", "--dataset", dataset, "--source", str(SAMPLE_SOURCE), "--workers", "1", *args]
+    try:
+        run_metadata.main()
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+    return workdir / "data_ingestion" / "datasets" / dataset
+
+
+@pytest.fixture(scope="session")
+def ingest(tmp_path_factory):
+    """ingest(dataset, *cli args) -> data dir; each (dataset, args) is built once per session."""
+    workdir = tmp_path_factory.mktemp("ghosttrace")
+    built = {}
+
+    def _ingest(dataset: str, *args: str) -> Path:
+        key = (dataset, args)
+        if key not in built:
+            built[key] = run_ingestion(workdir, dataset, *args)
+        return built[key]
+
+    return _ingest
+
+
+@pytest.fixture
+def reingest(tmp_path):
+    """reingest(dataset, *cli args) -> data dir; runs on every call, in this test's own directory."""
+    return lambda dataset, *args: run_ingestion(tmp_path, dataset, *args)
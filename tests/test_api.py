@@ -0,0 +1,206 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.server
+from api import rag_proxy
+from rag_engine import registry
+from rag_engine.rag_engine import GhostRAG
+
+
+@pytest.fixture(scope="module")
+def dataset(ingest):
+    return ingest("api")
+
+
+@pytest.fixture
+def client(dataset, monkeypatch):
+    # a registry rooted at the temp ingestion dir, so "api" is an ingested dataset
+    monkeypatch.setattr(registry, "_registry", registry.EngineRegistry(data_dir=str(dataset.parents[1])))
+    with TestClient(api.server.app) as test_client:
+        yield test_client
+
+
+def test_process_executor(dataset, monkeypatch):
+    monkeypatch.setattr(registry, "_registry", registry.EngineRegistry(data_dir=str(dataset.parents[1])))
+    monkeypatch.setattr(rag_proxy, "EXECUTOR_KIND", "process")
+    monkeypatch.setattr(rag_proxy, "WORKERS", 1)
+    with TestClient(api.server.app) as test_client:
+        response = test_client.post("/audit", json={"query": "how to charge a payment", "dataset_id": "api"})
+        assert response.status_code == 200
+
+
+def test_warm_up_failure_keeps_the_server_up(monkeypatch, caplog):
+    class Broken(registry.EngineRegistry):
+        def get(self, dataset_id=None):
+            raise ValueError("❌ Unsupported risk facts v9. Re-run ingestion.")
+
+    monkeypatch.setattr(registry, "_registry", Broken())
+    with TestClient(api.server.app) as test_client:
+        assert test_client.get("/health").status_code == 200
+    assert "Warm-up of dataset 'default' failed" in caplog.text
+
+
+def test_audit(client):
+    response = client.post("/audit", json={"query": "how to charge a payment", "dataset_id": "api", "top_k": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["risk_level"] in ("LOW", "MEDIUM", "HIGH")
+    assert 0 <= body["risk_score"] <= 100
+    assert len(body["evidence"]) == 3
+
+
+def test_invalid_dataset_id_is_a_client_error(client):
+    response = client.post("/audit", json={"query": "charge", "dataset_id": "../secrets"})
+    assert response.status_code == 400
+    assert "Invalid dataset_id" in response.json()["detail"]
+
+
+def test_unknown_dataset_is_not_found(client):
+    assert client.post("/audit", json={"query": "charge", "dataset_id": "missing"}).status_code == 404
+
+
+def test_missing_files_of_an_ingested_dataset_are_a_server_error(reingest, monkeypatch):
+    data_dir = reingest("corrupt")
+    (data_dir / "vector_texts.bin").unlink()
+    monkeypatch.setattr(registry, "_registry", registry.EngineRegistry(data_dir=str(data_dir.parents[1])))
+    with TestClient(api.server.app) as test_client:
+        response = test_client.post("/audit", json={"query": "charge", "dataset_id": "corrupt"})
+        assert response.status_code == 500
+        assert "not ingested" not in response.json()["detail"]
+
+        item = test_client.post("/audit/batch", json=[{"query": "charge", "dataset_id": "corrupt"}]).json()["items"][0]
+        assert item["error"].startswith("FileNotFoundError")
+
+
+def test_stale_artifacts_are_a_server_error(client, monkeypatch):
+    async def stale(request):
+        raise ValueError("❌ Unsupported risk facts v9. Re-run ingestion.")
+
+    monkeypatch.setattr(api.server, "call_rag_engine", stale)
+    response = client.post("/audit", json={"query": "charge", "dataset_id": "api"})
+    assert response.status_code == 500
+
+
+def test_request_validation(client):
+    assert client.post("/audit", json={"query": "charge", "top_k": 0}).status_code == 422
+    assert client.post("/audit", json={"query": "charge", "filters": {"min_version": "v2"}}).status_code == 422
+
+
+# ---------------- BATCH / STREAM ----------------
+BATCH = [
+    {"query": "how to charge a payment", "dataset_id": "api", "top_k": 3},
+    {"dataset_id": "api"},                                     # no query
+    {"query": "webhook retries", "dataset_id": "missing"},
+    {"query": "rate limits", "dataset_id": "api", "filters": {"doc_types": ["rate_limits"]}},
+]
+
+
+def test_audit_batch(client):
+    response = client.post("/audit/batch", json=BATCH)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["count"], body["errors"]) == (4, 2)
+    items = {item["index"]: item for item in body["items"]}
+    assert [items[i]["ok"] for i in range(4)] == [True, False, False, True]
+    assert "not ingested" in items[2]["error"]
+
+    single = client.post("/audit", json=BATCH[0]).json()
+    assert items[0]["result"]["risk_score"] == single["risk_score"]
+    assert [e["file"] for e in items[0]["result"]["evidence"]] == [e["file"] for e in single["evidence"]]
+
+
+def test_batch_searches_each_top_k_once(client, monkeypatch):
+    calls = []
+    search_batch = GhostRAG.search_batch
+
+    def spy(self, queries, top_k=3, **kwargs):
+        calls.append((len(queries), top_k))
+        return search_batch(self, queries, top_k=top_k, **kwargs)
+
+    monkeypatch.setattr(GhostRAG, "search_batch", spy)
+    queries = ["refund a charge", "rotate an api key", "retry a webhook"]
+    responses = rag_proxy.run_audit_batch(queries, [2, 6, 2], "api")
+    assert sorted(calls) == [(1, 6), (2, 2)]
+    assert [len(r["evidence"]) for r in responses] == [2, 6, 2]
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_audit_stream_ndjson(client):
+    response = client.post("/audit/stream", json=BATCH)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = {item["index"]: item for item in _ndjson(response)}
+    assert sorted(items) == [0, 1, 2, 3]
+    assert [items[i]["ok"] for i in range(4)] == [True, False, False, True]
+
+
+def test_audit_stream_ndjson_body_and_sse(client):
+    body = "\n".join([json.dumps(BATCH[0]), "{not json", json.dumps(BATCH[3])]) + "\n"
+    response = client.post(
+        "/audit/stream?format=sse", content=body, headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.split("\n\n") if line]
+    assert {e["index"]: e["ok"] for e in events} == {0: True, 1: False, 2: True}
+
+
+def test_audit_stream_answers_before_the_body_is_read(client, monkeypatch):
+    # one query per executor task and one task in flight: each result goes out once scored
+    monkeypatch.setattr(rag_proxy, "STREAM_CHUNK", 1)
+    monkeypatch.setattr(rag_proxy, "STREAM_WINDOW", 1)
+    chunks = [json.dumps(BATCH[0]).encode() + b"\n", json.dumps(BATCH[3]).encode() + b"\n"]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/audit/stream", "raw_path": b"/audit/stream", "root_path": "",
+        "query_string": b"", "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+    results = []
+
+    async def run():
+        first_result = asyncio.Event()
+        sent = 0
+
+        async def receive():
+            nonlocal sent
+            if sent == len(chunks):
+                await asyncio.Event().wait()  # no disconnect: cancelled once the response ends
+            if sent:  # the last line is only sent after a result came back
+                await asyncio.wait_for(first_result.wait(), timeout=10)
+            sent += 1
+            return {"type": "http.request", "body": chunks[sent - 1], "more_body": sent < len(chunks)}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                results.append(json.loads(message["body"]))
+                first_result.set()
+
+        await api.server.app(scope, receive, send)
+
+    asyncio.run(run())
+    assert [(r["index"], r["ok"]) for r in results] == [(0, True), (1, True)]
+
+
+def test_audit_stream_rejects_other_bodies(client):
+    assert client.post("/audit/stream", json={"query": "charge"}).status_code == 400
+    assert client.post("/audit/stream", content="not json").status_code == 400
+
+
+def test_audit_with_answer(client):
+    response = client.post("/audit", json={
+        "query": "how do I charge a card",
+        "dataset_id": "api",
+        "answer": "Send POST /charge with the card_number field. Bananas are yellow.",
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert [a["sentence"] for a in body["attribution"]] == [
+        "Send POST /charge with the card_number field.", "Bananas are yellow."]
+    assert body["attribution"][1]["id"] is None
+    assert {"post /charge", "card_number"} <= {g["identifier"] for g in body["ghost_identifiers"]}
@@ -0,0 +1,76 @@
+import json
+
+from drift_analysis.ghost_scoring import GhostTraceRiskEngine
+from rag_engine.rag_engine import GhostRAG
+from rag_engine.registry import get_risk_engine
+from vector_store.manifest import ARTIFACTS, artifact_path
+
+
+def _manifest(data_dir):
+    return json.loads((data_dir / "index_manifest.json").read_text())
+
+
+def _artifact_files(data_dir):
+    return sorted(
+        p.name for p in data_dir.iterdir()
+        if p.name.startswith(("risk_facts", "shingle_index", "identifier_index"))
+    )
+
+
+def test_manifest_lists_generation_artifacts(reingest):
+    data_dir = reingest("gen")
+    manifest = _manifest(data_dir)
+
+    assert set(manifest["artifacts"]) == set(ARTIFACTS)
+    for name in manifest["artifacts"].values():
+        assert manifest["generation"] in name
+        assert (data_dir / name).exists()
+    assert _artifact_files(data_dir) == sorted(manifest["artifacts"].values())
+
+
+def test_loaded_engine_keeps_its_generation(reingest):
+    data_dir = reingest("gen")
+    first = _manifest(data_dir)
+    rag = GhostRAG(str(data_dir))
+    rag.load()
+
+    reingest("gen", "--full")
+    second = _manifest(data_dir)
+    assert second["generation"] != first["generation"]
+    # the previous generation's files survive one re-ingestion
+    assert _artifact_files(data_dir) == sorted([*first["artifacts"].values(), *second["artifacts"].values()])
+
+    # a risk engine built later still scores with the artifacts loaded with the index
+    engine = get_risk_engine(rag)
+    assert engine.facts is rag.facts
+    assert engine.identifiers is rag.identifiers
+    assert len(engine.facts) == rag.index.ntotal
+
+    reingest("gen", "--full")
+    third = _manifest(data_dir)
+    assert _artifact_files(data_dir) == sorted([*second["artifacts"].values(), *third["artifacts"].values()])
+
+
+def test_noop_run_restores_a_missing_artifact(reingest):
+    data_dir = reingest("gen")
+    manifest = _manifest(data_dir)
+    shingles = data_dir / manifest["artifacts"]["shingles"]
+    shingles.unlink()
+
+    reingest("gen")
+    assert _manifest(data_dir)["generation"] == manifest["generation"]
+    assert shingles.exists()
+
+
+def test_risk_engine_reads_the_manifest_artifacts(reingest):
+    data_dir = reingest("gen")
+    manifest = _manifest(data_dir)
+    engine = GhostTraceRiskEngine(data_dir / "documents.db")
+
+    assert engine.facts_path == data_dir / manifest["artifacts"]["facts"]
+    assert engine.facts is not None and engine.identifiers is not None
+
+
+def test_legacy_manifest_falls_back_to_unsuffixed_names(tmp_path):
+    assert artifact_path(str(tmp_path), {"generation": "abc"}, "facts") == str(tmp_path / "risk_facts.npz")
+    assert artifact_path(str(tmp_path), None, "identifiers") == str(tmp_path / "identifier_index.json")
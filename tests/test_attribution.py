@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from drift_analysis.attribution import MIN_SCORE, ShingleIndex, attribute, shingles, split_sentences
+from rag_engine.rag_engine import GhostRAG
+
+CHUNKS = {
+    7: "Send POST /v3/payments/charge with a payment_method and an Idempotency-Key header.",
+    3: "The v1 endpoint POST /charge accepted raw card numbers and is deprecated.",
+    12: "Webhooks are signed with an HMAC of the raw request body.",
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return ShingleIndex.build(CHUNKS.items())
+
+
+def test_split_sentences():
+    assert split_sentences("First one. Second one!\n- a list item\n\n  ") == [
+        "First one.", "Second one!", "- a list item"]
+
+
+def test_shingles_are_stable_and_case_insensitive():
+    assert np.array_equal(shingles("Send POST now please"), shingles("send post NOW please"))
+    assert len(shingles("Send POST now please")) == 2
+    assert len(shingles("too short")) == 0
+
+
+def test_overlap(index):
+    sentences = [shingles(CHUNKS[3]), shingles("Nothing in common with any chunk at all"), shingles("hi")]
+    overlap = index.overlap(sentences, [3, 7, 99])
+    assert overlap.shape == (3, 3)
+    assert overlap[0, 0] == 1.0 and overlap[0, 1] == 0.0
+    assert not overlap[1:].any()
+    assert not overlap[:, 2].any()  # unknown id
+
+
+def test_save_load_round_trip(index, tmp_path):
+    index.save(tmp_path / "shingles.npz")
+    loaded = ShingleIndex.load(tmp_path / "shingles.npz")
+    assert loaded.ids.tolist() == [3, 7, 12]
+    for a, b in ((index.indptr, loaded.indptr), (index.hashes, loaded.hashes)):
+        assert np.array_equal(a, b)
+
+
+def test_attribute_threshold():
+    similarity = np.array([[0.9, 0.1], [0.1, 0.2]], dtype=np.float32)
+    overlap = np.array([[0.8, 0.0], [0.0, 0.0]], dtype=np.float32)
+    first, second = attribute(similarity, overlap)
+    assert first["candidate"] == 0 and first["score"] >= MIN_SCORE
+    assert second["candidate"] is None
+    assert attribute(np.zeros((1, 0)), np.zeros((1, 0)))[0]["candidate"] is None
+
+
+def test_answer_is_attributed_to_the_chunks_it_uses(ingest):
+    rag = GhostRAG(str(ingest("attribution")))
+    rag.load()
+    results = rag.search("charge a payment", top_k=5)
+    source = results[0]
+    answer = f"{rag.texts[source['id']]}\nBananas are yellow and grow in bunches."
+
+    attribution, used = rag.attribute(answer, results)
+    attributed = [a for a in attribution if a["id"] is not None]
+    assert attributed and {a["id"] for a in attributed} == {source["id"]}
+    assert attribution[-1]["id"] is None
+    assert [r["id"] for r in used] == [source["id"]]
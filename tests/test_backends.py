@@ -0,0 +1,77 @@
+import faiss
+import numpy as np
+import pytest
+
+from vector_store.backends import (
+    DEFAULT_REFINE, INDEX_TYPES, new_index, open_index, resolve_params, save_index, search_index,
+    search_refined, shard_paths, supports_remove,
+)
+from vector_store.sharded_index import ShardedIndex
+
+DIM = 32
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.random((400, DIM), dtype=np.float32)
+
+
+def _built(index_type, vectors, params=None, shards=1):
+    index = new_index("faiss", DIM, index_type, params, n_train=len(vectors), shards=shards)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add_with_ids(vectors, np.arange(len(vectors)))
+    return index
+
+
+def test_resolve_params():
+    assert resolve_params("ivf", {"nlist": 64, "m": 8}, n_train=400)["nlist"] == 10  # >= 39 points per list
+    assert "m" not in resolve_params("ivf", {"m": 8})
+    assert resolve_params("pq", {"pq_m": 16}, n_train=100, dim=24) == {"pq_m": 12, "pq_nbits": 6, "refine": DEFAULT_REFINE}
+    assert resolve_params("flat")["refine"] == 0
+    assert resolve_params("flat", {"storage": "int8"})["refine"] == DEFAULT_REFINE
+
+
+def test_unknown_names_are_rejected():
+    with pytest.raises(ValueError):
+        new_index("annoy", DIM)
+    with pytest.raises(ValueError):
+        new_index("faiss", DIM, "lsh")
+    with pytest.raises(ValueError):
+        new_index("sparse", DIM, "ivf")
+    with pytest.raises(ValueError):
+        new_index("faiss", DIM, "flat", {"storage": "int4"})
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_every_index_type_finds_exact_matches(index_type, vectors):
+    index = _built(index_type, vectors)
+    _, ids = search_refined(index, vectors[:5], 3, refine=4, encode=lambda ids: vectors[ids])
+    assert ids[:, 0].tolist() == list(range(5))
+    assert supports_remove("faiss", index_type) == (index_type != "hnsw")
+
+
+def test_refine_re_ranks_lossy_codes_exactly(vectors):
+    index = _built("flat", vectors, {"storage": "int8"})
+    distances, ids = search_refined(index, vectors[:3], 4, refine=4, encode=lambda ids: vectors[ids])
+    exact = ((vectors[:3, None] - vectors[ids]) ** 2).sum(axis=2)
+    assert np.allclose(distances, exact, atol=1e-4)
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf"])
+@pytest.mark.parametrize("shards", [1, 3])
+def test_save_open_round_trip(index_type, shards, vectors, tmp_path):
+    index = _built(index_type, vectors, shards=shards)
+    path = str(tmp_path / "faiss.index")
+    assert save_index("faiss", index, path) == shard_paths(path, shards)
+
+    loaded = open_index("faiss", path, index_type, mmap=True, n_shards=shards)
+    assert isinstance(loaded, ShardedIndex) == (shards > 1)
+    if shards > 1:
+        assert [source[1] for source in loaded.sources] == shard_paths(path, shards)
+    elif index_type == "ivf":
+        assert faiss.extract_index_ivf(loaded).nprobe == 8  # search knobs are re-applied on load
+    for a, b in zip(search_index(index, vectors[:5], 4), search_index(loaded, vectors[:5], 4)):
+        assert np.array_equal(a, b)
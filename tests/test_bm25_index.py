@@ -0,0 +1,65 @@
+import numpy as np
+
+from vector_store.bm25_index import BM25Index, tokenize
+from vector_store.filters import IdFilter
+
+TEXTS = [
+    "POST /v1/charge takes card_number and amount",
+    "POST /v3/payments/charge takes payment_method and an Idempotency-Key header",
+    "Webhooks deliver payment.succeeded events with a signature",
+    "Rate limits: 100 requests per minute per API key",
+    "Use X-API-KEY on every request to /v1/ endpoints",
+    "Refunds are issued with POST /v3/refunds",
+]
+
+
+def test_tokenizer_keeps_identifiers_whole():
+    tokens = tokenize("Call POST /v3/payments/charge with card_number and X-API-KEY.")
+    assert {"post /v3/payments/charge", "/v3/payments/charge", "card_number", "x-api-key"} <= set(tokens)
+    assert "with" not in tokens  # stop word
+
+
+def test_exact_identifier_ranks_first():
+    index = BM25Index.build([(TEXTS, range(len(TEXTS)))])
+    _, ids = index.search("card_number", 3)
+    assert ids[0] == 0
+    _, ids = index.search("POST /v3/refunds", 3)
+    assert ids[0] == 5
+
+
+def test_batched_adds_match_one_add():
+    one = BM25Index.build([(TEXTS[:2], [0, 1])])
+    one.add(TEXTS[2:], range(2, len(TEXTS)))
+    many = BM25Index.build([(TEXTS[:2], [0, 1])])
+    for i in range(2, len(TEXTS)):  # buffered, stacked once on the first search
+        many.add([TEXTS[i]], [i])
+    assert many.ntotal == len(TEXTS)
+
+    for query in ("payment charge", "api key request", "refunds"):
+        for a, b in zip(one.search(query, 4), many.search(query, 4)):
+            assert np.array_equal(a, b)
+
+
+def test_remove_and_filter():
+    index = BM25Index.build([(TEXTS, np.arange(len(TEXTS)) + 10)])
+    index.add(["POST /v1/charge is deprecated"], [20])
+    assert index.remove_ids([10]) == 1
+    _, ids = index.search("POST /v1/charge", 5)
+    assert 10 not in ids and 20 in ids
+
+    _, ids = index.search("charge", 5, IdFilter.from_ids([11]))
+    assert ids.tolist() == [11]
+
+
+def test_save_load_round_trip(tmp_path):
+    index = BM25Index.build([(TEXTS, range(len(TEXTS)))])
+    index.add(["Idempotency-Key header on retries"], [6])
+    index.save(tmp_path / "bm25.npz")
+    loaded = BM25Index.load(tmp_path / "bm25.npz")
+
+    assert loaded.ntotal == index.ntotal
+    assert loaded.vocabulary == index.vocabulary
+    assert (loaded.n_docs, loaded.avgdl) == (index.n_docs, index.avgdl)
+    for query in ("idempotency-key", "POST /v1/charge", "webhook signature"):
+        for a, b in zip(index.search(query, 3), loaded.search(query, 3)):
+            assert np.array_equal(a, b)
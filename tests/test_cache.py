@@ -0,0 +1,90 @@
+import pytest
+
+from rag_engine import cache as cache_module
+from rag_engine.cache import CacheBackend, MemoryCacheBackend, QueryCache, SQLiteCacheBackend, backend_from_url, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time for both the LRU (monotonic) and the shared backends (time)."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_cache_key():
+    key = cache_key("audit", "How do I charge?", 5, None, "gen1")
+    assert key == cache_key("audit", "  how do I   CHARGE ", 5, "default", "gen1")
+    assert len({
+        key,
+        cache_key("search", "how do I charge", 5, None, "gen1"),
+        cache_key("audit", "how do I charge", 3, None, "gen1"),
+        cache_key("audit", "how do I charge", 5, "other", "gen1"),
+        cache_key("audit", "how do I charge", 5, None, "gen2"),
+        cache_key("audit", "how do I charge", 5, None, "gen1", {"doc_types": ["webhook"]}),
+        cache_key("audit", "how do I charge", 5, None, "gen1", answer={"answer": "POST /charge"}),
+    }) == 7
+
+
+def test_lru_eviction(clock):
+    cache = QueryCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a is now the most recent
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (3, 1, 1, 2)
+
+
+def test_ttl_expiry(clock):
+    cache = QueryCache(max_entries=10, ttl=60)
+    cache.set("a", {"risk": "HIGH"})
+    clock[0] += 59
+    assert cache.get("a") == {"risk": "HIGH"}
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_disabled():
+    cache = QueryCache(max_entries=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None and not cache.enabled
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_shared_backend(backend, tmp_path, clock):
+    shared = MemoryCacheBackend() if backend == "memory" else SQLiteCacheBackend(str(tmp_path / "cache.db"))
+    worker1, worker2 = QueryCache(ttl=60, shared=shared), QueryCache(ttl=60, shared=shared)
+    worker1.set("a", {"score": 42})
+    assert worker2.get("a") == {"score": 42}
+    assert worker2.stats()["shared_hits"] == 1
+
+    clock[0] += 61
+    assert QueryCache(ttl=60, shared=shared).get("a") is None
+
+    worker1.set("b", 1)
+    worker1.clear()
+    assert worker2.get("b") is None
+
+
+def test_incomplete_backend_fails_when_created():
+    class NoClear(CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, value, ttl):
+            pass
+
+    with pytest.raises(TypeError, match="clear"):
+        NoClear()
+
+
+def test_backend_from_url(tmp_path):
+    assert backend_from_url(None) is None
+    assert isinstance(backend_from_url("memory"), MemoryCacheBackend)
+    assert isinstance(backend_from_url(f"sqlite:///{tmp_path}/cache.db"), SQLiteCacheBackend)
+    with pytest.raises(ValueError):
+        backend_from_url("redis://localhost")
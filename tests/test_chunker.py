@@ -0,0 +1,53 @@
+import pytest
+
+from data_ingestion.chunker import Chunker
+
+META = {"file": "payment_api_v1.0_2021.txt", "version": "1.0"}
+DOC = """Payment API v1.0
+
+Base URL:
+https://api.product.com/v1/
+
+Endpoint:
+POST /charge takes a card number, an amount and a currency code and returns a transaction id.
+
+Authentication:
+Send the X-API-KEY header with every request; keys are issued per merchant account.
+"""
+
+
+def test_sections():
+    chunks = Chunker("sections", min_tokens=5).chunk(DOC, META)
+    assert [c["meta"]["section"] for c in chunks] == ["Base URL", "Endpoint", "Authentication"]
+    # the title line alone is too small: it is merged into the next section
+    assert "https://api.product.com/v1/" in chunks[0]["text"] and "POST /charge" in chunks[1]["text"]
+    assert all(c["text"].startswith("Payment API v1.0") for c in chunks)
+    assert [c["meta"]["chunk_id"] for c in chunks] == [f"{META['file']}#{i}" for i in range(3)]
+    assert all(c["meta"]["n_chunks"] == 3 and c["meta"]["version"] == "1.0" for c in chunks)
+    for c in chunks:
+        assert DOC[c["meta"]["char_start"]:c["meta"]["char_end"]].strip() in c["text"]
+
+
+def test_token_windows_overlap():
+    text = " ".join(f"w{i}" for i in range(25))
+    chunks = Chunker("tokens", window=10, overlap=4, include_title=False).chunk(text, META)
+    words = [c["text"].split() for c in chunks]
+    assert [w[0] for w in words] == ["w0", "w6", "w12", "w18"]
+    assert words[0][-4:] == words[1][:4]
+    assert words[-1][-1] == "w24"
+
+
+def test_oversized_section_is_window_split():
+    doc = "Title\n\nEndpoint:\n" + " ".join(f"w{i}" for i in range(50))
+    chunks = Chunker("sections", window=20, overlap=5, min_tokens=1).chunk(doc, META)
+    assert len(chunks) > 2 and {c["meta"]["section"] for c in chunks[1:]} == {"Endpoint"}
+
+
+def test_none_and_validation():
+    chunks = Chunker("none").chunk(DOC, META)
+    assert len(chunks) == 1 and chunks[0]["text"] == DOC.strip()
+    assert Chunker().chunk("  \n ", META) == []
+    with pytest.raises(ValueError):
+        Chunker("paragraphs")
+    with pytest.raises(ValueError):
+        Chunker("tokens", window=10, overlap=10)
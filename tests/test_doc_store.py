@@ -0,0 +1,59 @@
+import pytest
+
+from vector_store.doc_store import MAX_PARAMS, DocStore
+
+
+def _chunk(doc_id, file, n, **extra):
+    meta = {"file": file, "version": "1.0", "doc_type": "payment_api", "deprecated": False}
+    return {**meta, **extra, "id": doc_id, "chunk_id": f"{file}#{n}"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DocStore(tmp_path / "documents.db", create=True)
+    store.replace_chunks([
+        _chunk(0, "a.txt", 0, deprecated=True), _chunk(1, "a.txt", 1, deprecated=True),
+        _chunk(2, "b.txt", 0, version="3.0"), _chunk(3, "c.txt", 0, doc_type="webhook"),
+    ])
+    return store
+
+
+def test_get_and_find_chunks(store):
+    assert sorted(store.get_chunks([3, 0, 0, 42])) == [0, 3]
+    assert store.get_chunks([2])[2]["version"] == "3.0"
+    assert sorted(store.find_chunks(["a.txt#1", "c.txt#0", "missing.txt#0"])) == [1, 3]
+
+
+def test_get_chunks_beyond_the_parameter_limit(tmp_path):
+    store = DocStore(tmp_path / "documents.db", create=True)
+    store.replace_chunks([_chunk(i, "big.txt", i) for i in range(MAX_PARAMS * 2 + 5)])
+    assert len(store.get_chunks(range(MAX_PARAMS * 2 + 10))) == MAX_PARAMS * 2 + 5
+
+
+def test_sync_and_retain(store):
+    metas = store.all_chunks()
+    store.sync_chunks([m for m in metas if m["file"] != "a.txt"] + [_chunk(4, "d.txt", 0)])
+    assert [m["id"] for m in store.all_chunks()] == [2, 3, 4]
+
+    store.retain_chunks(3, 5)
+    assert [m["id"] for m in store.iter_chunks()] == [3, 4]
+    assert [m["id"] for m in store.iter_chunks(4)] == [4]
+    assert store.count_chunks() == 2
+
+
+def test_list_datasets(store):
+    datasets = store.list_datasets()
+    assert list(datasets) == ["a.txt", "b.txt", "c.txt"]
+    assert datasets["a.txt"] == {"version": "1.0", "deprecated": True, "doc_type": "payment_api", "count": 2}
+
+
+def test_documents_round_trip(tmp_path, store):
+    docs = [{"file": "a.txt", "version": "1.0", "doc_type": "payment_api", "deprecated": True, "size": 10}]
+    store.replace_documents(docs)
+    store.close()
+    assert DocStore(tmp_path / "documents.db").documents() == docs
+
+
+def test_missing_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DocStore(tmp_path / "missing.db")
@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pytest
+
+from vector_store.embedders import EmbeddingCache, SentenceEmbedder, check_embedder, load_embedder, save_embedder
+
+MODEL = "not-a-model"  # loading it would fail: these tests must never need the model
+
+
+def test_spec_round_trip(tmp_path):
+    path = tmp_path / "embedder.json"
+    checksum = save_embedder(SentenceEmbedder(MODEL, dim=8), path)
+    loaded = load_embedder("sentence", path, expected_checksum=checksum, cache_path=tmp_path / "cache.db")
+    assert (loaded.model_name, loaded.dim) == (MODEL, 8)
+
+    with pytest.raises(ValueError):
+        load_embedder("sentence", path, expected_checksum="0" * 64)
+    path.write_text(json.dumps({"format_version": 99}))
+    with pytest.raises(ValueError):
+        load_embedder("sentence", path)
+    with pytest.raises(FileNotFoundError):
+        load_embedder("sentence", tmp_path / "missing.json")
+
+
+def test_check_embedder():
+    check_embedder("tfidf", "sparse")
+    with pytest.raises(ValueError):
+        check_embedder("word2vec")
+    with pytest.raises(ValueError):
+        check_embedder("sentence", "sparse")
+
+
+def test_cache_round_trip(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.db")
+    vectors = np.random.default_rng(0).random((3, 8)).astype(np.float32)
+    cache.put_many(zip([b"a", b"b", b"c"], vectors))
+
+    found = EmbeddingCache(tmp_path / "cache.db").get_many([b"c", b"a", b"x", b"a"])
+    assert sorted(found) == [b"a", b"c"]
+    assert np.allclose(found[b"c"], vectors[2], atol=1e-3)  # stored as float16
+
+
+def test_cached_documents_skip_the_model(tmp_path):
+    embedder = SentenceEmbedder(MODEL, cache_path=tmp_path / "cache.db", dim=4)
+    texts = ["alpha", "beta"]
+    vectors = np.eye(4, dtype=np.float32)[:2]
+    embedder.cache.put_many(zip([embedder._key(t) for t in texts], vectors))
+
+    out = embedder.transform(["beta", "alpha", "beta"])
+    assert out.dtype == np.float32
+    assert np.array_equal(out, vectors[[1, 0, 1]])
+    assert embedder.transform([]).shape == (0, 4)
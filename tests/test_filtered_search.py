@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from rag_engine.rag_engine import GhostRAG
+from vector_store.backends import INDEX_TYPES, new_index, search_index, search_refined
+from vector_store.filters import IdFilter, SearchFilter
+
+DIM = 32
+BUILD_PARAMS = {"flat": {}, "ivf": {"nlist": 8}, "hnsw": {}, "ivfpq": {"nlist": 8, "pq_m": 8}, "pq": {"pq_m": 8}}
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).random((600, DIM)).astype("float32")
+
+
+def _built(index_type, vectors):
+    index = new_index("faiss", DIM, index_type, BUILD_PARAMS[index_type], n_train=len(vectors))
+    if not index.is_trained:
+        index.train(vectors)
+    index.add_with_ids(vectors, np.arange(len(vectors)) + 1000)
+    return index
+
+
+def _exact(vectors, queries, allowed, k):
+    dist = ((queries[:, None] - vectors[None, allowed - 1000]) ** 2).sum(axis=2)
+    return allowed[np.argsort(dist, axis=1)[:, :k]]
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_filtered_search_only_returns_allowed_ids(index_type, vectors):
+    index = _built(index_type, vectors)
+    allowed = np.arange(1000, 1600, 7)
+    id_filter = IdFilter.from_ids(allowed)
+
+    _, ids = search_index(index, vectors[:4], 5, id_filter)
+    assert (ids >= 0).all()
+    assert id_filter.contains(ids).all()
+
+    # exact re-ranking of the filtered candidates recovers the true filtered top-k
+    _, refined = search_refined(index, vectors[:4], 5, 16, lambda i: vectors[i - 1000], id_filter)
+    assert id_filter.contains(refined).all()
+    assert (refined[:, 0] == _exact(vectors, vectors[:4], allowed, 5)[:, 0]).all()
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_filtered_search_with_fewer_matches_than_k(index_type, vectors):
+    index = _built(index_type, vectors)
+    id_filter = IdFilter.from_ids([1003, 1500])
+    _, ids = search_index(index, vectors[:2], 5, id_filter)
+    assert set(ids[ids >= 0].tolist()) <= {1003, 1500}
+    if index_type in ("flat", "pq"):  # exhaustive scans always find both
+        assert sorted(ids[0][ids[0] >= 0].tolist()) == [1003, 1500]
+    assert (ids[:, 2:] == -1).all()
+
+
+def test_empty_filter_returns_nothing(vectors):
+    index = _built("flat", vectors)
+    _, ids = search_index(index, vectors[:2], 3, IdFilter.from_ids([]))
+    assert (ids == -1).all()
+
+
+def test_id_filter_bitmap():
+    id_filter = IdFilter.from_ids([0, 7, 8, 63])
+    assert id_filter.count == 4
+    assert id_filter.contains([0, 1, 7, 8, 9, 63, 64, -1, 10_000]).tolist() == [
+        True, False, True, True, False, True, False, False, False]
+
+
+def test_search_filter_validates_fields():
+    assert SearchFilter.from_dict({}) is None
+    with pytest.raises(ValueError):
+        SearchFilter.from_dict({"doc_type": ["payment_api"]})
+
+
+def test_filtered_dataset_search(ingest):
+    rag = GhostRAG(str(ingest("flat")))
+    rag.load()
+    filters = {"doc_types": ["payment_api"], "min_version": "2.0"}
+    results = rag.search("how to charge a payment", top_k=3, filters=filters)
+    assert results
+    assert {r["doc_type"] for r in results} == {"payment_api"}
+    assert all(float(r["version"]) >= 2.0 for r in results)
+
+
+@pytest.mark.parametrize("mode", ["vector", "hybrid"])
+def test_filtered_pq_dataset_search(ingest, mode):
+    rag = GhostRAG(str(ingest("pq", "--index-type", "pq")))
+    rag.load()
+    results = rag.search("how to charge a payment", top_k=3, mode=mode, filters={"doc_types": ["payment_api"]})
+    assert results
+    assert {r["doc_type"] for r in results} == {"payment_api"}
@@ -0,0 +1,41 @@
+import pytest
+
+from vector_store.fusion import RRF_K, fuse, relevance, rrf, weighted
+
+# vector: L2 distances, lower is better; BM25: higher is better
+VECTOR = [(1, 0.2), (2, 0.5), (3, 0.9)]
+BM25 = [(3, 12.0), (4, 6.0), (1, 3.0)]
+
+
+def test_rrf_rewards_docs_in_both_lists():
+    fused = dict(rrf(VECTOR, BM25))
+    assert fused[1] == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 3))
+    assert fused[2] == pytest.approx(1 / (RRF_K + 2))
+    assert [doc_id for doc_id, _ in rrf(VECTOR, BM25)] == [1, 3, 2, 4]
+
+
+def test_weighted_normalizes_each_list():
+    fused = dict(weighted(VECTOR, BM25, weight=0.5))
+    assert fused[1] == pytest.approx(0.5 * 1.0 + 0.5 * 0.0)
+    assert fused[3] == pytest.approx(0.5 * 0.0 + 0.5 * 1.0)
+    assert fused[4] == pytest.approx(0.5 * (6 - 3) / (12 - 3))
+    assert [doc_id for doc_id, _ in weighted(VECTOR, BM25, weight=1.0)][:3] == [1, 2, 3]
+
+
+def test_weighted_handles_empty_and_tied_lists():
+    assert [doc_id for doc_id, _ in weighted([], BM25)] == [3, 4, 1]
+    assert dict(weighted([(5, 0.3), (6, 0.3)], [])) == {5: 0.5, 6: 0.5}
+
+
+def test_fuse_dispatches_and_rejects_unknown_methods():
+    assert fuse(VECTOR, BM25) == rrf(VECTOR, BM25)
+    assert fuse(VECTOR, BM25, "weighted", weight=0.2) == weighted(VECTOR, BM25, 0.2)
+    with pytest.raises(ValueError):
+        fuse(VECTOR, BM25, "max")
+
+
+def test_relevance_is_higher_is_better():
+    assert relevance(VECTOR, "vector") == [(1, 0.9), (2, 0.75), (3, pytest.approx(0.55))]
+    assert relevance(BM25, "bm25") == [(3, 1.0), (4, 0.5), (1, 0.25)]
+    assert relevance([], "hybrid") == []
+    assert relevance([(7, 0.0)], "hybrid") == [(7, 0.0)]
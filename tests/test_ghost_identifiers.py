@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from drift_analysis.ghost_identifiers import AhoCorasick, IdentifierIndex, extract_identifiers
+
+V1 = {"file": "payment_api_v1.0_2021.txt", "doc_type": "payment_api", "version": "1.0", "deprecated": True}
+V3 = {"file": "payment_api_v3.0_2024.txt", "doc_type": "payment_api", "version": "3.0", "deprecated": False}
+GUIDE = {"file": "migration_guide_v1_to_v3.txt", "doc_type": "guide", "version": "unknown", "deprecated": False}
+
+CHUNKS = [
+    (V1, 'POST /charge with X-API-KEY: {"card_number": "4242", "transaction_id": "tx_1"} '
+         "Base URL: https://api.product.com/v1/"),
+    (V3, 'POST /v3/payments/charge with Idempotency-Key: {"payment_method": "pm_1", "transaction_id": "tx_2"}'),
+    (GUIDE, "Replace card_number with payment_method and POST /charge with POST /v3/payments/charge"),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return IdentifierIndex.build(CHUNKS, [V1, V3, GUIDE])
+
+
+def _found(index, text):
+    return [hit["identifier"] for hit in index.scan(text)]
+
+
+def test_extract_identifier_kinds():
+    found = extract_identifiers(CHUNKS[0][1])
+    assert found["post /charge"] == "endpoint"
+    assert found["/charge"] == "path"
+    assert found["x-api-key"] == "header"
+    assert found["card_number"] == "field"
+    assert found["https://api.product.com/v1/"] == "base_url"
+    assert found["/v1/"] == "path"
+    assert "tx_1" not in found  # a JSON value, not a field
+
+
+def test_ghosts_are_stale_only(index):
+    assert {"post /charge", "/charge", "card_number", "x-api-key", "/v1/"} <= set(index.ghosts)
+    # in a current doc too, or only in current / unversioned docs
+    assert not {"transaction_id", "payment_method", "post /v3/payments/charge", "idempotency-key"} & set(index.ghosts)
+    entry = index.identifiers["card_number"]
+    assert entry["versions"] == ["1.0", "unknown"]
+    assert entry["files"] == sorted([V1["file"], GUIDE["file"]])
+
+
+def test_scan_respects_identifier_boundaries(index):
+    assert _found(index, "call /payments/charge") == []
+    assert _found(index, "set card_number2 or card_number_x or card_number-x") == []
+    assert _found(index, "see /charge/refunds") == []
+    assert _found(index, "my_card_number is fine") == []
+    assert _found(index, "Send Card_Number.") == ["card_number"]
+
+
+def test_scan_matches_url_version_prefixes(index):
+    hits = index.scan("GET https://api.example.com/v1/refunds")
+    assert [(h["identifier"], h["kind"]) for h in hits] == [("/v1/", "path")]
+    assert hits[0]["files"] == [V1["file"]]
+
+
+def test_scan_keeps_the_longest_hit(index):
+    hits = index.scan("First POST /charge, then X-API-KEY")
+    assert [h["identifier"] for h in hits] == ["post /charge", "x-api-key"]
+    assert (hits[0]["start"], hits[0]["end"]) == (6, 18)
+
+
+def test_save_load_round_trip(index, tmp_path):
+    index.save(tmp_path / "identifiers.json")
+    loaded = IdentifierIndex.load(tmp_path / "identifiers.json")
+    assert loaded.identifiers == index.identifiers
+    text = "POST /charge with card_number via https://api.product.com/v1/"
+    assert loaded.scan(text) == index.scan(text)
+
+
+def test_load_rejects_other_versions(tmp_path):
+    (tmp_path / "identifiers.json").write_text('{"format_version": 99, "identifiers": {}}')
+    with pytest.raises(ValueError):
+        IdentifierIndex.load(tmp_path / "identifiers.json")
+
+
+def test_aho_corasick_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(50):
+        patterns = list({"".join(rng.choices("ab/", k=rng.randint(1, 4))) for _ in range(8)})
+        text = "".join(rng.choices("ab/", k=60))
+        expected = {
+            (start, start + len(p), i)
+            for i, p in enumerate(patterns)
+            for start in range(len(text))
+            if text.startswith(p, start)
+        }
+        assert set(AhoCorasick(patterns).finditer(text)) == expected
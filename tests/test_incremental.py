@@ -0,0 +1,65 @@
+import os
+
+from data_ingestion.create_sample_datasets import create_sample_datasets
+from data_ingestion.incremental import IngestState, file_sha256
+
+OLD = 1_600_000_000
+
+
+def _mtimes(directory):
+    return {p.name: p.stat().st_mtime_ns for p in directory.iterdir()}
+
+
+def test_sample_datasets_are_not_rewritten(tmp_path):
+    create_sample_datasets(str(tmp_path))
+    for path in tmp_path.iterdir():
+        os.utime(path, (OLD, OLD))
+    before = _mtimes(tmp_path)
+
+    create_sample_datasets(str(tmp_path))
+    assert _mtimes(tmp_path) == before
+
+    # an edited sample is restored, the others stay untouched
+    edited = next(iter(sorted(tmp_path.iterdir())))
+    content = edited.read_text(encoding="utf-8")
+    edited.write_text("edited", encoding="utf-8")
+    os.utime(edited, (OLD, OLD))
+    create_sample_datasets(str(tmp_path))
+    assert edited.read_text(encoding="utf-8") == content
+    assert {k: v for k, v in _mtimes(tmp_path).items() if k != edited.name} == \
+        {k: v for k, v in before.items() if k != edited.name}
+
+
+def test_state_plan_and_changed(tmp_path):
+    doc = tmp_path / "a.txt"
+    doc.write_text("one", encoding="utf-8")
+    state = IngestState(str(tmp_path / "state.json"))
+
+    assert state.plan([str(doc)])["new"] == [(str(doc), file_sha256(doc))]
+    state.record(str(doc), file_sha256(doc), [0, 1])
+    assert state.changed
+    state.save()
+    assert not state.changed
+
+    state = IngestState(str(tmp_path / "state.json")).load()
+    assert state.plan([str(doc)])["unchanged"] == ["a.txt"]
+    assert not state.changed
+
+    # touched, same content: unchanged, but the new stat signature is worth saving
+    os.utime(doc, (OLD, OLD))
+    assert state.plan([str(doc)])["unchanged"] == ["a.txt"]
+    assert state.changed
+
+    doc.write_text("two", encoding="utf-8")
+    assert [p for p, _ in state.plan([str(doc)])["changed"]] == [str(doc)]
+    assert state.plan([])["deleted"] == ["a.txt"]
+    state.tombstone("a.txt")
+    assert state.live_files() == set()
+
+
+def test_noop_run_writes_nothing(reingest):
+    data_dir = reingest("noop")
+    before = _mtimes(data_dir)
+
+    reingest("noop")
+    assert _mtimes(data_dir) == before
@@ -0,0 +1,45 @@
+import hashlib
+
+from data_ingestion.chunker import Chunker
+from data_ingestion.create_sample_datasets import create_sample_datasets
+from data_ingestion.parallel_ingest import Throughput, load_file, load_files
+
+
+def _stable(loaded):
+    """load_file() result without its ingestion timestamps."""
+    meta = {k: v for k, v in loaded["meta"].items() if k != "ingested_at"}
+    return {**loaded, "meta": meta, "chunks": [chunk["text"] for chunk in loaded["chunks"]]}
+
+
+def _samples(tmp_path):
+    create_sample_datasets(str(tmp_path))
+    return sorted(str(p) for p in tmp_path.iterdir())
+
+
+def test_load_file(tmp_path):
+    path = _samples(tmp_path)[0]
+    loaded = load_file(path, Chunker())
+    raw = open(path, "rb").read()
+
+    assert loaded["path"] == path
+    assert loaded["sha256"] == hashlib.sha256(raw).hexdigest()
+    assert loaded["bytes"] == len(raw)
+    assert loaded["chunks"] and loaded["meta"]["file"]
+
+
+def test_workers_keep_input_order_and_output(tmp_path):
+    paths = _samples(tmp_path)
+    chunker = Chunker("tokens", window=40, overlap=10)
+
+    inline = list(load_files(paths, chunker, workers=1))
+    # a batch smaller than the file count: results still come back in input order
+    pooled = list(load_files(paths, chunker, workers=2, batch_size=3))
+    assert [r["path"] for r in pooled] == paths
+    assert [_stable(r) for r in pooled] == [_stable(r) for r in inline]
+
+
+def test_throughput_report():
+    throughput = Throughput()
+    throughput.add(2**20)
+    throughput.add(2**20)
+    assert "2 files, 2.00 MB" in throughput.report()
@@ -0,0 +1,86 @@
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from rag_engine.registry import EngineRegistry, InvalidDatasetId, get_risk_engine
+
+SAMPLE_SOURCE = Path(__file__).resolve().parents[1] / "data_ingestion" / "sample_datasets"
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_dataset_dirs(tmp_path):
+    registry = EngineRegistry(data_dir=str(tmp_path))
+    assert registry.dataset_dir(None) == registry.dataset_dir("default") == tmp_path
+    assert registry.dataset_dir("team-a_1") == tmp_path / "datasets" / "team-a_1"
+    for bad in ("../secrets", "a/b", "a b"):
+        with pytest.raises(InvalidDatasetId):
+            registry.dataset_dir(bad)
+
+
+def test_engines_are_shared_and_missing_datasets_not_kept(reingest):
+    data_dir = reingest("shared")
+    registry = EngineRegistry(data_dir=str(data_dir.parents[1]))
+    engine = registry.get("shared")
+    assert registry.get("shared") is engine
+    assert get_risk_engine(engine) is get_risk_engine(engine)
+    assert registry.loaded() == {"shared": engine.generation}
+
+    with pytest.raises(FileNotFoundError):
+        registry.get("missing")
+    assert "missing" not in registry.loaded()
+
+
+def test_hot_swap_on_new_generation(reingest, tmp_path):
+    source = tmp_path / "source"
+    shutil.copytree(SAMPLE_SOURCE, source)
+    data_dir = reingest("swap", "--source", str(source))
+    registry = EngineRegistry(data_dir=str(data_dir.parents[1]), check_interval=0)
+    old = registry.get("swap")
+    held = old.search("charge a payment", top_k=2)
+
+    # an incremental ingest writes a new generation next to the loaded one
+    (source / "refund_api_v3.0_2024.txt").write_text(
+        "REFUND API — VERSION 3.0\n\nRefunds are issued with POST /v3/refunds and a payment_id.\n",
+        encoding="utf-8",
+    )
+    reingest("swap", "--source", str(source))
+    _wait_for(lambda: registry.get("swap") is not old)
+    new = registry.get("swap")
+    assert new.generation != old.generation
+    assert new.index.ntotal > old.index.ntotal
+    assert new.facts.n_docs == old.facts.n_docs + 1
+
+    # queries holding the previous engine keep working on it
+    assert old.search("charge a payment", top_k=2) == held
+    assert get_risk_engine(old).facts is old.facts
+    assert get_risk_engine(new).facts is new.facts
+
+    # ids are never reused: after a full rebuild the previous engine finds
+    # none of its rows, never another chunk's
+    reingest("swap", "--source", str(source), "--full")
+    _wait_for(lambda: registry.get("swap") is not new)
+    assert old.search("charge a payment", top_k=2) == []
+
+
+def test_memory_budget_evicts_least_recently_used(reingest):
+    first, second = reingest("one"), reingest("two")
+    assert first.parents[1] == second.parents[1]
+    registry = EngineRegistry(data_dir=str(first.parents[1]), memory_budget=1)
+
+    registry.get("one")
+    registry.get("two")  # over budget: "one" is unloaded, the most recent always stays
+    stats = registry.stats()
+    assert [d["dataset"] for d in stats["loaded"]] == ["two"]
+    assert stats["evictions"] == 1 and stats["used_bytes"] > 0
+
+    registry.get("one")  # loads again on demand
+    assert [d["dataset"] for d in registry.stats()["loaded"]] == ["one"]
+    assert registry.evict("one") and not registry.evict("one")
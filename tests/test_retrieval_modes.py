@@ -0,0 +1,58 @@
+import pytest
+
+from rag_engine import rag_engine
+from rag_engine.rag_engine import GhostRAG
+
+
+@pytest.fixture(scope="module")
+def rag(ingest):
+    engine = GhostRAG(str(ingest("flat")))
+    engine.load()
+    return engine
+
+
+def test_vector_retrieval_is_the_default(rag):
+    assert rag_engine.RETRIEVAL == "vector"
+    default = rag.search("how to charge a payment", top_k=3)
+    assert default == rag.search("how to charge a payment", top_k=3, mode="vector")
+    # L2 distances: best hit first, lower is better
+    scores = [r["score"] for r in default]
+    assert scores == sorted(scores)
+
+
+@pytest.mark.parametrize("mode", ["bm25", "hybrid"])
+def test_lexical_modes_are_opt_in_and_higher_is_better(rag, mode):
+    scores = [r["score"] for r in rag.search("POST /charge card_number", top_k=3, mode=mode)]
+    assert scores and scores == sorted(scores, reverse=True)
+
+
+def test_unknown_mode_is_rejected(rag):
+    with pytest.raises(ValueError):
+        rag.search("charge", mode="semantic")
+
+
+def test_version_rerank_demotes_stale_chunks(rag):
+    query = "how to charge a payment with a card"
+    plain = rag.search(query, top_k=4)
+    assert any(r["deprecated"] for r in plain)
+    assert all(r["current_equivalent"] is None for r in plain)
+
+    reranked = rag.search(query, top_k=4, rerank="version")
+    assert not any(r["deprecated"] for r in reranked)
+    scores = [r["score"] for r in reranked]
+    assert scores == sorted(scores, reverse=True)
+
+    # older versions fall behind the newest one of their doc type
+    files = [r["file"] for r in reranked]
+    assert files.index("payment_api_v3.0_2024.txt") < files.index("payment_api_v2.0_2022.txt")
+
+    latest = rag.facts.latest_versions
+    stale = [r for r in reranked if r["version"][0].isdigit() and r["version"] != latest[r["doc_type"]]]
+    assert stale
+    for r in reranked:
+        current = r["current_equivalent"]
+        if r in stale:
+            # the same doc type, at its newest version
+            assert (current["doc_type"], current["version"]) == (r["doc_type"], latest[r["doc_type"]])
+        else:
+            assert current is None
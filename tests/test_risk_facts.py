@@ -0,0 +1,83 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from drift_analysis.risk_facts import RiskFacts
+from vector_store.filters import SearchFilter
+
+DOCS = [
+    {"file": "payment_api_v1.0_2021.txt", "doc_type": "payment_api", "version": "1.0", "deprecated": True},
+    {"file": "payment_api_v2.0_2022.txt", "doc_type": "payment_api", "version": "2.0", "deprecated": False},
+    {"file": "payment_api_v3.0_2024.txt", "doc_type": "payment_api", "version": "3.0", "deprecated": False},
+    {"file": "deprecation_notice_2024.txt", "doc_type": "notice", "version": "unknown", "deprecated": False},
+]
+# two chunks per doc, ids 10..17
+CHUNKS = [dict(doc, id=10 + 2 * i + j) for i, doc in enumerate(DOCS) for j in range(2)]
+
+
+@pytest.fixture(scope="module")
+def facts():
+    return RiskFacts.build(CHUNKS, DOCS)
+
+
+def test_build(facts):
+    assert len(facts) == 8 and facts.n_docs == 4
+    assert facts.latest_versions == {"payment_api": "3.0"}
+    assert facts.deprecation_notice_exists
+    rows = facts.rows([10, 12, 14, 16])
+    assert facts.is_deprecated[rows].tolist() == [True, False, False, False]
+    assert facts.is_outdated[rows].tolist() == [False, True, False, False]  # deprecated wins over outdated
+    assert facts.is_critical[rows].tolist() == [True, True, True, False]
+
+
+def test_priors_demote_stale_chunks(facts):
+    prior = facts.prior[facts.rows([10, 12, 14, 16])]
+    assert prior[0] < prior[1] < prior[2] == 0.0
+    assert prior[3] == 0.0  # unversioned
+    # stale chunks point at a chunk of the current version (no transform: its first chunk)
+    assert facts.current_id[facts.rows([10, 11, 12, 13])].tolist() == [14, 14, 14, 14]
+    assert facts.current_id[facts.rows([14])][0] == -1
+
+
+def test_rows(facts):
+    assert facts.rows([[17, -1], [10, 11]]).shape == (2, 2)
+    assert facts.rows([-1]).tolist() == [-1]
+    with pytest.raises(KeyError):
+        facts.rows([99])
+    assert facts.rows([99, 10], strict=False)[0] == -1
+
+
+def test_rerank(facts):
+    ranked = facts.rerank([(10, 1.0), (14, 0.9), (99, 0.5)], top_k=3)
+    assert [doc_id for doc_id, _, _ in ranked] == [14, 10, 99]
+    assert ranked[1][2] == 14        # current equivalent of the deprecated chunk
+    assert ranked[2][1] == 0.5       # unknown id: no prior
+
+
+def test_compiled_filter(facts):
+    id_filter = SearchFilter(doc_types=["payment_api"], min_version="2.0").compile(facts)
+    assert id_filter.contains(np.arange(10, 18)).tolist() == [False, False, True, True, True, True, False, False]
+    id_filter = SearchFilter(exclude_deprecated=True).compile(facts)
+    assert id_filter.count == 6 and not id_filter.contains([10, 11]).any()
+
+
+def test_save_load_round_trip(facts, tmp_path):
+    facts.save(tmp_path / "facts.npz")
+    loaded = RiskFacts.load(tmp_path / "facts.npz")
+    assert (loaded.files, loaded.versions, loaded.latest_versions) == (facts.files, facts.versions, facts.latest_versions)
+    for column in ("ids", "version_rank", "is_deprecated", "is_outdated", "prior", "current_id"):
+        assert np.array_equal(getattr(loaded, column), getattr(facts, column))
+    assert loaded.rerank([(10, 1.0), (14, 0.9)], 2) == facts.rerank([(10, 1.0), (14, 0.9)], 2)
+
+
+def test_storage_layer_does_not_import_scoring():
+    code = (
+        "import sys, vector_store.vector_store, vector_store.filters; "
+        "print(sorted(m for m in sys.modules if m.startswith('drift_analysis')))"
+    )
+    root = Path(__file__).resolve().parents[1]
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+
+import pytest
+
+from drift_analysis import risk_rules
+from drift_analysis.risk_rules import RULES_PATH, MetadataBatch, RuleSet, load_rules
+
+LATEST = {"payment_api": "3.0", "config": "3.0"}
+
+
+@pytest.fixture
+def spec():
+    with open(RULES_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch, spec):
+    """A private rule file served by get_rules(), checked on every call."""
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    monkeypatch.setattr(risk_rules, "RULES_PATH", str(path))
+    monkeypatch.setattr(risk_rules, "RULES_CHECK", 0.0)
+    monkeypatch.setattr(risk_rules, "_rules", None)
+    monkeypatch.setattr(risk_rules, "_rules_mtime", None)
+    return path
+
+
+def _write(path, text, bump=1):
+    path.write_text(text, encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+def _score(rules, results, ghost_hits=None, notice=True):
+    return rules.evaluate(MetadataBatch([results], LATEST, notice, [ghost_hits or []]))[0]
+
+
+# ---------------- EVALUATION ----------------
+def test_shipped_rules_score_a_deprecated_payment_doc(spec):
+    risk = _score(RuleSet(spec), [
+        {"file": "payment_api_v1.0_2021.txt", "version": "1.0", "doc_type": "payment_api", "deprecated": True},
+        {"file": "payment_api_v1.0_2021.txt", "version": "1.0", "doc_type": "payment_api", "deprecated": True},
+    ])
+    # (50 deprecated + 15 ignoring notice) x 1.3 critical + 10 single old version
+    assert risk["score"] == 94
+    assert risk["level"] == "HIGH"
+    assert risk["flags"] == ["DEPRECATED_DOC", "IGNORING_DEPRECATION", "CRITICAL_DOMAIN", "VERSION_IMBALANCE"]
+    assert risk["reasons"][0] == "🚨 DEPRECATED DOCUMENT: payment_api_v1.0_2021.txt (v1.0)"
+    assert "📊 VERSION IMBALANCE: All 1 results from same old version(s): ['1.0']" in risk["reasons"]
+
+
+def test_current_docs_are_low_risk(spec):
+    risk = _score(RuleSet(spec), [{"file": "config_v3.0.txt", "version": "3.0", "doc_type": "config"}])
+    assert (risk["score"], risk["level"], risk["flags"]) == (0, "LOW", [])
+    assert risk["actions"] == ["CONTINUE_MONITORING"]
+
+
+def test_empty_result_set_and_ghost_identifiers(spec):
+    rules = RuleSet(spec)
+    assert _score(rules, [])["reasons"] == [spec["empty_reason"]]
+    hit = {"identifier": "post /charge", "kind": "endpoint", "files": ["payment_api_v1.0_2021.txt"]}
+    risk = _score(rules, [], [hit, hit])
+    assert (risk["score"], risk["flags"]) == (40, ["GHOST_IDENTIFIER"])
+    assert len(risk["reasons"]) == 1
+
+
+def test_per_doc_points_and_negated_features(spec):
+    spec["rules"] = [{"flag": "OLD", "match": ["!current", "!unversioned"], "per": "doc", "points": 20,
+                      "reason": "{file} v{version} behind v{latest}"}]
+    risk = _score(RuleSet(spec), [
+        {"file": "a.txt", "version": "1.0", "doc_type": "payment_api"},
+        {"file": "b.txt", "version": "2.0", "doc_type": "payment_api"},
+        {"file": "c.txt", "version": "3.0", "doc_type": "payment_api"},
+        {"file": "d.txt", "version": "unknown", "doc_type": "payment_api"},
+    ])
+    assert risk["score"] == 40
+    assert risk["reasons"] == ["a.txt v1.0 behind v3.0", "b.txt v2.0 behind v3.0"]
+
+
+def test_incomplete_batch_fails_when_created():
+    class NoVersions(risk_rules._Batch):
+        def feature(self, name):
+            return self.valid
+
+        def doc(self, i, j):
+            return {}
+
+    with pytest.raises(TypeError, match="version"):
+        NoVersions(deprecation_notice=False, ghost_hits=None)
+
+
+@pytest.mark.parametrize("rule, message", [
+    ({"flag": "X", "match": ["nonsense"]}, "Unknown doc feature"),
+    ({"flag": "X", "require": ["any:nonsense"]}, "Unknown set feature"),
+    ({"flag": "X", "points": 1, "multiply": 2}, "either 'points' or 'multiply'"),
+    ({"flag": "X", "per": "doc"}, "needs 'match'"),
+    ({"flag": "X", "reason": "{file}"}, "not available per set"),
+    ({"flag": "X", "colour": "red"}, "Unknown keys"),
+    ({"points": 1}, "Missing 'flag'"),
+])
+def test_invalid_rules_are_rejected(spec, rule, message):
+    spec["rules"] = [rule]
+    with pytest.raises(ValueError, match=message):
+        RuleSet(spec)
+
+
+def test_yaml_rule_file(tmp_path, spec):
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "rules.yaml"
+    path.write_text(yaml.safe_dump(spec, allow_unicode=True), encoding="utf-8")
+    assert load_rules(path).checksum == RuleSet(spec).checksum
+
+
+# ---------------- HOT RELOAD ----------------
+def test_edited_file_is_reloaded(rules_file, spec):
+    first = risk_rules.get_rules()
+    assert risk_rules.get_rules() is first  # unchanged file: same compiled rules
+
+    spec["rules"][0]["points"] = 5
+    _write(rules_file, json.dumps(spec))
+    reloaded = risk_rules.get_rules()
+    assert reloaded.checksum != first.checksum
+    assert reloaded.rules[0]["points"] == 5
+
+
+@pytest.mark.parametrize("broken", [
+    "{not json",
+    json.dumps({"format_version": 1, "rules": [{"flag": "X", "match": ["nonsense"]}]}),
+    json.dumps({"format_version": 99}),
+])
+def test_broken_edit_keeps_previous_rules(rules_file, spec, broken, caplog):
+    first = risk_rules.get_rules()
+    _write(rules_file, broken)
+    with caplog.at_level(logging.WARNING, logger=risk_rules.__name__):
+        assert risk_rules.get_rules() is first
+    assert "Keeping previous risk rules" in caplog.text
+
+    # fixing the file is picked up again
+    spec["rules"][0]["points"] = 7
+    _write(rules_file, json.dumps(spec), bump=2)
+    assert risk_rules.get_rules().rules[0]["points"] == 7
+
+
+def test_malformed_yaml_keeps_previous_rules(tmp_path, monkeypatch, spec):
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "rules.yaml"
+    path.write_text(yaml.safe_dump(spec, allow_unicode=True), encoding="utf-8")
+    monkeypatch.setattr(risk_rules, "RULES_PATH", str(path))
+    monkeypatch.setattr(risk_rules, "RULES_CHECK", 0.0)
+    monkeypatch.setattr(risk_rules, "_rules", None)
+    monkeypatch.setattr(risk_rules, "_rules_mtime", None)
+
+    first = risk_rules.get_rules()
+    _write(path, "rules: [unclosed\n  - {")
+    assert risk_rules.get_rules() is first
+
+
+def test_vanished_file_keeps_previous_rules(rules_file, spec):
+    first = risk_rules.get_rules()
+    rules_file.unlink()  # an editor saving by rename
+    assert risk_rules.get_rules() is first
+
+    spec["rules"][0]["points"] = 9
+    _write(rules_file, json.dumps(spec))
+    assert risk_rules.get_rules().rules[0]["points"] == 9
+
+
+def test_first_load_of_a_broken_file_raises(rules_file):
+    _write(rules_file, "{not json")
+    with pytest.raises(ValueError):
+        risk_rules.get_rules()
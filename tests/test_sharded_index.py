@@ -0,0 +1,76 @@
+import faiss
+import numpy as np
+import pytest
+
+from rag_engine.rag_engine import GhostRAG
+from vector_store.filters import IdFilter
+from vector_store.sharded_index import ShardedIndex, fill_counts, merge_results
+
+DIM = 16
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).random((200, DIM), dtype=np.float32)
+
+
+def _flat(vectors, n_shards):
+    ids = np.arange(len(vectors)) + 1000
+    single = faiss.IndexIDMap(faiss.IndexFlatL2(DIM))
+    single.add_with_ids(vectors, ids)
+    sharded = ShardedIndex([faiss.IndexIDMap(faiss.IndexFlatL2(DIM)) for _ in range(n_shards)])
+    sharded.add_with_ids(vectors, ids)
+    return single, sharded
+
+
+def test_fill_counts_evens_out_shards():
+    assert fill_counts([0, 0, 0], 7).tolist() == [3, 2, 2]
+    assert fill_counts([5, 0, 2], 4).tolist() == [0, 3, 1]
+    assert fill_counts([5, 0, 2], 0).tolist() == [0, 0, 0]
+    assert (np.array([10, 3, 3]) + fill_counts([10, 3, 3], 20)).tolist() == [12, 12, 12]
+
+
+def test_merge_results_puts_padding_last():
+    d1, i1 = np.array([[0.1, np.inf]], dtype=np.float32), np.array([[7, -1]])
+    d2, i2 = np.array([[0.05, 0.3]], dtype=np.float32), np.array([[3, 9]])
+    distances, ids = merge_results([(d1, i1), (d2, i2)], 3)
+    assert ids.tolist() == [[3, 7, 9]]
+    assert np.allclose(distances, [[0.05, 0.1, 0.3]])
+    assert merge_results([(d1, i1)], 2)[1].tolist() == [[7, -1]]
+
+
+def test_scatter_gather_matches_unsharded(vectors):
+    single, sharded = _flat(vectors, 3)
+    assert sharded.ntotal == single.ntotal and sharded.d == DIM
+    assert sorted(shard.ntotal for shard in sharded.shards) == [66, 67, 67]
+
+    expected, got = single.search(vectors[:10], 5), sharded.search(vectors[:10], 5)
+    assert np.array_equal(expected[1], got[1])
+    assert np.allclose(expected[0], got[0])
+
+
+def test_removals_refill_the_smallest_shard(vectors):
+    _, sharded = _flat(vectors[:150], 3)
+    assert sharded.remove_ids(np.arange(1000, 1020)) == 20  # all from the first shard
+    sharded.add_with_ids(vectors[150:], np.arange(150, 200) + 1000)
+    assert [shard.ntotal for shard in sharded.shards] == [60, 60, 60]
+
+
+def test_filter_travels_to_every_shard(vectors):
+    _, sharded = _flat(vectors, 4)
+    wanted = [1000, 1050, 1100, 1150, 1199]
+    _, ids = sharded.search(vectors[:2], 8, IdFilter.from_ids(wanted))
+    for row in ids:
+        assert set(row[row >= 0].tolist()) == set(wanted)
+
+
+def test_sharded_dataset(ingest):
+    rag = GhostRAG(str(ingest("sharded", "--shards", "3")))
+    rag.load()
+    assert isinstance(rag.index, ShardedIndex) and len(rag.index) == 3
+
+    single = GhostRAG(str(ingest("unsharded")))
+    single.load()
+    assert rag.index.ntotal == single.index.ntotal
+    query = "how to charge a payment"
+    assert [r["file"] for r in rag.search(query, top_k=3)] == [r["file"] for r in single.search(query, top_k=3)]
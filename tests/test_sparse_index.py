@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from rag_engine.rag_engine import GhostRAG
+from vector_store.filters import IdFilter
+from vector_store.sparse_index import SparseIndex
+
+DIM = 64
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return sp.random(300, DIM, density=0.1, format="csr", dtype=np.float32, random_state=0)
+
+
+def _exact(vectors, queries, k):
+    dense, q = vectors.toarray(), queries.toarray()
+    return np.sort(((q[:, None] - dense[None]) ** 2).sum(axis=2), axis=1)[:, :k]
+
+
+def test_batched_adds_match_exact_search(vectors):
+    index = SparseIndex(DIM)
+    for start in range(0, vectors.shape[0], 7):  # many small adds are buffered
+        index.add_with_ids(vectors[start:start + 7], np.arange(start, min(start + 7, vectors.shape[0])))
+    assert index.ntotal == vectors.shape[0]
+
+    distances, ids = index.search(vectors[:5], 4)
+    assert (ids[:, 0] == np.arange(5)).all()
+    assert np.allclose(distances, _exact(vectors, vectors[:5], 4), atol=1e-5)
+
+
+def test_add_continues_ids_across_pending_rows(vectors):
+    index = SparseIndex(DIM)
+    index.add(vectors[:10])
+    index.add(vectors[10:20])
+    _, ids = index.search(vectors[15:16], 1)
+    assert ids[0, 0] == 15
+
+
+def test_remove_and_filter_see_pending_rows(vectors):
+    index = SparseIndex(DIM)
+    index.add_with_ids(vectors[:50], np.arange(50) + 100)
+    assert index.remove_ids([100, 101]) == 2
+    assert index.ntotal == 48
+
+    _, ids = index.search(vectors[:1], 3, IdFilter.from_ids([110, 120]))
+    assert set(ids[0][ids[0] >= 0].tolist()) == {110, 120}
+
+
+def test_save_load_round_trip(vectors, tmp_path):
+    index = SparseIndex(DIM)
+    index.add_with_ids(vectors, np.arange(vectors.shape[0]) * 2)
+    index.save(tmp_path / "sparse.npz")
+    loaded = SparseIndex.load(tmp_path / "sparse.npz")
+
+    assert loaded.ntotal == index.ntotal and loaded.d == DIM
+    assert loaded.nbytes() == index.nbytes()
+    for a, b in zip(index.search(vectors[:5], 5), loaded.search(vectors[:5], 5)):
+        assert np.array_equal(a, b)
+
+
+def test_streamed_sparse_dataset(ingest):
+    rag = GhostRAG(str(ingest("sparse", "--backend", "sparse", "--stream", "--batch-size", "4")))
+    rag.load()
+    assert rag.index.ntotal == rag.bm25.ntotal
+    results = rag.search("POST /v3/payments/charge", top_k=3)
+    assert len(results) == 3
@@ -0,0 +1,104 @@
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from data_ingestion.chunker import Chunker
+from data_ingestion.parallel_ingest import load_file
+from vector_store.vector_store import VectorStore
+
+SAMPLES = Path(__file__).resolve().parents[1] / "data_ingestion" / "sample_datasets"
+MIN_DF, MAX_DF = 2, 0.3
+QUERIES = ["how to charge a payment", "webhook signature retries", "rate limit per minute", "deprecated v1 endpoint"]
+
+
+@pytest.fixture(scope="module")
+def chunks():
+    chunker = Chunker("tokens", window=40, overlap=10)
+    return [
+        (chunk["text"], chunk["meta"])
+        for path in sorted(SAMPLES.glob("*.txt"))
+        for chunk in load_file(str(path), chunker)["chunks"]
+    ]
+
+
+def _store(directory):
+    directory.mkdir()
+    vs = VectorStore(**{
+        f"{name}_path": str(directory / file)
+        for name, file in [
+            ("index", "faiss.index"), ("docs", "documents.db"), ("text", "vector_texts.bin"),
+            ("vectorizer", "tfidf_vectorizer.bin"), ("embedder", "embedder.json"),
+            ("embedding_cache", "embedding_cache.db"), ("manifest", "index_manifest.json"),
+            ("sparse_index", "sparse_index.npz"), ("bm25", "bm25_index.npz"), ("facts", "risk_facts.npz"),
+        ]
+    })
+    vs.vectorizer = TfidfVectorizer(stop_words="english", min_df=MIN_DF, max_df=MAX_DF)
+    return vs
+
+
+@pytest.fixture(scope="module")
+def stores(tmp_path_factory, chunks):
+    tmp = tmp_path_factory.mktemp("streaming")
+    built = _store(tmp / "built")
+    for text, meta in chunks:
+        built.add_document(text, dict(meta))
+    built.build()
+    built.save()
+
+    streamed = _store(tmp / "streamed")
+    streamed.build_streaming(((text, dict(meta)) for text, meta in chunks), batch_size=7)
+    streamed.save()
+
+    for vs in (built, streamed):
+        vs.load(mmap=True)
+    return built, streamed
+
+
+def test_vocabulary_and_idf_match_fit(stores):
+    built, streamed = stores
+    assert streamed.vectorizer.vocabulary_ == built.vectorizer.vocabulary_
+    assert np.allclose(streamed.vectorizer.idf_, built.vectorizer.idf_)
+
+
+def test_ids_texts_and_rows_match(stores, chunks):
+    built, streamed = stores
+    assert streamed.next_id == built.next_id == len(chunks)
+    assert streamed.index.ntotal == streamed.bm25.ntotal == len(chunks)
+    assert streamed.docs.all_chunks() == built.docs.all_chunks()
+    assert all(streamed.text(i) == built.text(i) == text for i, (text, _) in enumerate(chunks))
+
+
+@pytest.mark.parametrize("mode", ["vector", "hybrid"])
+def test_search_results_match(stores, mode):
+    built, streamed = stores
+    for query in QUERIES:
+        expected, got = built.search(query, top_k=5, mode=mode), streamed.search(query, top_k=5, mode=mode)
+        assert [r["metadata"]["id"] for r in got] == [r["metadata"]["id"] for r in expected]
+        assert np.allclose([r["score"] for r in got], [r["score"] for r in expected], atol=1e-5)
+
+
+def test_document_frequency_pruning(stores, chunks):
+    analyzer = TfidfVectorizer(stop_words="english").build_analyzer()
+    df = Counter(term for text, _ in chunks for term in set(analyzer(text)))
+    too_rare = {term for term, count in df.items() if count < MIN_DF}
+    too_common = {term for term, count in df.items() if count > MAX_DF * len(chunks)}
+    assert too_rare and too_common
+
+    _, streamed = stores
+    assert set(streamed.vectorizer.vocabulary_) == set(df) - too_rare - too_common
+
+
+def test_max_features_keeps_the_most_frequent_terms(tmp_path, chunks):
+    vs = _store(tmp_path / "capped")
+    vs.build_streaming(((text, dict(meta)) for text, meta in chunks), max_features=10)
+    assert vs.embedding_dim == vs.index.d == 10
+
+    analyzer = vs.vectorizer.build_analyzer()
+    df = Counter(term for text, _ in chunks for term in set(analyzer(text)))
+    kept = [df[term] for term in vs.vectorizer.vocabulary_]
+    dropped = [count for term, count in df.items() if term not in vs.vectorizer.vocabulary_
+               and MIN_DF <= count <= MAX_DF * len(chunks)]
+    assert min(kept) >= max(dropped)
@@ -0,0 +1,56 @@
+import pytest
+
+from vector_store.text_store import TextStore, TextWriter, save_texts
+
+
+def test_round_trip_with_gaps(tmp_path):
+    path = str(tmp_path / "texts.bin")
+    texts = ["third", "first", "zweite Übersetzung ✓"]
+    assert save_texts(texts, [12, 10, 11], path) == 3
+
+    store = TextStore(path)
+    assert len(store) == 3 and store.first_id == 10
+    assert [store[i] for i in (10, 11, 12)] == ["first", "zweite Übersetzung ✓", "third"]
+    with pytest.raises(KeyError):
+        store[9]
+    with pytest.raises(KeyError):
+        store[13]
+
+
+def test_removed_ids_are_empty_slots(tmp_path):
+    path = str(tmp_path / "texts.bin")
+    save_texts(["a", "d"], [5, 8], path)
+    store = TextStore(path)
+    assert len(store) == 2
+    assert (store[5], store[6], store[8]) == ("a", "", "d")
+
+
+def test_writer_rejects_unordered_ids(tmp_path):
+    writer = TextWriter(str(tmp_path / "texts.bin"))
+    writer.append(3, "x")
+    with pytest.raises(ValueError):
+        writer.append(3, "y")
+
+
+def test_rejects_truncated_and_foreign_files(tmp_path):
+    path = tmp_path / "texts.bin"
+    save_texts(["some text"], [0], str(path))
+    path.write_bytes(path.read_bytes()[:-2])
+    with pytest.raises(ValueError):
+        TextStore(str(path))
+
+    path.write_bytes(b"something else entirely")
+    with pytest.raises(ValueError):
+        TextStore(str(path))
+    with pytest.raises(FileNotFoundError):
+        TextStore(str(tmp_path / "missing.bin"))
+
+
+def test_loaded_engine_reads_texts_lazily(ingest):
+    from rag_engine.rag_engine import GhostRAG
+
+    rag = GhostRAG(str(ingest("texts")))
+    rag.load()
+    assert isinstance(rag.texts, TextStore)
+    hit = rag.search("webhook events", top_k=1)[0]
+    assert hit["snippet"] == rag.texts[hit["id"]][:250] + "..."
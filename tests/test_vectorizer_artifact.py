@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from vector_store.vectorizer_artifact import load_vectorizer, read_header, save_vectorizer
+
+TEXTS = [
+    "POST /v1/charge takes card_number",
+    "POST /v3/payments/charge takes payment_method",
+    "Zahlungsbestätigung über Webhooks",
+]
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    vectorizer = TfidfVectorizer(stop_words="english").fit(TEXTS)
+    path = tmp_path / "tfidf_vectorizer.bin"
+    return vectorizer, path, save_vectorizer(vectorizer, path)
+
+
+def test_round_trip(artifact):
+    vectorizer, path, checksum = artifact
+    loaded = load_vectorizer(path, expected_checksum=checksum)
+    assert loaded.vocabulary_ == vectorizer.vocabulary_
+    queries = ["charge with card_number", "bestätigung", "nothing known"]
+    assert np.allclose(loaded.transform(queries).toarray(), vectorizer.transform(queries).toarray())
+    assert read_header(path)["checksum"] == checksum
+
+
+def test_checksum_mismatch(artifact):
+    _, path, _ = artifact
+    with pytest.raises(ValueError):
+        load_vectorizer(path, expected_checksum="0" * 64)
+
+
+def test_corrupt_artifact(artifact):
+    _, path, _ = artifact
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF  # last byte of the term blob
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        load_vectorizer(path)
+
+
+def test_not_an_artifact(tmp_path):
+    (tmp_path / "other.bin").write_bytes(b"not a vectorizer")
+    with pytest.raises(ValueError):
+        load_vectorizer(tmp_path / "other.bin")
+    with pytest.raises(FileNotFoundError):
+        load_vectorizer(tmp_path / "missing.bin")
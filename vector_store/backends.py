@@ -0,0 +1,287 @@
+"""
+Retrieval backends behind VectorStore / GhostRAG.
+
+    faiss  – dense float32 rows; index type chosen at build time:
+               flat   exact IndexFlatL2 (default)
+               ivf    IndexIVFFlat, k-means centroids, searches nprobe lists
+               hnsw   IndexHNSWFlat graph, searched with efSearch (no removals)
+               ivfpq  IndexIVFPQ, product-quantized codes for memory savings
+               pq     IndexPQ, exhaustive scan over product-quantized codes
+             flat / ivf / hnsw keep vectors as float32, or with storage=
+             float16 | int8 as scalar-quantized codes (1/2 or 1/4 the size)
+             Lossy codes get exact re-ranking of refine x k candidates
+             (search_refined).
+    sparse – CSR/CSC inverted index, never densified (see sparse_index.py)
+
+All expose .ntotal, .d, .is_trained, .train(vectors), .add_with_ids(vectors, ids),
+.remove_ids(ids) and .search(queries, k) -> (D, ids), so vector ids stay
+stable across incremental ingests. Either can be split into shards
+(see sharded_index.py), stored as <index file>.0, .1, ...
+
+search_index() is the filtered entry point: an IdFilter (see filters.py) is
+handed to the sparse / sharded index, or turned into faiss SearchParameters
+(IndexPQ takes no selector: it is oversampled and post-filtered instead).
+search_refined() adds exact re-ranking on top of it.
+"""
+
+import os
+
+import faiss
+import numpy as np
+import scipy.sparse as sp
+
+from .sharded_index import ShardedIndex
+from .sparse_index import SparseIndex
+
+BACKENDS = ("faiss", "sparse")
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq", "pq")
+
+STORAGE = {"float32": None, "float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+
+# refine: candidates re-scored exactly per hit wanted (None: 4 for lossy codes, else off)
+DEFAULT_PARAMS = {
+    "flat": {"storage": "float32", "refine": None},
+    "ivf": {"nlist": None, "nprobe": 8, "storage": "float32", "refine": None},
+    "hnsw": {"m": 32, "ef_construction": 80, "ef_search": 64, "storage": "float32", "refine": None},
+    "ivfpq": {"nlist": None, "nprobe": 8, "pq_m": 16, "pq_nbits": 8, "refine": None},
+    "pq": {"pq_m": 16, "pq_nbits": 8, "refine": None},
+}
+DEFAULT_REFINE = 4
+FILTER_OVERSAMPLE = 2  # pq: hits fetched per hit wanted, on top of 1 / filter selectivity
+
+
+def _check(backend, index_type="flat"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' (expected one of {BACKENDS})")
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}' (expected one of {INDEX_TYPES})")
+    if backend == "sparse" and index_type != "flat":
+        raise ValueError("The sparse backend is always exact; index types apply to faiss only")
+
+
+def resolve_params(index_type, params=None, n_train=None, dim=None):
+    """Defaults + overrides (knobs of other index types dropped), with sizes
+    that depend on the corpus resolved."""
+    resolved = dict(DEFAULT_PARAMS.get(index_type, {}))
+    resolved.update({k: v for k, v in (params or {}).items() if k in resolved and v is not None})
+
+    if n_train is not None and "nlist" in resolved:
+        # ~4*sqrt(n) lists, and k-means wants >= 39 points per centroid
+        nlist = resolved["nlist"] or int(4 * np.sqrt(n_train))
+        resolved["nlist"] = int(max(1, min(nlist, n_train // 39 or 1)))
+    if n_train is not None and "pq_nbits" in resolved:
+        # 2**nbits codebook entries need as many training points
+        resolved["pq_nbits"] = int(max(1, min(resolved["pq_nbits"], int(np.log2(max(n_train, 2))))))
+    if dim is not None and "pq_m" in resolved:
+        resolved["pq_m"] = _pq_m(dim, resolved["pq_m"])
+    if "refine" in resolved and resolved["refine"] is None:
+        lossy = "pq_m" in resolved or resolved.get("storage", "float32") != "float32"
+        resolved["refine"] = DEFAULT_REFINE if lossy else 0
+    return resolved
+
+
+def _pq_m(dim, wanted):
+    """PQ needs dim % m == 0: largest divisor of dim not above `wanted`."""
+    return max(m for m in range(1, min(wanted, dim) + 1) if dim % m == 0)
+
+
+def new_index(backend, dim, index_type="flat", params=None, n_train=None, shards=1):
+    """Empty index; ivf/ivfpq must be train()ed (see is_trained) before adding."""
+    _check(backend, index_type)
+    if shards > 1:
+        return ShardedIndex([new_index(backend, dim, index_type, params, n_train) for _ in range(shards)])
+    if backend == "sparse":
+        return SparseIndex(dim)
+
+    params = resolve_params(index_type, params, n_train, dim)
+    if params.get("nlist", 1) is None:
+        raise ValueError(f"{index_type} needs nlist or the training set size (n_train)")
+    if params.get("storage", "float32") not in STORAGE:
+        raise ValueError(f"Unknown storage '{params['storage']}' (expected one of {tuple(STORAGE)})")
+    qtype = STORAGE[params.get("storage", "float32")]  # None: plain float32
+
+    if index_type == "ivf":
+        if qtype is None:
+            index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, params["nlist"])
+        else:
+            index = faiss.IndexIVFScalarQuantizer(faiss.IndexFlatL2(dim), dim, params["nlist"], qtype)
+    elif index_type == "ivfpq":
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, params["nlist"], params["pq_m"], params["pq_nbits"])
+    elif index_type == "pq":
+        return faiss.IndexIDMap(faiss.IndexPQ(dim, params["pq_m"], params["pq_nbits"]))
+    elif index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, params["m"]) if qtype is None else faiss.IndexHNSWSQ(dim, qtype, params["m"])
+        hnsw.hnsw.efConstruction = params["ef_construction"]
+        return configure_index(faiss.IndexIDMap(hnsw), index_type, params)
+    else:
+        flat = faiss.IndexFlatL2(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype)
+        return faiss.IndexIDMap(flat)
+    return configure_index(index, index_type, params)
+
+
+def configure_index(index, index_type, params=None):
+    """Apply search-time knobs (nprobe / efSearch) to a built or loaded index."""
+    params = resolve_params(index_type, params)
+    if isinstance(index, ShardedIndex):
+        for shard in index.shards:
+            configure_index(shard, index_type, params)
+    elif index_type in ("ivf", "ivfpq"):
+        faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+    elif index_type == "hnsw":
+        faiss.downcast_index(index.index).hnsw.efSearch = params["ef_search"]
+    return index
+
+
+def supports_remove(backend, index_type="flat"):
+    """HNSW graphs can't drop vectors; changed/deleted docs need a rebuild."""
+    return not (backend == "faiss" and index_type == "hnsw")
+
+
+def prepare_vectors(backend, vectors):
+    """Embedder output (TF-IDF CSR or dense rows) -> what the backend's add()/search() expects."""
+    _check(backend)
+    if backend == "sparse":
+        return vectors
+    if sp.issparse(vectors):
+        vectors = vectors.toarray()
+    return np.ascontiguousarray(vectors, dtype="float32")
+
+
+def search_index(index, queries, k, id_filter=None):
+    """index.search(), restricted to the vector ids in `id_filter` when given."""
+    if id_filter is None:
+        return index.search(queries, k)
+    if not id_filter.count:
+        n_q = queries.shape[0]
+        return np.full((n_q, k), np.inf, dtype=np.float32), np.full((n_q, k), -1, dtype=np.int64)
+    if isinstance(index, (ShardedIndex, SparseIndex)):
+        return index.search(queries, k, id_filter)
+    if not _takes_selector(index):
+        return _post_filtered(index, queries, k, id_filter)
+    return index.search(queries, k, params=id_filter.faiss_params(index))
+
+
+def _takes_selector(index):
+    """IndexPQ rejects SearchParameters.sel; it is filtered after the scan instead."""
+    inner = index.index if isinstance(index, faiss.IndexIDMap) else index
+    return not isinstance(faiss.downcast_index(inner), faiss.IndexPQ)
+
+
+def _post_filtered(index, queries, k, id_filter):
+    """
+    Oversample by the filter's selectivity (x FILTER_OVERSAMPLE), drop ids
+    outside the bitmap and keep the best k; widen until every query has k
+    survivors or the whole index was scanned.
+    """
+    n_q = queries.shape[0]
+    depth = min(index.ntotal, int(np.ceil(k * FILTER_OVERSAMPLE * index.ntotal / id_filter.count)))
+    while True:
+        distances, ids = index.search(queries, max(depth, 1))
+        allowed = (ids >= 0) & id_filter.contains(ids)
+        if depth >= index.ntotal or (allowed.sum(axis=1) >= k).all():
+            break
+        depth = min(index.ntotal, depth * 2)
+
+    # stable sort: allowed hits first, in their original (distance) order
+    order = np.argsort(~allowed, axis=1, kind="stable")[:, :k]
+    out_d = np.full((n_q, k), np.inf, dtype=np.float32)
+    out_i = np.full((n_q, k), -1, dtype=np.int64)
+    keep = np.take_along_axis(allowed, order, axis=1)
+    out_d[:, :order.shape[1]] = np.where(keep, np.take_along_axis(distances, order, axis=1), np.inf)
+    out_i[:, :order.shape[1]] = np.where(keep, np.take_along_axis(ids, order, axis=1), -1)
+    return out_d, out_i
+
+
+def search_refined(index, queries, k, refine=0, encode=None, id_filter=None):
+    """
+    search_index() over lossy codes (pq / ivfpq / int8 / float16), then exact
+    re-ranking: refine * k candidates are re-scored against encode(ids) ->
+    their full-precision vectors (re-encoded from text, never stored), and
+    the best k by exact squared L2 are kept.
+    """
+    if not refine or encode is None:
+        return search_index(index, queries, k, id_filter)
+    _, candidates = search_index(index, queries, k * refine, id_filter)
+
+    n_q = queries.shape[0]
+    distances = np.full((n_q, k), np.inf, dtype=np.float32)
+    indices = np.full((n_q, k), -1, dtype=np.int64)
+    unique = np.unique(candidates[candidates >= 0])
+    if not len(unique):
+        return distances, indices
+
+    vectors = encode(unique)
+    dots = np.asarray(vectors @ queries.T, dtype=np.float32)         # candidates x queries
+    if sp.issparse(vectors):
+        sq_norms = np.asarray(vectors.multiply(vectors).sum(axis=1), dtype=np.float32).ravel()
+    else:
+        sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+    q_sq = np.einsum("ij,ij->i", queries, queries)
+
+    rows = np.searchsorted(unique, np.maximum(candidates, 0))
+    exact = q_sq[:, None] + sq_norms[rows] - 2 * dots[rows, np.arange(n_q)[:, None]]
+    exact[candidates < 0] = np.inf
+
+    order = np.argsort(exact, axis=1, kind="stable")[:, :k]
+    found = np.take_along_axis(candidates, order, axis=1)
+    distances[:, :order.shape[1]] = np.take_along_axis(exact, order, axis=1)
+    indices[:, :order.shape[1]] = np.where(found >= 0, found, -1)
+    return distances, indices
+
+
+def write_index(backend, index, path):
+    _check(backend)
+    if backend == "sparse":
+        index.save(path)
+    else:
+        faiss.write_index(index, path)
+
+
+def read_index(backend, path, index_type="flat", params=None, mmap=False):
+    """
+    mmap=True maps the faiss index file read-only instead of copying it to the
+    heap: vector codes (flat/hnsw) or inverted lists (ivf/ivfpq) stay in the
+    page cache, shared by every process that maps the same file. The sparse
+    backend is always loaded in memory.
+    """
+    _check(backend, index_type)
+    if backend == "sparse":
+        return SparseIndex.load(path)
+
+    flags = 0
+    if mmap:
+        mmap_flag = faiss.IO_FLAG_MMAP if index_type in ("ivf", "ivfpq") else faiss.IO_FLAG_MMAP_IFC
+        flags = mmap_flag | faiss.IO_FLAG_READ_ONLY
+    return configure_index(faiss.read_index(path, flags), index_type, params)
+
+
+# ---------------- SHARDS ----------------
+def shard_paths(path, n_shards=1):
+    """Files of an index split into n_shards (one shard keeps the plain path)."""
+    if n_shards == 1:
+        return [path]
+    return [f"{path}.{i}" for i in range(n_shards)]
+
+
+def save_index(backend, index, path):
+    """Write every shard through a temp file + atomic rename. Returns the paths."""
+    shards = index.shards if isinstance(index, ShardedIndex) else [index]
+    paths = shard_paths(path, len(shards))
+    for shard, shard_path in zip(shards, paths):
+        write_index(backend, shard, f"{shard_path}.tmp")
+        os.replace(f"{shard_path}.tmp", shard_path)
+    return paths
+
+
+def open_index(backend, path, index_type="flat", params=None, mmap=False, n_shards=1):
+    """read_index() for every shard; n_shards > 1 gives a ShardedIndex."""
+    paths = shard_paths(path, n_shards)
+    # inodes first: if a file is replaced mid-load, workers see a mismatch, not a mix
+    inodes = [os.stat(p).st_ino for p in paths]
+    shards = [read_index(backend, p, index_type, params, mmap=mmap) for p in paths]
+    if n_shards == 1:
+        return shards[0]
+    sources = None
+    if mmap:  # worker processes can map the same files
+        sources = [(backend, p, inode, index_type, params) for p, inode in zip(paths, inodes)]
+    return ShardedIndex(shards, sources=sources)
@@ -0,0 +1,142 @@
+"""
+Approximate index types vs the exact flat baseline: recall@k and latency.
+
+Builds every faiss index type over the same synthetic TF-IDF corpus, then
+sweeps the search knob (nprobe for ivf/ivfpq, efSearch for hnsw) and reports
+recall@k against IndexFlatL2, p50/p99 single-query latency, build time and
+serialized index size.
+
+Compact variants (flat-fp16, flat-int8, pq, ivfpq) are also run with exact
+re-ranking (refine x top_k candidates re-scored at full precision), and each
+row reports the memory saved vs float32 and the projected index size for
+1M chunks at this dimension, i.e. what one worker has to hold.
+
+Run: python -m vector_store.benchmark_ann --docs 20000 --vocab 1000
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from vector_store.backends import configure_index, new_index, resolve_params, search_refined
+
+# variant -> (index type, build params)
+VARIANTS = {
+    "flat": ("flat", {}),
+    "flat-fp16": ("flat", {"storage": "float16"}),
+    "flat-int8": ("flat", {"storage": "int8"}),
+    "ivf": ("ivf", {}),
+    "hnsw": ("hnsw", {}),
+    "ivfpq": ("ivfpq", {}),
+    "pq": ("pq", {}),
+}
+
+SWEEPS = {
+    "flat": [{}],
+    "flat-fp16": [{"refine": r} for r in (0, 4)],
+    "flat-int8": [{"refine": r} for r in (0, 4)],
+    "ivf": [{"nprobe": n} for n in (1, 4, 16, 64)],
+    "ivfpq": [{"nprobe": n, "refine": r} for n in (4, 16, 64) for r in (0, 4)],
+    "pq": [{"refine": r} for r in (0, 4, 16)],
+    "hnsw": [{"ef_search": n} for n in (16, 64, 256)],
+}
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    return np.mean([len(set(a[a >= 0]) & set(b)) / k for a, b in zip(found, truth)])
+
+
+def topic_corpus(n_docs, vocab_size, words_per_doc, n_topics, seed=0):
+    """Zipf docs whose term ranking depends on one of n_topics topics, so the
+    corpus clusters the way API docs do (payments, auth, webhooks, ...)."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"term{i}" for i in range(vocab_size)])
+    probs = 1.0 / np.arange(1, vocab_size + 1)
+    probs /= probs.sum()
+    topics = [rng.permutation(vocab) for _ in range(n_topics)]
+    return [
+        " ".join(rng.choice(topics[rng.integers(n_topics)], size=words_per_doc, p=probs))
+        for _ in range(n_docs)
+    ]
+
+
+def sample_queries(docs, n_queries, words, seed=1):
+    """Queries are word samples of random docs, so each has real neighbours."""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.integers(0, len(docs), size=n_queries):
+        tokens = docs[i].split()
+        queries.append(" ".join(rng.choice(tokens, size=min(words, len(tokens)), replace=False)))
+    return queries
+
+
+def run(n_docs, vocab_size, words_per_doc, n_topics, n_queries, top_k, types):
+    docs = topic_corpus(n_docs, vocab_size, words_per_doc, n_topics)
+    queries = sample_queries(docs, n_queries, words=words_per_doc // 4)
+
+    vectorizer = TfidfVectorizer()
+    x = np.asarray(vectorizer.fit_transform(docs).toarray(), dtype="float32")
+    q = np.asarray(vectorizer.transform(queries).toarray(), dtype="float32")
+    ids = np.arange(n_docs, dtype="int64")
+
+    print(f"\n📊 {n_docs} docs x {x.shape[1]} dims, {n_queries} queries, recall@{top_k} vs flat\n")
+
+    # exact re-ranking re-encodes candidates from text; here that is a row lookup
+    encode = x.__getitem__
+    dense_mb = x.nbytes / 2**20
+
+    truth = None
+    for variant in types:
+        index_type, build = VARIANTS[variant]
+        params = resolve_params(index_type, build, n_train=n_docs, dim=x.shape[1])
+
+        t0 = time.perf_counter()
+        index = new_index("faiss", x.shape[1], index_type, params)
+        if not index.is_trained:
+            index.train(x)
+        index.add_with_ids(x, ids)
+        build_s = time.perf_counter() - t0
+        size_mb = faiss.serialize_index(index).nbytes / 2**20
+
+        if variant == "flat":
+            _, truth = index.search(q, top_k)
+
+        for knobs in SWEEPS[variant]:
+            configure_index(index, index_type, {**params, **knobs})
+            refine = knobs.get("refine", 0)
+            latencies, found = [], []
+            for i in range(n_queries):
+                t0 = time.perf_counter()
+                _, idx = search_refined(index, q[i:i + 1], top_k, refine, encode)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                found.append(idx[0])
+
+            lat = np.array(latencies)
+            label = ", ".join(f"{k}={v}" for k, v in knobs.items()) or "exact"
+            recall = recall_at_k(found, truth) if truth is not None else float("nan")
+            print(
+                f"{variant:>9} {label:<20}: recall {recall:6.1%} | "
+                f"p50 {np.percentile(lat, 50):7.3f} ms | p99 {np.percentile(lat, 99):7.3f} ms | "
+                f"build {build_s:6.2f}s | index {size_mb:8.1f} MB "
+                f"({1 - size_mb / dense_mb:4.0%} saved, {size_mb / n_docs * 1e6 / 1024:7.2f} GB per 1M chunks)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--vocab", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=120, help="words per doc")
+    parser.add_argument("--topics", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=["flat", "ivf", "hnsw", "ivfpq"],
+                        choices=list(VARIANTS), help="flat is the ground truth and runs first")
+    args = parser.parse_args()
+
+    types = ["flat"] + [t for t in args.types if t != "flat"]
+    run(args.docs, args.vocab, args.words, args.topics, args.queries, args.top_k, types)
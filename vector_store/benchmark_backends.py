@@ -0,0 +1,85 @@
+"""
+Dense FAISS vs sparse inverted-index benchmark.
+
+Builds both backends over the same synthetic TF-IDF corpus and reports vector
+memory, build time, query latency and whether the top-k results agree.
+
+Run: python -m vector_store.benchmark_backends --docs 5000 --vocab 20000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from vector_store.backends import new_index, prepare_vectors
+
+
+def synthetic_corpus(n_docs, vocab_size, words_per_doc, seed=0):
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"term{i}" for i in range(vocab_size)])
+    # Zipf-ish term distribution, like real docs
+    probs = 1.0 / np.arange(1, vocab_size + 1)
+    probs /= probs.sum()
+    return [
+        " ".join(rng.choice(vocab, size=words_per_doc, p=probs))
+        for _ in range(n_docs)
+    ]
+
+
+def index_nbytes(backend, index):
+    if backend == "sparse":
+        return index.nbytes()
+    return index.ntotal * index.d * 4
+
+
+def run(n_docs, vocab_size, words_per_doc, n_queries, top_k):
+    docs = synthetic_corpus(n_docs, vocab_size, words_per_doc)
+    queries = synthetic_corpus(n_queries, vocab_size, 8, seed=1)
+
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(docs)
+    q_matrix = vectorizer.transform(queries)
+
+    print(f"\n📊 {n_docs} docs x {matrix.shape[1]} terms, {n_queries} queries, top_k={top_k}\n")
+
+    found = {}
+    for backend in ("faiss", "sparse"):
+        t0 = time.perf_counter()
+        index = new_index(backend, matrix.shape[1])
+        index.add_with_ids(prepare_vectors(backend, matrix), np.arange(n_docs))
+        build_s = time.perf_counter() - t0
+
+        latencies = []
+        found[backend] = []
+        for i in range(n_queries):
+            t0 = time.perf_counter()
+            _, idx = index.search(prepare_vectors(backend, q_matrix[i]), top_k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            found[backend].append(idx[0])
+
+        lat = np.array(latencies)
+        print(
+            f"{backend:>7}: vectors {index_nbytes(backend, index) / 2**20:9.1f} MB | "
+            f"build {build_s:6.2f}s | "
+            f"p50 {np.percentile(lat, 50):7.2f} ms | p99 {np.percentile(lat, 99):7.2f} ms"
+        )
+
+    overlap = np.mean([
+        len(set(a) & set(b)) / top_k
+        for a, b in zip(found["faiss"], found["sparse"])
+    ])
+    print(f"\ntop-{top_k} agreement sparse vs faiss: {overlap:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=200, help="words per doc")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.docs, args.vocab, args.words, args.queries, args.top_k)
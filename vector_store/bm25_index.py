@@ -0,0 +1,281 @@
+"""
+BM25 lexical index, built next to the vector index at ingestion.
+
+TF-IDF + L2 blurs exact identifiers (`/v1/charge`, `X-API-KEY`,
+`POST /payments/charge`) into word soup, so the tokenizer keeps them whole:
+every text yields its plain words plus whole paths, method + path pairs and
+hyphen/dot/underscore identifiers, all lowercased.
+
+Posting lists are one CSC matrix (docs x terms) of precomputed BM25 impacts:
+column t holds the rows containing term t and their scores, so a query is a
+few array slices. Search is term-at-a-time with MaxScore pruning: terms are
+visited by decreasing upper bound, and once the best score any unseen doc
+could still reach falls below the current k-th score, the remaining
+(low-idf) terms only score the surviving candidates via binary search
+instead of scanning their whole posting lists.
+
+Like the TF-IDF vectorizer, collection stats (N, avgdl, idf) are fixed at
+build time; incremental adds reuse them and skip terms unseen at build.
+Added rows are buffered and stacked into the postings once, on the next
+search / remove / save.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+K1 = 1.2
+B = 0.75
+
+METHOD_PATH = re.compile(r"\b(get|post|put|patch|delete|head|options)\s+(/[\w\-.{}:/]*\w)")
+PATH = re.compile(r"(?<![\w/])/[\w\-.{}:]+(?:/[\w\-.{}:]+)*")
+IDENT = re.compile(r"\b[a-z_][\w]*(?:[-.][\w]+)+|\b\w+_\w+")
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Words (minus stop words) + whole paths, method+path pairs and identifiers."""
+    text = text.lower()
+    tokens = [w for w in WORD.findall(text) if w not in ENGLISH_STOP_WORDS]
+    if "/" in text:
+        tokens += [f"{method} {path}" for method, path in METHOD_PATH.findall(text)]
+        tokens += [path.rstrip(".:") for path in PATH.findall(text)]
+    tokens += [ident.rstrip(".") for ident in IDENT.findall(text)]
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1=K1, b=B):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}                                  # term -> column
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.impacts = sp.csc_matrix((0, 0), dtype=np.float32)  # docs x terms
+        self.max_impact = np.zeros(0, dtype=np.float32)       # per-term upper bound
+        self.ids = np.zeros(0, dtype=np.int64)                # row -> vector id
+        self.n_docs = 0                                       # collection stats at build
+        self.avgdl = 0.0
+        self._pending = []                                    # (impacts, ids) since _flush()
+
+    @property
+    def ntotal(self):
+        return len(self.ids) + sum(len(ids) for _, ids in self._pending)
+
+    # ---------------- BUILD ----------------
+    @classmethod
+    def build(cls, batches, k1=K1, b=B):
+        """Index (texts, ids) batches; only term ids and counts are kept between batches."""
+        index = cls(k1, b)
+        rows, cols, tfs, lengths, ids = [], [], [], [], []
+        n = 0
+        for texts, batch_ids in batches:
+            for text in texts:
+                tokens = tokenize(text)
+                counts = Counter(tokens)
+                rows.append(np.full(len(counts), n, dtype=np.int32))
+                cols.append(np.fromiter(
+                    (index.vocabulary.setdefault(t, len(index.vocabulary)) for t in counts),
+                    dtype=np.int32, count=len(counts),
+                ))
+                tfs.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+                lengths.append(len(tokens))
+                n += 1
+            ids.append(np.asarray(batch_ids, dtype=np.int64))
+
+        if not n:
+            raise ValueError("No documents to index")
+
+        tf = sp.csc_matrix(
+            (np.concatenate(tfs), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n, len(index.vocabulary)), dtype=np.float32,
+        )
+        df = np.diff(tf.indptr)
+        index.n_docs = n
+        index.avgdl = float(np.mean(lengths)) or 1.0
+        index.idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        index.impacts = index._impacts(tf, np.asarray(lengths, dtype=np.float32))
+        index.ids = np.concatenate(ids)
+        index._refresh_bounds()
+        return index
+
+    def _impacts(self, tf, lengths):
+        """tf (docs x terms, CSC) -> BM25 score of each posting."""
+        tf = tf.tocsc()
+        norm = self.k1 * (1 - self.b + self.b * lengths / self.avgdl)
+        rows = tf.indices
+        data = tf.data * (self.k1 + 1) / (tf.data + norm[rows])
+        data *= np.repeat(self.idf, np.diff(tf.indptr))
+        impacts = sp.csc_matrix((data.astype(np.float32), tf.indices, tf.indptr), shape=tf.shape)
+        impacts.sort_indices()
+        return impacts
+
+    def _refresh_bounds(self):
+        self.max_impact = np.zeros(self.impacts.shape[1], dtype=np.float32)
+        counts = np.diff(self.impacts.indptr)
+        nonempty = counts > 0
+        self.max_impact[nonempty] = np.maximum.reduceat(self.impacts.data, self.impacts.indptr[:-1][nonempty])
+
+    # ---------------- UPDATE ----------------
+    def add(self, texts, ids):
+        """Append docs scored with the build-time stats; unseen terms are skipped."""
+        rows, cols, tfs, lengths = [], [], [], []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            known = [self.vocabulary[t] for t in tokens if t in self.vocabulary]
+            terms, counts = np.unique(np.asarray(known, dtype=np.int64), return_counts=True)
+            rows.append(np.full(len(terms), row, dtype=np.int32))
+            cols.append(terms.astype(np.int32))
+            tfs.append(counts.astype(np.float32))
+            lengths.append(len(tokens))
+        if not lengths:
+            return
+
+        tf = sp.csc_matrix(
+            (np.concatenate(tfs), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(len(lengths), len(self.vocabulary)), dtype=np.float32,
+        )
+        added = self._impacts(tf, np.asarray(lengths, dtype=np.float32))
+        self._pending.append((added, np.asarray(ids, dtype=np.int64)))
+
+    def _flush(self):
+        """Stack the buffered rows into the CSC impacts in one go."""
+        if not self._pending:
+            return
+        blocks, ids = zip(*self._pending)
+        self._pending = []
+        self.impacts = sp.vstack([self.impacts, *blocks], format="csc")
+        self.impacts.sort_indices()
+        self.ids = np.concatenate([self.ids, *ids])
+        self._refresh_bounds()
+
+    def remove_ids(self, ids):
+        self._flush()
+        keep = ~np.isin(self.ids, np.asarray(list(ids), dtype=np.int64))
+        removed = int((~keep).sum())
+        if removed:
+            self.impacts = self.impacts[keep].tocsc()
+            self.impacts.sort_indices()
+            self.ids = self.ids[keep]
+            self._refresh_bounds()
+        return removed
+
+    # ---------------- SEARCH ----------------
+    def search(self, query, k, id_filter=None):
+        """Top-k (scores, vector ids) for one query; higher is better.
+
+        id_filter (IdFilter) drops postings of other ids before they are scored.
+        """
+        self._flush()
+        terms, weights = self._query_terms(query)
+        if not len(terms) or not self.ntotal:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        bounds = self.max_impact[terms] * weights
+        order = np.argsort(-bounds, kind="stable")
+        terms, weights, bounds = terms[order], weights[order], bounds[order]
+        remaining = float(bounds.sum())
+
+        # essential terms: full posting scans into a dense accumulator
+        acc = np.zeros(self.ntotal, dtype=np.float32)
+        touched = []
+        i = 0
+        while i < len(terms):
+            rows, impacts = self._postings(terms[i])
+            if id_filter is not None:
+                allowed = id_filter.contains(self.ids[rows])
+                rows, impacts = rows[allowed], impacts[allowed]
+            acc[rows] += impacts * weights[i]
+            touched.append(rows)
+            remaining -= bounds[i]
+            i += 1
+            if i < len(terms):
+                candidates = np.unique(np.concatenate(touched))
+                if len(candidates) >= k and remaining < self._kth(acc[candidates], k):
+                    break  # a doc in none of the lists so far can't reach the top k
+        candidates = np.unique(np.concatenate(touched))
+        scores = acc[candidates]
+
+        # non-essential terms: only look up surviving candidates
+        for j in range(i, len(terms)):
+            if len(candidates) > k:
+                alive = scores + remaining >= self._kth(scores, k)
+                candidates, scores = candidates[alive], scores[alive]
+            rows, impacts = self._postings(terms[j])
+            if len(rows):
+                at = np.minimum(np.searchsorted(rows, candidates), len(rows) - 1)
+                hit = rows[at] == candidates
+                scores[hit] += impacts[at[hit]] * weights[j]
+            remaining -= bounds[j]
+
+        top = np.argsort(-scores, kind="stable")[:k]
+        return scores[top], self.ids[candidates[top]]
+
+    def search_batch(self, queries, k, id_filter=None):
+        return [self.search(query, k, id_filter) for query in queries]
+
+    def _query_terms(self, query):
+        cols = [self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary]
+        terms, counts = np.unique(np.asarray(cols, dtype=np.int64), return_counts=True)
+        return terms, counts.astype(np.float32)
+
+    def _postings(self, term):
+        start, end = self.impacts.indptr[term], self.impacts.indptr[term + 1]
+        return self.impacts.indices[start:end], self.impacts.data[start:end]
+
+    @staticmethod
+    def _kth(scores, k):
+        if len(scores) < k:
+            return 0.0
+        return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+    def nbytes(self):
+        self._flush()
+        p = self.impacts
+        return (p.data.nbytes + p.indices.nbytes + p.indptr.nbytes
+                + self.idf.nbytes + self.max_impact.nbytes + self.ids.nbytes)
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self, path):
+        self._flush()
+        terms = [None] * len(self.vocabulary)
+        for term, col in self.vocabulary.items():
+            terms[col] = term
+        encoded = [t.encode("utf-8") for t in terms]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in encoded], out=offsets[1:])
+
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                params=np.array([self.k1, self.b, self.n_docs, self.avgdl], dtype=np.float64),
+                terms=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+                term_offsets=offsets,
+                idf=self.idf,
+                data=self.impacts.data,
+                indices=self.impacts.indices,
+                indptr=self.impacts.indptr,
+                ids=self.ids,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            k1, b, n_docs, avgdl = z["params"].tolist()
+            index = cls(k1, b)
+            index.n_docs, index.avgdl = int(n_docs), avgdl
+
+            blob, bounds = z["terms"].tobytes(), z["term_offsets"].tolist()
+            index.vocabulary = {
+                blob[bounds[i]:bounds[i + 1]].decode("utf-8"): i for i in range(len(bounds) - 1)
+            }
+            index.idf = z["idf"]
+            index.ids = z["ids"]
+            index.impacts = sp.csc_matrix(
+                (z["data"], z["indices"], z["indptr"]),
+                shape=(len(index.ids), len(index.vocabulary)),
+            )
+        index._refresh_bounds()
+        return index
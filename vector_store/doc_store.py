@@ -0,0 +1,185 @@
+"""
+SQLite document store (documents.db, next to the index).
+
+    chunks     one row per vector id: file, version, doc_type, deprecated
+               (indexed) + the full metadata record as JSON
+    documents  one row per source file (what MetadataManager extracts)
+
+Serving code fetches only the rows of the ids a search returned, and dataset
+views are GROUP BY queries, so metadata access is O(hits), not O(corpus).
+Ingestion applies deltas in one transaction; WAL mode lets running servers
+keep reading while it writes. Vector ids are never reused, so a server still
+on the previous index generation either finds the same row or none.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    version TEXT,
+    doc_type TEXT,
+    deprecated INTEGER NOT NULL DEFAULT 0,
+    meta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_file ON chunks(file);
+CREATE INDEX IF NOT EXISTS chunks_version ON chunks(version);
+CREATE INDEX IF NOT EXISTS chunks_doc_type ON chunks(doc_type);
+CREATE INDEX IF NOT EXISTS chunks_deprecated ON chunks(deprecated);
+
+CREATE TABLE IF NOT EXISTS documents (
+    file TEXT PRIMARY KEY,
+    version TEXT,
+    doc_type TEXT,
+    deprecated INTEGER NOT NULL DEFAULT 0,
+    meta TEXT NOT NULL
+);
+"""
+
+# SQLite's default limit on host parameters per statement is 999 on old builds
+MAX_PARAMS = 900
+
+
+def _chunk_row(meta):
+    return (
+        meta["id"], meta["file"], meta.get("version"), meta.get("doc_type"),
+        int(bool(meta.get("deprecated", False))), json.dumps(meta),
+    )
+
+
+def _document_row(meta):
+    return (
+        meta["file"], meta.get("version"), meta.get("doc_type"),
+        int(bool(meta.get("deprecated", False))), json.dumps(meta),
+    )
+
+
+class DocStore:
+    def __init__(self, path, create=False):
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(f"❌ Document store not found at {path}. Run ingestion first.")
+        self.path = str(path)
+        self._local = threading.local()
+        if create:
+            self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, statements):
+        """Run (sql, rows) pairs in a single transaction."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, rows in statements:
+                conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------------- CHUNKS ----------------
+    def replace_chunks(self, metas):
+        self._write([
+            ("DELETE FROM chunks", [()]),
+            ("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", map(_chunk_row, metas)),
+        ])
+
+    def sync_chunks(self, metas):
+        """Delete rows whose id is gone, insert rows for new ids (ids are immutable)."""
+        stored = {row[0] for row in self._conn().execute("SELECT id FROM chunks")}
+        current = {meta["id"] for meta in metas}
+        self._write([
+            ("DELETE FROM chunks WHERE id = ?", [(i,) for i in stored - current]),
+            ("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)",
+             [_chunk_row(meta) for meta in metas if meta["id"] not in stored]),
+        ])
+
+    def put_chunks(self, metas):
+        """Insert (or overwrite) a batch of chunk rows; used by streaming builds."""
+        self._write([("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)", map(_chunk_row, metas))])
+
+    def retain_chunks(self, start_id, end_id):
+        """Drop every row outside [start_id, end_id), i.e. older generations."""
+        self._write([("DELETE FROM chunks WHERE id < ? OR id >= ?", [(start_id, end_id)])])
+
+    def get_chunks(self, ids):
+        """id -> metadata for the given vector ids (missing ids are left out)."""
+        ids = list(dict.fromkeys(int(i) for i in ids))
+        found = {}
+        for start in range(0, len(ids), MAX_PARAMS):
+            part = ids[start:start + MAX_PARAMS]
+            rows = self._conn().execute(
+                f"SELECT id, meta FROM chunks WHERE id IN ({','.join('?' * len(part))})", part
+            )
+            found.update((doc_id, json.loads(meta)) for doc_id, meta in rows)
+        return found
+
+    def find_chunks(self, chunk_ids):
+        """id -> metadata for chunk ids like "payment_api_v1.0_2021.txt#3" (via the file index)."""
+        wanted = set(chunk_ids)
+        files = list(dict.fromkeys(chunk_id.rsplit("#", 1)[0] for chunk_id in wanted))
+        found = {}
+        for start in range(0, len(files), MAX_PARAMS):
+            part = files[start:start + MAX_PARAMS]
+            rows = self._conn().execute(
+                f"SELECT id, meta FROM chunks WHERE file IN ({','.join('?' * len(part))})", part
+            )
+            for doc_id, meta in rows:
+                meta = json.loads(meta)
+                if meta.get("chunk_id", meta["file"]) in wanted:
+                    found[doc_id] = meta
+        return found
+
+    def all_chunks(self):
+        """Every chunk record in id order (ingestion only)."""
+        return [json.loads(meta) for (meta,) in self._conn().execute("SELECT meta FROM chunks ORDER BY id")]
+
+    def iter_chunks(self, start_id=0, end_id=None):
+        """Chunk records in id order, streamed from the cursor."""
+        rows = self._conn().execute(
+            "SELECT meta FROM chunks WHERE id >= ? AND id < ? ORDER BY id",
+            (start_id, end_id if end_id is not None else 2 ** 63 - 1),
+        )
+        for (meta,) in rows:
+            yield json.loads(meta)
+
+    def count_chunks(self):
+        return self._conn().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def list_datasets(self):
+        """file -> {version, deprecated, doc_type, count} with count = chunks per file."""
+        rows = self._conn().execute(
+            "SELECT file, version, deprecated, doc_type, COUNT(*) FROM chunks "
+            "GROUP BY file ORDER BY MIN(id)"
+        )
+        return {
+            file: {"version": version, "deprecated": bool(deprecated), "doc_type": doc_type, "count": count}
+            for file, version, deprecated, doc_type, count in rows
+        }
+
+    # ---------------- DOCUMENTS ----------------
+    def replace_documents(self, metas):
+        self._write([
+            ("DELETE FROM documents", [()]),
+            ("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)", map(_document_row, metas)),
+        ])
+
+    def documents(self):
+        return [json.loads(meta) for (meta,) in self._conn().execute("SELECT meta FROM documents ORDER BY rowid")]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,259 @@
+"""
+Text -> vector encoders ("embedders") behind VectorStore / GhostRAG.
+
+    tfidf     sklearn TfidfVectorizer fitted on the corpus (default): sparse
+              rows, persisted as tfidf_vectorizer.bin
+    sentence  pretrained sentence-transformers model on CPU: dense L2-normalized
+              rows, persisted as a small JSON spec (embedder.json); needs
+              `pip install sentence-transformers`
+
+A SentenceEmbedder quacks like a fitted vectorizer (fit_transform / transform
+-> float32 rows), so the index code takes either. Documents are encoded in
+batches spread over a thread pool (torch releases the GIL) and every embedding
+is cached on disk by sha256(model, text) as float16 in embedding_cache.db, so
+re-ingesting unchanged chunks costs a lookup instead of a forward pass.
+Queries go through a small in-process LRU instead.
+
+    GHOSTTRACE_EMBED_MODEL    sentence model (default: all-MiniLM-L6-v2)
+    GHOSTTRACE_EMBED_BATCH    texts per encode call (default: 64)
+    GHOSTTRACE_EMBED_WORKERS  encoding threads (default: CPU count)
+    GHOSTTRACE_QUERY_CACHE    query embeddings kept per embedder (default: 1024)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .vectorizer_artifact import save_vectorizer, load_vectorizer
+
+EMBEDDERS = ("tfidf", "sentence")
+
+EMBED_MODEL = os.getenv("GHOSTTRACE_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_BATCH = int(os.getenv("GHOSTTRACE_EMBED_BATCH", 64))
+EMBED_WORKERS = int(os.getenv("GHOSTTRACE_EMBED_WORKERS", os.cpu_count() or 4))
+QUERY_CACHE = int(os.getenv("GHOSTTRACE_QUERY_CACHE", 1024))
+
+SPEC_VERSION = 1
+
+# SQLite's default limit on host parameters per statement is 999 on old builds
+MAX_PARAMS = 900
+
+# one copy of each model per process, shared by every dataset that uses it
+_models = {}
+_models_lock = threading.Lock()
+_pool = None
+
+
+def _load_model(name):
+    with _models_lock:
+        if name not in _models:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "❌ The sentence embedder needs `pip install sentence-transformers`"
+                ) from e
+            _models[name] = SentenceTransformer(name, device="cpu")
+        return _models[name]
+
+
+def _encode_pool():
+    global _pool
+    with _models_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="ghosttrace-embed")
+        return _pool
+
+
+def check_embedder(embedder, backend="faiss"):
+    if embedder not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder '{embedder}' (expected one of {EMBEDDERS})")
+    if embedder == "sentence" and backend != "faiss":
+        raise ValueError("Sentence embeddings are dense; use the faiss backend")
+
+
+# ---------------- DISK CACHE ----------------
+class EmbeddingCache:
+    """sha256(model, text) -> float16 embedding, in SQLite (WAL, like the doc store)."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        """key -> float32 vector for the keys that are cached."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), MAX_PARAMS):
+            part = keys[start:start + MAX_PARAMS]
+            rows = self._conn().execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+            )
+            found.update((key, np.frombuffer(vector, dtype="<f2").astype(np.float32)) for key, vector in rows)
+        return found
+
+    def put_many(self, items):
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                ((key, np.asarray(vector, dtype="<f2").tobytes()) for key, vector in items),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# ---------------- SENTENCE EMBEDDER ----------------
+class SentenceEmbedder:
+    kind = "sentence"
+
+    def __init__(self, model_name=None, cache_path=None, dim=None,
+                 batch_size=EMBED_BATCH, query_cache_size=QUERY_CACHE):
+        self.model_name = model_name or EMBED_MODEL
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+        self.batch_size = batch_size
+        self._dim = dim                 # known from the spec: no model load needed
+        self._queries = OrderedDict()   # query text -> embedding (LRU)
+        self._queries_size = query_cache_size
+        self._queries_lock = threading.Lock()
+
+    @property
+    def model(self):
+        return _load_model(self.model_name)
+
+    @property
+    def dim(self):
+        if self._dim is None:
+            self._dim = int(self.model.get_sentence_embedding_dimension())
+        return self._dim
+
+    # ---------------- ENCODE ----------------
+    def fit_transform(self, texts):
+        return self.transform(texts)  # pretrained: nothing to fit on the corpus
+
+    def transform(self, texts):
+        """Document embeddings (n x dim, float32, unit length); disk cache first."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+        cached = self.cache.get_many(keys) if self.cache else {}
+
+        first = {}  # key -> first position, so duplicate chunks encode once
+        for i, key in enumerate(keys):
+            first.setdefault(key, i)
+        missing = [key for key in first if key not in cached]
+        if missing:
+            vectors = self._encode([texts[first[key]] for key in missing])
+            cached.update(zip(missing, vectors))
+            if self.cache:
+                self.cache.put_many(zip(missing, vectors))
+        return np.vstack([cached[key] for key in keys]).astype(np.float32)
+
+    def transform_queries(self, queries):
+        """Query embeddings through the LRU (queries repeat; documents don't)."""
+        queries = list(queries)
+        with self._queries_lock:
+            hits = {q: self._queries[q] for q in queries if q in self._queries}
+            for q in hits:
+                self._queries.move_to_end(q)
+        misses = list(dict.fromkeys(q for q in queries if q not in hits))
+        if misses:
+            encoded = dict(zip(misses, self._encode(misses)))
+            hits.update(encoded)
+            with self._queries_lock:
+                self._queries.update(encoded)
+                while len(self._queries) > self._queries_size:
+                    self._queries.popitem(last=False)
+        return np.vstack([hits[q] for q in queries]).astype(np.float32)
+
+    def _encode(self, texts):
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        encode = self._encode_batch
+        if len(batches) > 1 and EMBED_WORKERS > 1:
+            parts = list(_encode_pool().map(encode, batches))
+        else:
+            parts = [encode(batch) for batch in batches]
+        return np.vstack(parts)
+
+    def _encode_batch(self, texts):
+        return self.model.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True,
+            normalize_embeddings=True, show_progress_bar=False,
+        ).astype(np.float32)
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def nbytes(self):
+        """Model weights, once loaded (shared by every engine using this model)."""
+        if self.model_name not in _models:
+            return 0
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+    # ---------------- PERSISTENCE ----------------
+    def spec(self):
+        return {"format_version": SPEC_VERSION, "kind": self.kind, "model": self.model_name, "dim": self.dim}
+
+
+def _spec_checksum(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def save_embedder(vectorizer, path):
+    """Write the embedder artifact to `path`. Returns its checksum."""
+    if not isinstance(vectorizer, SentenceEmbedder):
+        return save_vectorizer(vectorizer, path)
+
+    spec = vectorizer.spec()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, indent=2)
+    os.replace(tmp_path, path)
+    return _spec_checksum(spec)
+
+
+def load_embedder(kind, path, expected_checksum=None, cache_path=None):
+    """Fitted TfidfVectorizer or SentenceEmbedder, checked against the manifest."""
+    check_embedder(kind)
+    if kind == "tfidf":
+        return load_vectorizer(path, expected_checksum=expected_checksum)
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Embedder spec not found at {path}. Run ingestion first.")
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    if spec.get("format_version") != SPEC_VERSION:
+        raise ValueError(f"❌ Unsupported embedder spec v{spec.get('format_version')}. Re-run ingestion.")
+    if expected_checksum is not None and _spec_checksum(spec) != expected_checksum:
+        raise ValueError(f"❌ Embedder spec {path} does not match the FAISS index. Re-run ingestion.")
+    return SentenceEmbedder(spec["model"], cache_path=cache_path, dim=spec["dim"])
+
+
+def encode_queries(vectorizer, queries):
+    """Query vectors: LRU-cached for sentence models, a plain transform for TF-IDF."""
+    if isinstance(vectorizer, SentenceEmbedder):
+        return vectorizer.transform_queries(queries)
+    return vectorizer.transform(queries)
@@ -0,0 +1,137 @@
+"""
+Metadata filters pushed down into the index search.
+
+    doc_types           only these doc types
+    min_version         numeric version >= this (unversioned chunks fail)
+    max_version         numeric version <= this
+    exclude_deprecated  drop deprecated chunks
+
+A filter is compiled against the risk facts' per-vector columns: one bitmap
+per doc type / version / flag value is computed once and cached on the facts,
+and a filter is the OR / AND of those. The result is an IdFilter, a bitmap
+over vector ids (bit i = id i) that FAISS reads through IDSelectorBitmap and
+the sparse and BM25 indexes test while scanning postings, so non-matching
+vectors are never scored and every search still returns up to top_k hits.
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Sequence
+
+import faiss
+import numpy as np
+
+# versions a range can compare ("2.0"); others ("unknown", "beta") never match one
+NUMERIC_VERSION = re.compile(r"^\d+\.\d+$")
+
+
+class SearchFilter:
+    """Normalized predicate; `key` is hashable so compiled bitmaps can be cached."""
+
+    def __init__(
+        self,
+        doc_types: Optional[Iterable[str]] = None,
+        min_version: Optional[str] = None,
+        max_version: Optional[str] = None,
+        exclude_deprecated: bool = False,
+    ):
+        if isinstance(doc_types, str):
+            doc_types = [doc_types]
+        self.doc_types = tuple(sorted(set(doc_types))) if doc_types is not None else None
+        self.min_version = float(min_version) if min_version is not None else None
+        self.max_version = float(max_version) if max_version is not None else None
+        self.exclude_deprecated = bool(exclude_deprecated)
+
+    @classmethod
+    def from_dict(cls, spec: Optional[Dict]) -> Optional["SearchFilter"]:
+        """{"doc_types": [...], "min_version": "2.0", ...} -> filter (None / {} -> no filter)."""
+        if not spec:
+            return None
+        unknown = set(spec) - {"doc_types", "min_version", "max_version", "exclude_deprecated"}
+        if unknown:
+            raise ValueError(f"Unknown filter fields: {sorted(unknown)}")
+        search_filter = cls(**spec)
+        return None if search_filter.is_empty() else search_filter
+
+    @property
+    def key(self):
+        return (self.doc_types, self.min_version, self.max_version, self.exclude_deprecated)
+
+    def is_empty(self) -> bool:
+        return self.key == (None, None, None, False)
+
+    def compile(self, facts) -> "IdFilter":
+        """-> IdFilter over the vector ids of `facts` (a RiskFacts)."""
+        keep = np.ones(len(facts), dtype=bool)
+
+        if self.doc_types is not None:
+            wanted = [i for i, name in enumerate(facts.doc_types) if name in self.doc_types]
+            keep &= _any(facts, "doc_type_id", wanted)
+
+        if self.min_version is not None or self.max_version is not None:
+            lo = -np.inf if self.min_version is None else self.min_version
+            hi = np.inf if self.max_version is None else self.max_version
+            wanted = [
+                i for i, version in enumerate(facts.versions)
+                if NUMERIC_VERSION.match(version) and lo <= float(version) <= hi
+            ]
+            keep &= _any(facts, "version_id", wanted)
+
+        if self.exclude_deprecated:
+            keep &= ~facts.is_deprecated
+
+        return IdFilter.from_ids(facts.ids[keep])
+
+
+def as_filter(filters) -> Optional[SearchFilter]:
+    """SearchFilter, dict spec or None -> SearchFilter or None (no filtering)."""
+    if filters is None or isinstance(filters, SearchFilter):
+        return None if filters is None or filters.is_empty() else filters
+    return SearchFilter.from_dict(filters)
+
+
+def _any(facts, column: str, values: Sequence[int]) -> np.ndarray:
+    out = np.zeros(len(facts), dtype=bool)
+    for value in values:
+        out |= facts.value_mask(column, value)
+    return out
+
+
+class IdFilter:
+    """Allowed vector ids as a little-endian bitmap (bit i of byte i >> 3)."""
+
+    def __init__(self, bits: np.ndarray, count: int):
+        self.bits = bits
+        self.count = count
+
+    @classmethod
+    def from_ids(cls, ids) -> "IdFilter":
+        ids = np.asarray(ids, dtype=np.int64)
+        mask = np.zeros(int(ids.max()) + 1 if len(ids) else 0, dtype=bool)
+        mask[ids] = True
+        return cls(np.packbits(mask, bitorder="little"), len(ids))
+
+    def contains(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        byte = ids >> 3
+        inside = (ids >= 0) & (byte < len(self.bits))
+        out = np.zeros(ids.shape, dtype=bool)
+        out[inside] = ((self.bits[byte[inside]] >> (ids[inside] & 7)) & 1) == 1
+        return out
+
+    def faiss_params(self, index):
+        """
+        SearchParameters for one faiss index, carrying its own nprobe /
+        efSearch (a params object overrides the index's). Built per call:
+        IndexIDMap rewrites params.sel while it searches.
+        """
+        selector = faiss.IDSelectorBitmap(len(self.bits), faiss.swig_ptr(self.bits))
+        inner = index.index if isinstance(index, faiss.IndexIDMap) else index
+        ivf = faiss.try_extract_index_ivf(inner)
+        if ivf is not None:
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+        elif isinstance(faiss.downcast_index(inner), faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=faiss.downcast_index(inner).hnsw.efSearch)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        params.selector_ref = selector  # the swig params object doesn't own its selector
+        return params
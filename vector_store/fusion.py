@@ -0,0 +1,62 @@
+"""
+Fusing the vector and BM25 rankings of one query.
+
+    rrf       reciprocal rank fusion: sum of 1 / (rrf_k + rank) over the
+              lists a doc appears in; needs no score calibration
+    weighted  weight * vector similarity + (1 - weight) * BM25, each
+              min-max normalized within its own list
+
+Both take ranked (vector id, score) lists: vector scores are L2 distances
+(lower is better), BM25 scores are higher-is-better. They return
+[(vector id, fused score)] best first.
+
+relevance() puts any of these rankings on one 0..1 higher-is-better scale,
+so version-aware re-ranking can add the same priors in every mode.
+"""
+
+FUSION_METHODS = ("rrf", "weighted")
+RRF_K = 60
+
+
+def rrf(vector_hits, bm25_hits, k=RRF_K):
+    fused = {}
+    for hits in (vector_hits, bm25_hits):
+        for rank, (doc_id, _) in enumerate(hits, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+def weighted(vector_hits, bm25_hits, weight=0.5):
+    fused = {}
+    for hits, w, lower_is_better in ((vector_hits, weight, True), (bm25_hits, 1 - weight, False)):
+        if not hits:
+            continue
+        scores = [score for _, score in hits]
+        lo, hi = min(scores), max(scores)
+        for doc_id, score in hits:
+            if hi == lo:
+                goodness = 1.0
+            else:
+                goodness = (hi - score if lower_is_better else score - lo) / (hi - lo)
+            fused[doc_id] = fused.get(doc_id, 0.0) + w * goodness
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+def fuse(vector_hits, bm25_hits, method="rrf", weight=0.5, rrf_k=RRF_K):
+    if method == "rrf":
+        return rrf(vector_hits, bm25_hits, rrf_k)
+    if method == "weighted":
+        return weighted(vector_hits, bm25_hits, weight)
+    raise ValueError(f"Unknown fusion method '{method}' (expected one of {FUSION_METHODS})")
+
+
+def relevance(hits, mode):
+    """
+    Ranked hits of `mode` -> [(vector id, relevance)]: cosine similarity for
+    vector hits (squared L2 between unit vectors is 2 - 2cos), score / best
+    score for BM25 and fused hits.
+    """
+    if mode == "vector":
+        return [(doc_id, 1.0 - score / 2) for doc_id, score in hits]
+    best = max((score for _, score in hits), default=0.0)
+    return [(doc_id, score / best if best > 0 else 0.0) for doc_id, score in hits]
@@ -0,0 +1,98 @@
+"""
+Index manifest: small JSON file describing the artifacts that belong together
+(FAISS index + vectorizer + text and document stores + BM25 index). Written last on save, read first on load.
+
+Derived artifacts (risk facts, shingle and identifier indexes) are written
+before the manifest under generation-suffixed names that the manifest lists,
+so a reader always gets the ones built with the index it opened. Manifests
+without an "artifacts" entry fall back to the unsuffixed names.
+"""
+
+import glob
+import json
+import os
+
+MANIFEST_VERSION = 8
+
+# kind -> unsuffixed file name
+ARTIFACTS = {
+    "facts": "risk_facts.npz",
+    "shingles": "shingle_index.npz",
+    "identifiers": "identifier_index.json",
+}
+
+
+def write_manifest(path, manifest):
+    manifest = dict(manifest, format_version=MANIFEST_VERSION)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Index manifest not found at {path}. Run ingestion first.")
+
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format_version") != MANIFEST_VERSION:
+        raise ValueError(
+            f"❌ Unsupported index manifest v{manifest.get('format_version')} "
+            f"(expected v{MANIFEST_VERSION}). Re-run ingestion."
+        )
+    return manifest
+
+
+def check_index(manifest, index):
+    """Reject an index that doesn't match what the manifest recorded."""
+    if index.d != manifest["dim"] or index.ntotal != manifest["ntotal"]:
+        raise ValueError(
+            f"❌ FAISS index ({index.ntotal} x {index.d}) does not match manifest "
+            f"({manifest['ntotal']} x {manifest['dim']}). Re-run ingestion."
+        )
+
+
+def check_texts(manifest, texts):
+    """Reject a text store that doesn't match what the manifest recorded."""
+    if len(texts) != manifest["texts"]["count"]:
+        raise ValueError(
+            f"❌ Text store has {len(texts)} texts, manifest expects "
+            f"{manifest['texts']['count']}. Re-run ingestion."
+        )
+
+
+def check_bm25(manifest, bm25):
+    """Reject a BM25 index that doesn't match what the manifest recorded."""
+    if bm25.ntotal != manifest["bm25"]["ntotal"]:
+        raise ValueError(
+            f"❌ BM25 index has {bm25.ntotal} docs, manifest expects "
+            f"{manifest['bm25']['ntotal']}. Re-run ingestion."
+        )
+
+
+# ---------------- DERIVED ARTIFACTS ----------------
+def artifact_name(kind, generation):
+    """risk_facts.npz -> risk_facts.<generation>.npz"""
+    stem, ext = os.path.splitext(ARTIFACTS[kind])
+    return f"{stem}.{generation}{ext}"
+
+
+def artifact_path(data_dir, manifest, kind):
+    """Path of the derived artifact that belongs to this manifest's generation."""
+    name = (manifest or {}).get("artifacts", {}).get(kind, ARTIFACTS[kind])
+    return os.path.join(data_dir, name)
+
+
+def prune_artifacts(data_dir, keep):
+    """
+    Delete derived artifacts of other generations. `keep` holds the file names
+    still referenced (current + previous manifest), so a reader that just read
+    the previous manifest can still open its files.
+    """
+    for kind, name in ARTIFACTS.items():
+        stem, ext = os.path.splitext(name)
+        for path in glob.glob(os.path.join(data_dir, f"{stem}*{ext}")):
+            if os.path.basename(path) not in keep:
+                os.remove(path)
@@ -0,0 +1,165 @@
+"""
+Sharded index: one dataset split over N indexes of the same backend/type.
+
+Every shard is vectorized with the dataset's single vectorizer, so distances
+from different shards are directly comparable: a query fans out to all
+shards in parallel and the coordinator merges their top-k lists. New
+vectors go to the smallest shards first, so ingest keeps shard sizes even
+after removals.
+
+Shards are searched on a shared thread pool (FAISS and the sparse index
+release the GIL in their heavy loops) or, with GHOSTTRACE_SHARD_EXECUTOR=
+process, in worker processes that memory-map the shard files themselves.
+A metadata filter (IdFilter bitmap) travels with the query to every shard.
+
+    GHOSTTRACE_SHARD_EXECUTOR  thread (default) | process
+    GHOSTTRACE_SHARD_WORKERS   pool size (default: CPU count)
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+SHARD_EXECUTOR = os.getenv("GHOSTTRACE_SHARD_EXECUTOR", "thread")
+SHARD_WORKERS = int(os.getenv("GHOSTTRACE_SHARD_WORKERS", os.cpu_count() or 4))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# worker processes: (path, inode) -> memory-mapped shard
+_worker_shards = {}
+
+
+def _pool(kind):
+    with _pools_lock:
+        if kind not in _pools:
+            if kind == "process":
+                _pools[kind] = ProcessPoolExecutor(max_workers=SHARD_WORKERS)
+            else:
+                _pools[kind] = ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="ghosttrace-shard")
+        return _pools[kind]
+
+
+class StaleShard(Exception):
+    """The shard file was replaced by a newer generation."""
+
+
+def _search_file(source, queries, k, id_filter=None):
+    """Runs in a worker process: search a shard file, mapping it on first use."""
+    from .backends import read_index, search_index
+
+    backend, path, inode, index_type, params = source
+    shard = _worker_shards.get((path, inode))
+    if shard is None:
+        try:
+            if os.stat(path).st_ino != inode:
+                raise StaleShard(path)
+        except FileNotFoundError:
+            raise StaleShard(path)
+        shard = read_index(backend, path, index_type, params, mmap=True)
+        # a shard of the previous generation is never asked for again
+        for key in [key for key in _worker_shards if key[0] == path]:
+            del _worker_shards[key]
+        _worker_shards[(path, inode)] = shard
+    return search_index(shard, queries, k, id_filter)
+
+
+def fill_counts(sizes, n):
+    """How many of `n` new vectors each shard gets so sizes end up as even as possible."""
+    sizes = np.asarray(sizes, dtype=np.int64)
+    lo, hi = int(sizes.min()), int(sizes.max()) + n
+    while lo < hi:  # highest level every shard can be raised to with n vectors
+        mid = (lo + hi + 1) // 2
+        if np.maximum(mid - sizes, 0).sum() <= n:
+            lo = mid
+        else:
+            hi = mid - 1
+    counts = np.maximum(lo - sizes, 0)
+    extra = n - int(counts.sum())
+    counts[np.flatnonzero(sizes <= lo)[:extra]] += 1
+    return counts
+
+
+def merge_results(results, k):
+    """Per-shard (D, I) lists -> global top-k by distance (-1 padding last)."""
+    distances = np.hstack([d for d, _ in results]).astype(np.float32)
+    indices = np.hstack([i for _, i in results]).astype(np.int64)
+    distances[indices < 0] = np.inf
+
+    order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    distances = np.take_along_axis(distances, order, axis=1)
+    indices = np.take_along_axis(indices, order, axis=1)
+    return distances, indices
+
+
+class ShardedIndex:
+    """Same interface as a FAISS index / SparseIndex, over `shards`."""
+
+    def __init__(self, shards, sources=None, executor=None):
+        self.shards = list(shards)
+        # (backend, path, inode, index_type, params) per shard, when loaded from files
+        self.sources = sources
+        self.executor = executor or SHARD_EXECUTOR
+
+    @property
+    def ntotal(self):
+        return sum(shard.ntotal for shard in self.shards)
+
+    @property
+    def d(self):
+        return self.shards[0].d
+
+    @property
+    def is_trained(self):
+        return all(shard.is_trained for shard in self.shards)
+
+    def __len__(self):
+        return len(self.shards)
+
+    # ---------------- BUILD ----------------
+    def train(self, vectors):
+        """Train once; empty shards share the trained coarse quantizer / codebooks."""
+        import faiss
+
+        self.shards[0].train(vectors)
+        if isinstance(self.shards[0], faiss.Index):
+            self.shards[1:] = [faiss.clone_index(self.shards[0]) for _ in self.shards[1:]]
+
+    def add_with_ids(self, vectors, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        counts = fill_counts([shard.ntotal for shard in self.shards], len(ids))
+        start = 0
+        for shard, count in zip(self.shards, counts):
+            if count:
+                shard.add_with_ids(vectors[start:start + count], ids[start:start + count])
+            start += count
+
+    def remove_ids(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        return sum(int(shard.remove_ids(ids)) for shard in self.shards)
+
+    # ---------------- SEARCH ----------------
+    def search(self, queries, k, id_filter=None):
+        from .backends import search_index
+
+        if self.executor == "process" and self.sources:
+            futures = [
+                _pool("process").submit(_search_file, source, queries, k, id_filter)
+                for source in self.sources
+            ]
+            results = []
+            for shard, future in zip(self.shards, futures):
+                try:
+                    results.append(future.result())
+                except StaleShard:
+                    # files already belong to a newer generation; use our own mapping
+                    results.append(search_index(shard, queries, k, id_filter))
+        else:
+            futures = [
+                _pool("thread").submit(search_index, shard, queries, k, id_filter)
+                for shard in self.shards
+            ]
+            results = [future.result() for future in futures]
+        return merge_results(results, k)
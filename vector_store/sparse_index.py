@@ -0,0 +1,177 @@
+"""
+Sparse-native retrieval backend.
+
+Keeps TF-IDF vectors as an inverted index (CSC: one posting list per term) and
+scores a query by walking only the posting lists of the terms it contains.
+Nothing is ever densified to vocabulary width.
+
+search() mirrors faiss.IndexIDMap.search(): it returns (distances, ids) arrays
+of shape (n_queries, k) with squared-L2 distances, computed from the cosine
+dot product as |q|^2 + |x|^2 - 2 q.x. Rankings and scores therefore match the
+dense IndexFlatL2 path exactly.
+
+Added rows are buffered and stacked into the postings once, on the next
+search / remove / save, so many small adds cost one O(nnz) rebuild instead
+of one per add.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class SparseIndex:
+    is_trained = True  # nothing to train: exact search over the postings
+
+    def __init__(self, dim):
+        self.d = dim
+        self.postings = sp.csc_matrix((0, dim), dtype=np.float32)
+        self.sq_norms = np.zeros(0, dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self._pending = []  # (csr rows, ids) added since the last _flush()
+        self._by_norm = None  # rows by ascending norm, for docs no query term touches
+
+    @property
+    def ntotal(self):
+        return self.postings.shape[0] + sum(len(ids) for _, ids in self._pending)
+
+    def train(self, vectors):
+        pass
+
+    # ---------------- ADD ----------------
+    def add(self, vectors):
+        known = [self.ids, *(ids for _, ids in self._pending)]
+        start = max((int(ids.max()) + 1 for ids in known if len(ids)), default=0)
+        self.add_with_ids(vectors, np.arange(start, start + vectors.shape[0]))
+
+    def add_with_ids(self, vectors, ids):
+        vectors = sp.csr_matrix(vectors, dtype=np.float32)
+        if vectors.shape[1] != self.d:
+            raise ValueError(f"Expected {self.d}-dim vectors, got {vectors.shape[1]}")
+        self._pending.append((vectors, np.asarray(ids, dtype=np.int64)))
+
+    def _flush(self):
+        """Stack the buffered rows into the CSC postings in one go."""
+        if not self._pending:
+            return
+        blocks, ids = zip(*self._pending)
+        self._pending = []
+        self.postings = sp.vstack([self.postings, *blocks], format="csc")
+        self.postings.sort_indices()
+        self.sq_norms = np.concatenate([
+            self.sq_norms,
+            *(np.asarray(b.multiply(b).sum(axis=1), dtype=np.float32).ravel() for b in blocks),
+        ])
+        self.ids = np.concatenate([self.ids, *ids])
+        self._by_norm = None
+
+    # ---------------- REMOVE ----------------
+    def remove_ids(self, ids):
+        self._flush()
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        removed = int((~keep).sum())
+        if removed:
+            self.postings = self.postings[keep]
+            self.sq_norms = self.sq_norms[keep]
+            self.ids = self.ids[keep]
+            self._by_norm = None
+        return removed
+
+    # ---------------- SEARCH ----------------
+    def search(self, queries, k, id_filter=None):
+        """id_filter: IdFilter of the vector ids that may be returned (default: all)."""
+        self._flush()
+        queries = sp.csr_matrix(queries, dtype=np.float32)
+        n_q = queries.shape[0]
+        distances = np.full((n_q, k), np.inf, dtype=np.float32)
+        indices = np.full((n_q, k), -1, dtype=np.int64)
+
+        for qi in range(n_q):
+            row = queries.getrow(qi)
+            q_sq = float(row.multiply(row).sum())
+            docs, dots = self._dot(row.indices, row.data)
+            if id_filter is not None:
+                allowed = id_filter.contains(self.ids[docs])
+                docs, dots = docs[allowed], dots[allowed]
+
+            dist = q_sq + self.sq_norms[docs] - 2.0 * dots
+            order = self._top_k(dist, k)
+            found_d = dist[order]
+            found_i = docs[order]
+
+            # docs sharing no term with the query are at |q|^2 + |x|^2, which
+            # can beat a touched doc: the k smallest-norm ones compete too
+            if self.ntotal > len(docs):
+                pad_i = self._untouched(docs, k, id_filter)
+                pad_d = (q_sq + self.sq_norms[pad_i]).astype(np.float32)
+                merged_d = np.concatenate([found_d, pad_d])
+                merged_i = np.concatenate([found_i, pad_i])
+                order = np.argsort(merged_d, kind="stable")[:k]
+                found_d, found_i = merged_d[order], merged_i[order]
+
+            distances[qi, :len(found_i)] = found_d
+            indices[qi, :len(found_i)] = self.ids[found_i]
+
+        return distances, indices
+
+    def _dot(self, terms, weights):
+        """Inverted-index dot product: touch only postings of the query terms."""
+        indptr = self.postings.indptr
+        starts, ends = indptr[terms], indptr[terms + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        spans = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        doc_ids = self.postings.indices[spans]
+        contrib = self.postings.data[spans] * np.repeat(weights, lengths)
+
+        docs, inverse = np.unique(doc_ids, return_inverse=True)
+        dots = np.bincount(inverse, weights=contrib).astype(np.float32)
+        return docs.astype(np.int64), dots
+
+    @staticmethod
+    def _top_k(dist, k):
+        if len(dist) > k:
+            part = np.argpartition(dist, k - 1)[:k]
+            return part[np.argsort(dist[part], kind="stable")]
+        return np.argsort(dist, kind="stable")
+
+    def _untouched(self, touched, n, id_filter=None):
+        mask = np.ones(self.ntotal, dtype=bool) if id_filter is None else id_filter.contains(self.ids)
+        mask[touched] = False
+        if self._by_norm is None:
+            self._by_norm = np.argsort(self.sq_norms, kind="stable")
+        return self._by_norm[mask[self._by_norm]][:n]
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self, path):
+        self._flush()
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                dim=np.int64(self.d),
+                data=self.postings.data,
+                indices=self.postings.indices,
+                indptr=self.postings.indptr,
+                sq_norms=self.sq_norms,
+                ids=self.ids,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            index = cls(int(z["dim"]))
+            n_docs = len(z["sq_norms"])
+            index.postings = sp.csc_matrix(
+                (z["data"], z["indices"], z["indptr"]),
+                shape=(n_docs, index.d),
+            )
+            index.sq_norms = z["sq_norms"]
+            index.ids = z["ids"]
+        return index
+
+    def nbytes(self):
+        self._flush()
+        p = self.postings
+        return (p.data.nbytes + p.indices.nbytes + p.indptr.nbytes
+                + self.sq_norms.nbytes + self.ids.nbytes)
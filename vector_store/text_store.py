@@ -0,0 +1,133 @@
+"""
+On-disk chunk text store.
+
+Every chunk's text lives in one binary file next to the index, addressed by
+vector id (slot = id - first_id; removed ids are empty slots). Readers
+memory-map it and decode a text only when a search hit needs it, so startup
+is O(1) and N workers on one box share the page cache instead of each
+holding a JSON-decoded copy. Layout (little endian):
+
+    MAGIC (8 bytes) | header length (uint32) | header JSON | pad to 8 bytes
+    offsets   int64[n_slots + 1]   (byte offsets into the text blob)
+    texts     utf-8 blob           (slot i = blob[offsets[i]:offsets[i+1]])
+"""
+
+import json
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+MAGIC = b"GTTEXTS\0"
+FORMAT_VERSION = 2
+
+
+def save_texts(texts, ids, path):
+    """Write `texts` keyed by their vector `ids` to `path` atomically. Returns the count."""
+    order = np.argsort(np.asarray(ids, dtype=np.int64), kind="stable")
+    writer = TextWriter(path)
+    for i in order:
+        writer.append(int(ids[i]), texts[i])
+    return writer.close()
+
+
+class TextWriter:
+    """
+    Streams texts to disk in ascending id order; only one int64 length per
+    slot stays in memory. Texts go to a `.blob` spill file as they arrive and
+    close() assembles the final file next to it, then swaps it in atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.first_id = None
+        self.count = 0
+        self._lengths = array("q")
+        self._blob_path = f"{path}.blob"
+        self._blob = open(self._blob_path, "wb")
+
+    def append(self, doc_id, text):
+        if self.first_id is None:
+            self.first_id = doc_id
+        slot = doc_id - self.first_id
+        if slot < len(self._lengths):
+            raise ValueError(f"❌ Text ids must be increasing, got {doc_id}")
+
+        self._lengths.extend([0] * (slot - len(self._lengths)))  # removed ids
+        data = text.encode("utf-8")
+        self._blob.write(data)
+        self._lengths.append(len(data))
+        self.count += 1
+
+    def close(self):
+        """Write header + offsets + spilled texts to `path`. Returns the count."""
+        self._blob.close()
+
+        n_slots = len(self._lengths)
+        offsets = np.zeros(n_slots + 1, dtype="<i8")
+        np.cumsum(np.frombuffer(self._lengths, dtype=np.int64), out=offsets[1:])
+
+        header = json.dumps({
+            "format_version": FORMAT_VERSION,
+            "n_texts": self.count,
+            "n_slots": n_slots,
+            "first_id": self.first_id or 0,
+            "n_bytes": int(offsets[-1]),
+        }).encode("utf-8")
+        pad = -(len(MAGIC) + 4 + len(header)) % 8
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f, open(self._blob_path, "rb") as blob:
+            f.write(MAGIC)
+            f.write(np.uint32(len(header)).astype("<u4").tobytes())
+            f.write(header)
+            f.write(b"\0" * pad)
+            f.write(offsets.tobytes())
+            shutil.copyfileobj(blob, f, 1 << 20)
+        os.replace(tmp_path, self.path)
+        os.remove(self._blob_path)
+
+        return self.count
+
+
+class TextStore:
+    """Read-only, lazily decoded id -> text mapping backed by np.memmap."""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ Text store not found at {path}. Run ingestion first.")
+
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"❌ {path} is not a GhostTrace text store")
+            header_len = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        if header["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"❌ Unsupported text store v{header['format_version']} "
+                f"(expected v{FORMAT_VERSION}). Re-run ingestion."
+            )
+
+        n = header["n_slots"]
+        start = len(MAGIC) + 4 + header_len + (-(len(MAGIC) + 4 + header_len) % 8)
+        expected_size = start + 8 * (n + 1) + header["n_bytes"]
+        if os.path.getsize(path) != expected_size:
+            raise ValueError(f"❌ Text store {path} is truncated or corrupt")
+
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        self.path = path
+        self.count = header["n_texts"]
+        self.first_id = header["first_id"]
+        self._offsets = raw[start:start + 8 * (n + 1)].view("<i8")
+        self._blob = raw[start + 8 * (n + 1):]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, doc_id):
+        slot = doc_id - self.first_id
+        if not 0 <= slot < len(self._offsets) - 1:
+            raise KeyError(doc_id)
+        return self._blob[self._offsets[slot]:self._offsets[slot + 1]].tobytes().decode("utf-8")
@@ -1,93 +1,507 @@
+import glob
+import numbers
 import os
-import json
+import uuid
+from collections import Counter
+
 import numpy as np
-import faiss
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from .backends import (
+    new_index, resolve_params, prepare_vectors, save_index, open_index, search_refined, shard_paths,
+    supports_remove,
+)
+from .manifest import write_manifest, read_manifest, check_index, check_texts, check_bm25, artifact_path
+from .text_store import save_texts, TextStore, TextWriter
+from .doc_store import DocStore
+from .bm25_index import BM25Index
+from .filters import as_filter
+from .fusion import fuse, relevance
+from .embedders import SentenceEmbedder, check_embedder, encode_queries, save_embedder, load_embedder
+
 
 class VectorStore:
     def __init__(
         self,
         index_path="data_ingestion/faiss.index",
-        meta_path="data_ingestion/vector_metadata.json",
-        text_path="data_ingestion/vector_texts.json",
+        docs_path="data_ingestion/documents.db",
+        text_path="data_ingestion/vector_texts.bin",
+        vectorizer_path="data_ingestion/tfidf_vectorizer.bin",
+        embedder_path="data_ingestion/embedder.json",
+        embedding_cache_path="data_ingestion/embedding_cache.db",
+        manifest_path="data_ingestion/index_manifest.json",
+        sparse_index_path="data_ingestion/sparse_index.npz",
+        bm25_path="data_ingestion/bm25_index.npz",
+        facts_path="data_ingestion/risk_facts.npz",
+        backend="faiss",
+        index_type="flat",
+        index_params=None,
+        shards=1,
+        embedder="tfidf",
+        embedding_model=None,
     ):
         self.index_path = index_path
-        self.meta_path = meta_path
+        self.docs_path = docs_path
         self.text_path = text_path
+        self.vectorizer_path = vectorizer_path
+        self.embedder_path = embedder_path
+        self.embedding_cache_path = embedding_cache_path
+        self.manifest_path = manifest_path
+        self.sparse_index_path = sparse_index_path
+        self.bm25_path = bm25_path
+        self.facts_path = facts_path
+        self.backend = backend
+        self.index_type = index_type      # flat | ivf | hnsw | ivfpq | pq (faiss only)
+        self.index_params = index_params or {}
+        self.shards = shards              # >1: ShardedIndex, searched in parallel
+        self.embedder = embedder          # tfidf | sentence (see embedders.py)
+        check_embedder(embedder, backend)
 
-        self.vectorizer = TfidfVectorizer(stop_words="english")
+        if embedder == "sentence":
+            self.vectorizer = SentenceEmbedder(embedding_model, cache_path=embedding_cache_path)
+        else:
+            self.vectorizer = TfidfVectorizer(stop_words="english")
         self.texts = []
         self.metadata = []
+        self.ids = []
         self.index = None
+        self.bm25 = None          # BM25Index over the same ids, for hybrid search
+        self.docs = None          # DocStore once saved/loaded
+        self.facts = None         # RiskFacts for rerank / filtered search, set by the caller
+        self.mmap = False
+
+        self.next_id = 0
+        self.generation = None
+        self._pos = {}        # vector id -> position in texts/metadata
+        self._pending = []    # ids added since the last build()/update()
+        self._rebuilt = False # build() ran: stored chunk rows are stale
+        self._streamed = None # (first_id, staged text path) after build_streaming()
 
     # ---------------- ADD DOC ----------------
     def add_document(self, text, meta):
+        """Stage a document; returns its stable vector id."""
+        doc_id = self.next_id
+        self.next_id += 1
+
+        self._pos[doc_id] = len(self.ids)
         self.texts.append(text)
-        self.metadata.append(meta)
+        self.metadata.append(dict(meta, id=doc_id))
+        self.ids.append(doc_id)
+        self._pending.append(doc_id)
+        return doc_id
+
+    # ---------------- REMOVE ----------------
+    def remove_ids(self, ids):
+        ids = set(ids)
+        if not ids:
+            return 0
+
+        if self.index is not None:
+            if not supports_remove(self.backend, self.index_type):
+                raise ValueError(f"❌ {self.index_type} index can't remove vectors; do a full build")
+            self.index.remove_ids(np.array(sorted(ids), dtype="int64"))
+        if self.bm25 is not None:
+            self.bm25.remove_ids(ids)
+
+        keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in ids]
+        removed = len(self.ids) - len(keep)
+        self.texts = [self.texts[i] for i in keep]
+        self.metadata = [self.metadata[i] for i in keep]
+        self.ids = [self.ids[i] for i in keep]
+        self._pos = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._pending = [doc_id for doc_id in self._pending if doc_id not in ids]
+        return removed
+
+    def remove_file(self, filename):
+        return self.remove_ids(
+            meta["id"] for meta in self.metadata if meta["file"] == filename
+        )
 
     # ---------------- BUILD ----------------
     def build(self):
         if not self.texts:
             raise ValueError("No documents to vectorize")
 
-        vectors = self.vectorizer.fit_transform(self.texts).toarray()
-        dim = vectors.shape[1]
+        vectors = prepare_vectors(self.backend, self.vectorizer.fit_transform(self.texts))
+
+        # resolve corpus-dependent sizes (nlist, PQ codes) so save() records them
+        self.index_params = resolve_params(
+            self.index_type, self.index_params, n_train=len(self.ids), dim=vectors.shape[1]
+        )
+        self.index = new_index(
+            self.backend, vectors.shape[1], self.index_type, self.index_params, shards=self.shards
+        )
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add_with_ids(vectors, np.array(self.ids, dtype="int64"))
+        self.bm25 = BM25Index.build([(self.texts, self.ids)])
+        self._pending = []
+        self._rebuilt = True
+
+        print(f"✅ {self.backend}/{self.index_type} index built with {self.index.ntotal} vectors")
+
+    # ---------------- STREAMING BUILD ----------------
+    def build_streaming(self, docs, batch_size=1024, max_terms=1_000_000, max_features=None,
+                        train_size=20_000):
+        """
+        Full build from an iterable of (text, meta) pairs without holding the
+        corpus in memory. Pass 1 spills texts to disk and chunk rows to the doc
+        store while counting document frequencies; pass 2 reads the texts back
+        and adds vectors to the index `batch_size` at a time.
+
+        The df table is pruned to its most frequent half whenever it exceeds
+        `max_terms`, so vocabulary/IDF are exact below that size and an
+        approximation above it. The vectorizer's min_df / max_df then prune it as
+        fit() would. `max_features` keeps the top terms by df (dense
+        backends need it on large corpora: dim = vocabulary size). Each meta
+        gets its vector id under "id" as it is consumed. After this the store
+        serves from disk like load(mmap=True).
+        """
+        first_id = self.next_id
+        staged = f"{self.text_path}.building"
+        writer = TextWriter(staged)
+        self.docs = DocStore(self.docs_path, create=True)
+        analyzer = self.vectorizer.build_analyzer() if self.embedder == "tfidf" else None
+        df = Counter()
+        rows = []
+
+        for text, meta in docs:
+            meta["id"] = self.next_id
+            self.next_id += 1
+            writer.append(meta["id"], text)
+            rows.append(meta)
+            if len(rows) >= batch_size:
+                self.docs.put_chunks(rows)
+                rows = []
+
+            if analyzer is not None:  # TF-IDF: vocabulary + IDF come from df
+                df.update(set(analyzer(text)))
+                if len(df) > max_terms:
+                    df = Counter(dict(df.most_common(max_terms // 2)))
+        self.docs.put_chunks(rows)
+        n_docs = writer.close()
+        if not n_docs:
+            raise ValueError("No documents to vectorize")
+
+        if self.embedder == "tfidf":
+            self._set_vocabulary(df, n_docs, max_features)
+        self.texts = TextStore(staged)
+
+        dim = self.embedding_dim
+        self.index_params = resolve_params(self.index_type, self.index_params, n_train=n_docs, dim=dim)
+        self.index = new_index(self.backend, dim, self.index_type, self.index_params, shards=self.shards)
+        if not self.index.is_trained:
+            sample = np.random.default_rng(0).choice(n_docs, min(n_docs, train_size), replace=False)
+            self.index.train(self._vectorize(np.sort(sample) + first_id))
+
+        # (the sparse index buffers these and stacks its postings once, on save)
+        for start in range(first_id, self.next_id, batch_size):
+            ids = np.arange(start, min(start + batch_size, self.next_id), dtype="int64")
+            self.index.add_with_ids(self._vectorize(ids), ids)
+        self.bm25 = BM25Index.build(
+            ([self.texts[i] for i in range(start, min(start + batch_size, self.next_id))],
+             range(start, min(start + batch_size, self.next_id)))
+            for start in range(first_id, self.next_id, batch_size)
+        )
+
+        self.metadata, self.ids, self._pos = [], [], {}
+        self.mmap = True
+        self._pending = []
+        self._rebuilt = False
+        self._streamed = (first_id, staged)
+
+        print(f"✅ {self.backend}/{self.index_type} index streamed with {self.index.ntotal} vectors "
+              f"({dim} terms)")
+
+    def _set_vocabulary(self, df, n_docs, max_features=None):
+        """Fit the vectorizer from document frequencies, the way fit() would
+        (its min_df / max_df pruning included)."""
+        min_df, max_df = self.vectorizer.min_df, self.vectorizer.max_df
+        low = min_df if isinstance(min_df, numbers.Integral) else min_df * n_docs
+        high = max_df if isinstance(max_df, numbers.Integral) else max_df * n_docs
+        df = Counter({term: count for term, count in df.items() if low <= count <= high})
+        if not df:
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+        terms = df.most_common(max_features) if max_features else df.items()
+        terms = sorted(terms)  # fit() numbers terms alphabetically
+        counts = np.array([count for _, count in terms], dtype=np.float64)
+        if self.vectorizer.smooth_idf:
+            idf = np.log((1 + n_docs) / (1 + counts)) + 1
+        else:
+            idf = np.log(n_docs / counts) + 1
+
+        self.vectorizer.vocabulary_ = {term: i for i, (term, _) in enumerate(terms)}
+        self.vectorizer.idf_ = idf
 
-        self.index = faiss.IndexFlatL2(dim)
-        self.index.add(np.array(vectors).astype("float32"))
+    @property
+    def embedding_model(self):
+        return self.vectorizer.model_name if self.embedder == "sentence" else None
 
-        print(f"✅ FAISS index built with {self.index.ntotal} vectors")
+    @property
+    def embedding_dim(self):
+        if self.embedder == "sentence":
+            return self.vectorizer.dim
+        return len(self.vectorizer.vocabulary_)
+
+    def _vectorize(self, ids):
+        return prepare_vectors(self.backend, self.vectorizer.transform(self.texts[int(i)] for i in ids))
+
+    def text(self, doc_id):
+        """Chunk text of a stored vector id."""
+        return self.texts[int(doc_id)] if self.mmap else self.texts[self._pos[int(doc_id)]]
+
+    def transform_ids(self, ids):
+        """L2-normalized embeddings of stored vectors, e.g. for RiskFacts.build(transform=...)."""
+        return self.vectorizer.transform(self.text(i) for i in ids)
+
+    def iter_texts(self):
+        """(id, chunk text) in id order, e.g. for ShingleIndex.build()."""
+        return ((m["id"], self.text(m["id"])) for m in self.iter_metadata())
+
+    def iter_metadata(self):
+        """Chunk records in id order: from memory, or from the doc store when serving from disk."""
+        if self._streamed:
+            return self.docs.iter_chunks(self._streamed[0], self.next_id)
+        if self.mmap:
+            return self.docs.iter_chunks()
+        return iter(self.metadata)
+
+    # ---------------- UPDATE ----------------
+    def update(self):
+        """
+        Vectorize only documents staged since the last build/update and add
+        them to the loaded index. Uses the persisted vocabulary/IDF as-is, so
+        terms never seen at build time are ignored until the next full build.
+        """
+        if self.index is None:
+            return self.build()
+        if not self._pending:
+            return
+
+        positions = [self._pos[doc_id] for doc_id in self._pending]
+        texts = [self.texts[p] for p in positions]
+        self.index.add_with_ids(
+            prepare_vectors(self.backend, self.vectorizer.transform(texts)),
+            np.array(self._pending, dtype="int64"),
+        )
+        self.bm25.add(texts, self._pending)
+
+        print(f"✅ Added {len(self._pending)} vectors ({self.index.ntotal} total)")
+        self._pending = []
 
     # ---------------- SAVE ----------------
-    def save(self):
+    def save(self, generation=None, artifacts=None):
+        """
+        artifacts: kind -> file name of derived artifacts already written for
+        `generation` (see manifest.artifact_name); recorded in the manifest.
+        """
         os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
 
-        faiss.write_index(self.index, self.index_path)
+        # every file is swapped in atomically so live readers never see a torn write
+        index_files = save_index(self.backend, self.index, self._index_file())
+
+        if self._streamed:
+            # rows and texts were written during the build; drop older generations
+            first_id, staged = self._streamed
+            self.docs.retain_chunks(first_id, self.next_id)
+            os.replace(staged, self.text_path)
+            n_texts = len(self.texts)
+            self._streamed = None
+        else:
+            # chunk rows: full rewrite after build(), otherwise only the id delta
+            self.docs = DocStore(self.docs_path, create=True)
+            if self._rebuilt:
+                self.docs.replace_chunks(self.metadata)
+            else:
+                self.docs.sync_chunks(self.metadata)
+            self._rebuilt = False
+
+            n_texts = save_texts(self.texts, self.ids, self.text_path)
+
+        checksum = save_embedder(self.vectorizer, self._vectorizer_file())
+
+        self.bm25.save(f"{self.bm25_path}.tmp")
+        os.replace(f"{self.bm25_path}.tmp", self.bm25_path)
 
-        with open(self.meta_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
+        # manifest goes last: it ties the index to the vectorizer it was built with,
+        # and a new generation tells running servers to hot-swap
+        self.generation = generation or uuid.uuid4().hex
+        manifest = {
+            "generation": self.generation,
+            "ntotal": self.index.ntotal,
+            "dim": self.index.d,
+            "next_id": self.next_id,
+            "index": {
+                "backend": self.backend,
+                "path": os.path.basename(self._index_file()),
+                "type": self.index_type,
+                "params": self.index_params,
+                "shards": self.shards,
+            },
+            "vectorizer": {
+                "kind": self.embedder,
+                "path": os.path.basename(self._vectorizer_file()),
+                "checksum": checksum,
+            },
+            "texts": {
+                "path": os.path.basename(self.text_path),
+                "count": n_texts,
+            },
+            "docs": {
+                "path": os.path.basename(self.docs_path),
+            },
+            "bm25": {
+                "path": os.path.basename(self.bm25_path),
+                "ntotal": self.bm25.ntotal,
+            },
+        }
+        if artifacts:
+            manifest["artifacts"] = dict(artifacts)
+            self.facts_path = os.path.join(os.path.dirname(self.manifest_path), artifacts["facts"])
+            self.facts = None
+        write_manifest(self.manifest_path, manifest)
 
-        with open(self.text_path, "w", encoding="utf-8") as f:
-            json.dump(self.texts, f)
+        # drop files of a previous shard layout; servers still mapping them keep their copy
+        base = self._index_file()
+        for path in glob.glob(f"{glob.escape(base)}.[0-9]*") + [base]:
+            if path not in index_files and not path.endswith(".tmp") and os.path.exists(path):
+                os.remove(path)
 
-        print("✅ FAISS index & metadata saved")
+        print("✅ FAISS index, vectorizer & metadata saved")
 
     # ---------------- LOAD ----------------
-    def load(self):
-        if not os.path.exists(self.index_path):
+    def load(self, mmap=False):
+        """
+        mmap=True is a read-only mode for serving: the index is memory-mapped,
+        and texts and metadata are fetched per hit, so loading is near-instant
+        and workers share pages. Use the default for ingestion (add/remove/save).
+        """
+        manifest = read_manifest(self.manifest_path)
+        self.backend = manifest["index"]["backend"]
+        self.index_type = manifest["index"].get("type", "flat")
+        self.index_params = manifest["index"].get("params", {})
+        self.shards = manifest["index"]["shards"]
+
+        if not all(os.path.exists(p) for p in shard_paths(self._index_file(), self.shards)):
             raise FileNotFoundError("❌ FAISS index not found. Run ingestion first.")
 
-        self.index = faiss.read_index(self.index_path)
+        self.index = open_index(
+            self.backend, self._index_file(), self.index_type, self.index_params,
+            mmap=mmap, n_shards=self.shards,
+        )
+        check_index(manifest, self.index)
+
+        self.docs = DocStore(self.docs_path)
+        texts = TextStore(self.text_path)
+        check_texts(manifest, texts)
+        self.bm25 = BM25Index.load(self.bm25_path)
+        check_bm25(manifest, self.bm25)
+
+        self.mmap = mmap
+        if mmap:
+            self.metadata, self.texts = [], texts
+        else:
+            self.metadata = self.docs.all_chunks()
+            self.texts = [texts[meta["id"]] for meta in self.metadata]
 
-        with open(self.meta_path, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        self.ids = [meta["id"] for meta in self.metadata]
+        self._pos = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._pending = []
+        self._rebuilt = False
+        self._streamed = None
+        self.facts = None
+        self.facts_path = artifact_path(os.path.dirname(self.manifest_path), manifest, "facts")
+        self.next_id = manifest["next_id"]
+        self.generation = manifest["generation"]
 
-        with open(self.text_path, "r", encoding="utf-8") as f:
-            self.texts = json.load(f)
+        # fitted vocab + IDF come from disk, never refit on the corpus
+        self.embedder = manifest["vectorizer"].get("kind", "tfidf")
+        self.vectorizer = load_embedder(
+            self.embedder,
+            self._vectorizer_file(),
+            expected_checksum=manifest["vectorizer"]["checksum"],
+            cache_path=self.embedding_cache_path,
+        )
 
-        # rebuild vectorizer vocab
-        self.vectorizer.fit(self.texts)
+        print(f"✅ Loaded {self.backend}/{self.index_type} index ({self.index.ntotal} vectors)")
 
-        print(f"✅ Loaded FAISS index ({self.index.ntotal} vectors)")
+    def _index_file(self):
+        return self.sparse_index_path if self.backend == "sparse" else self.index_path
+
+    def _vectorizer_file(self):
+        return self.embedder_path if self.embedder == "sentence" else self.vectorizer_path
 
     # ---------------- SEARCH ----------------
-    def search(self, query, top_k=3):
-        q_vec = self.vectorizer.transform([query]).toarray().astype("float32")
-        distances, indices = self.index.search(q_vec, top_k)
+    def search(self, query, top_k=3, mode="vector", fusion="rrf", rerank=False, filters=None):
+        """
+        mode="hybrid" fuses the vector ranking with BM25 (scores become fused scores).
+        rerank=True oversamples, demotes deprecated / older-version chunks using
+        the risk facts' priors (scores become relevance + prior) and adds each
+        stale hit's "current_equivalent" chunk.
+        filters: {"doc_types", "min_version", "max_version", "exclude_deprecated"}
+        (or a SearchFilter), applied inside the index search.
+        Both read self.facts, which the caller loads (see _facts).
+        """
+        search_filter = as_filter(filters)
+        id_filter = search_filter.compile(self._facts()) if search_filter else None
+
+        want = max(4 * top_k, 20) if rerank else top_k
+        depth = want if mode == "vector" else max(2 * want, 10)
+        q_vec = prepare_vectors(self.backend, encode_queries(self.vectorizer, [query]))
+        refine = resolve_params(self.index_type, self.index_params).get("refine", 0)
+        distances, indices = search_refined(self.index, q_vec, depth, refine, self.transform_ids, id_filter)
+
+        hits = [(float(d), int(doc_id)) for d, doc_id in zip(distances[0], indices[0])
+                if doc_id >= 0]  # fewer than top_k vectors in the index
+        if mode == "hybrid":
+            scores, ids = self.bm25.search(query, depth, id_filter)
+            fused = fuse([(i, d) for d, i in hits], list(zip(ids.tolist(), scores.tolist())), fusion)
+            hits = [(score, doc_id) for doc_id, score in fused[:want]]
+
+        current = {}
+        if rerank:
+            reranked = self._facts().rerank(relevance([(i, d) for d, i in hits], mode), top_k)
+            hits = [(score, doc_id) for doc_id, score, _ in reranked]
+            current = {doc_id: cur for doc_id, _, cur in reranked if cur is not None}
+
+        if self.mmap:
+            metas = self.docs.get_chunks([doc_id for _, doc_id in hits] + list(current.values()))
+        else:
+            metas = {doc_id: self.metadata[self._pos[doc_id]]
+                     for doc_id in [doc_id for _, doc_id in hits] + list(current.values())
+                     if doc_id in self._pos}
 
         results = []
-        for i, idx in enumerate(indices[0]):
-            results.append({
-                "score": float(distances[0][i]),
-                "text": self.texts[idx][:300],
-                "metadata": self.metadata[idx]
-            })
+        for score, doc_id in hits:
+            if doc_id not in metas:
+                continue
+            text = self.texts[doc_id] if self.mmap else self.texts[self._pos[doc_id]]
+            result = {
+                "score": score,
+                "text": text[:300],
+                "metadata": metas[doc_id]
+            }
+            if rerank:
+                result["current_equivalent"] = metas.get(current.get(doc_id))
+            results.append(result)
 
         return results
 
+    def _facts(self):
+        # built and loaded by drift_analysis (which imports this package), never here
+        if self.facts is None:
+            raise ValueError(
+                "❌ Re-ranking and filtered search need the risk facts: "
+                "set vs.facts = RiskFacts.load(vs.facts_path)"
+            )
+        return self.facts
+
     # ---------------- DATASET VIEW ----------------
     def list_datasets(self):
+        if self.mmap:
+            return self.docs.list_datasets()  # GROUP BY over the stored chunks
+
         datasets = {}
 
         for meta in self.metadata:
@@ -4,7 +4,7 @@ from vector_store.vector_store import VectorStore
 
 app = Flask(__name__)
 vs = VectorStore()
-vs.load()
+vs.load(mmap=True)
 
 @app.route("/")
 def home():
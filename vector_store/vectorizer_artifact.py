@@ -0,0 +1,160 @@
+"""
+On-disk TF-IDF vectorizer artifact.
+
+The fitted vocabulary + IDF weights are written next to faiss.index so loaders
+never have to refit the vectorizer on the corpus. Layout (little endian):
+
+    MAGIC (8 bytes) | header length (uint32) | header JSON | pad to 8 bytes
+    idf       float64[n_terms]
+    offsets   int64[n_terms + 1]   (byte offsets into the term blob)
+    terms     utf-8 blob           (term i = blob[offsets[i]:offsets[i+1]])
+
+Arrays are read through np.memmap, so loading costs O(vocabulary), not O(corpus).
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+MAGIC = b"GTTFIDF\0"
+FORMAT_VERSION = 1
+
+# TfidfVectorizer params that change what transform() produces
+SETTINGS_KEYS = (
+    "lowercase", "strip_accents", "stop_words", "token_pattern", "ngram_range",
+    "analyzer", "norm", "use_idf", "smooth_idf", "sublinear_tf", "binary",
+    "encoding", "decode_error", "dtype",
+)
+
+
+def _settings(vectorizer):
+    params = vectorizer.get_params()
+    settings = {}
+    for key in SETTINGS_KEYS:
+        value = params[key]
+        if key == "dtype":
+            value = np.dtype(value).name
+        elif key == "ngram_range":
+            value = list(value)
+        elif callable(value):
+            raise ValueError(f"❌ Cannot persist vectorizer with callable `{key}`")
+        settings[key] = value
+    return settings
+
+
+def _checksum(settings, idf, offsets, blob):
+    h = hashlib.sha256()
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    h.update(np.ascontiguousarray(idf, dtype="<f8").tobytes())
+    h.update(np.ascontiguousarray(offsets, dtype="<i8").tobytes())
+    h.update(blob)
+    return h.hexdigest()
+
+
+def save_vectorizer(vectorizer, path):
+    """Write a fitted TfidfVectorizer to `path`. Returns its checksum."""
+    settings = _settings(vectorizer)
+
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, col in vectorizer.vocabulary_.items():
+        terms[col] = term
+
+    encoded = [t.encode("utf-8") for t in terms]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(t) for t in encoded], out=offsets[1:])
+    blob = b"".join(encoded)
+
+    if settings["use_idf"]:
+        idf = np.asarray(vectorizer.idf_, dtype="<f8")
+    else:
+        idf = np.zeros(0, dtype="<f8")
+
+    checksum = _checksum(settings, idf, offsets, blob)
+    header = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "n_terms": len(terms),
+        "settings": settings,
+        "checksum": checksum,
+    }).encode("utf-8")
+    pad = -(len(MAGIC) + 4 + len(header)) % 8
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(header)).astype("<u4").tobytes())
+        f.write(header)
+        f.write(b"\0" * pad)
+        f.write(idf.tobytes())
+        f.write(offsets.tobytes())
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+    return checksum
+
+
+def read_header(path):
+    """Read only the JSON header of a vectorizer artifact."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"❌ {path} is not a GhostTrace vectorizer artifact")
+        header_len = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(
+            f"❌ Unsupported vectorizer format v{header['format_version']} "
+            f"(expected v{FORMAT_VERSION}). Re-run ingestion."
+        )
+    header["data_offset"] = len(MAGIC) + 4 + header_len + (-(len(MAGIC) + 4 + header_len) % 8)
+    return header
+
+
+def load_vectorizer(path, expected_checksum=None):
+    """
+    Memory-map a vectorizer artifact and return a ready-to-use TfidfVectorizer.
+
+    Raises ValueError if the artifact is corrupt or its checksum differs from
+    `expected_checksum` (the one recorded in the index manifest).
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"❌ Vectorizer artifact not found at {path}. Run ingestion first.")
+
+    header = read_header(path)
+    n_terms = header["n_terms"]
+    settings = header["settings"]
+    n_idf = n_terms if settings["use_idf"] else 0
+
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    start = header["data_offset"]
+    idf = raw[start:start + 8 * n_idf].view("<f8")
+    start += 8 * n_idf
+    offsets = raw[start:start + 8 * (n_terms + 1)].view("<i8")
+    start += 8 * (n_terms + 1)
+    blob = raw[start:start + int(offsets[-1])].tobytes()
+
+    checksum = _checksum(settings, idf, offsets, blob)
+    if checksum != header["checksum"]:
+        raise ValueError(f"❌ Vectorizer artifact {path} is corrupt (checksum mismatch)")
+    if expected_checksum is not None and checksum != expected_checksum:
+        raise ValueError(
+            f"❌ Vectorizer artifact {path} does not match the FAISS index. "
+            "Re-run ingestion."
+        )
+
+    params = dict(settings)
+    params["ngram_range"] = tuple(params["ngram_range"])
+    params["dtype"] = np.dtype(params["dtype"]).type
+    vectorizer = TfidfVectorizer(**params)
+
+    bounds = offsets.tolist()
+    vectorizer.vocabulary_ = {
+        blob[bounds[i]:bounds[i + 1]].decode("utf-8"): i
+        for i in range(n_terms)
+    }
+    if settings["use_idf"]:
+        vectorizer.idf_ = idf
+
+    return vectorizer